@@ -24,7 +24,8 @@ from extensions import app, socketio, login_manager, get_obs_client, set_obs_cli
 from config import (
     __version__, MAIN_PORT, WEBSOCKET_PORT,
     ANIMATIONS_DIR, VIDEOS_DIR, DATA_DIR, CONFIG_DIR, LOGS_DIR, THUMBNAILS_DIR,
-    USERS_FILE, setup_logging
+    USERS_FILE, TRIGGER_FILE, TRIGGER_SPOOL_DIR, TRIGGER_SPOOL_COALESCE, LOCAL_TRIGGER_SOCKET, LOCAL_TRIGGER_FIFO,
+    SOCKETIO_MESSAGE_QUEUE, WORKER_ROLE, is_primary_worker, setup_logging
 )
 
 # Import modules so they register their handlers / side effects
@@ -34,9 +35,10 @@ from media_manager import (
     ensure_state_file, get_animation_files, get_video_files
 )
 from device_tracking import set_raw_websocket_server
-from obs_manager import OBSWebSocketClient
-from scene_watcher import TriggerFileWatcher, OBSSceneWatcher
+from obs_manager import OBSWebSocketClient, set_scene_change_handler, set_scene_preload_handler, sync_obs_instances
+from scene_watcher import TriggerFileWatcher, TriggerSpoolWatcher, OBSSceneWatcher
 from websocket_server import RawWebSocketServer
+from local_trigger import LocalTriggerSocket, LocalTriggerFifo, is_enabled as is_local_trigger_enabled
 
 # Register Flask Blueprints
 from routes import register_routes
@@ -53,6 +55,107 @@ raw_websocket_server = RawWebSocketServer(port=WEBSOCKET_PORT)
 set_raw_websocket_server(raw_websocket_server)
 
 
+# =============================================================================
+# Background Services (primary worker only)
+# =============================================================================
+
+def start_background_services():
+    """Start the singleton services: file/scene watchers, raw WebSocket server, OBS client.
+
+    In multi-worker mode only the primary worker runs these; their Socket.IO
+    emits reach clients on every worker through the message queue.
+    """
+    # Initialize file trigger watcher for StreamerBot
+    logger.info("Starting file trigger watcher...")
+    file_watcher = TriggerFileWatcher(str(TRIGGER_FILE))
+    file_watcher.start_watching()
+    logger.info("File trigger watcher started")
+
+    # Lossless spool directory (one file per trigger) for bursty producers
+    spool_watcher = TriggerSpoolWatcher(TRIGGER_SPOOL_DIR, coalesce=TRIGGER_SPOOL_COALESCE)
+    spool_watcher.start_watching()
+
+    # Initialize OBS Scene Watcher for automatic animation triggering
+    logger.info("Starting OBS Scene Watcher...")
+    obs_scene_file = DATA_DIR / "config" / "obs_current_scene.json"
+    obs_mappings_file = DATA_DIR / "config" / "obs_mappings.json"
+    obs_scene_watcher = OBSSceneWatcher(str(obs_scene_file), str(obs_mappings_file))
+    obs_scene_watcher.start_watching()
+    set_scene_change_handler(obs_scene_watcher.dispatch_scene)
+    set_scene_preload_handler(obs_scene_watcher.preload_scene)
+    logger.info("OBS Scene Watcher started")
+
+    # Local trigger listeners (Unix socket / named pipe) for scripts on this host
+    if is_local_trigger_enabled(LOCAL_TRIGGER_SOCKET):
+        try:
+            LocalTriggerSocket(LOCAL_TRIGGER_SOCKET).start()
+        except Exception as e:
+            logger.error("Error starting local trigger socket: %s", e)
+    if is_local_trigger_enabled(LOCAL_TRIGGER_FIFO):
+        try:
+            LocalTriggerFifo(LOCAL_TRIGGER_FIFO).start()
+        except Exception as e:
+            logger.error("Error starting local trigger FIFO: %s", e)
+
+    # Start the raw WebSocket server for StreamerBot
+    logger.info("Starting Raw WebSocket server on port %d for StreamerBot...", WEBSOCKET_PORT)
+    try:
+        websocket_thread = raw_websocket_server.start_server()
+        logger.info("Raw WebSocket server started successfully")
+    except Exception as e:
+        logger.error("Error starting Raw WebSocket server: %s", e)
+        logger.warning("Continuing without Raw WebSocket server...")
+
+    # Give the WebSocket server a moment to start
+    time.sleep(1)
+    logger.info("Raw WebSocket server ready!")
+
+    # Extra named OBS instances connect in the background from their own supervisors
+    sync_obs_instances()
+
+    # Initialize OBS WebSocket client (will attempt connection if settings exist)
+    logger.info("Initializing OBS WebSocket client...")
+    obs_client = OBSWebSocketClient()
+    set_obs_client(obs_client)
+    logger.info("OBS WebSocket client initialized")
+
+    # Attempt auto-connection if settings exist
+    logger.info("Checking for existing OBS settings...")
+    if obs_client.load_settings():
+        settings_debug = obs_client.settings.copy()
+        if 'password' in settings_debug:
+            settings_debug['password'] = '[REDACTED]' if settings_debug['password'] else '[EMPTY]'
+        logger.info("Found OBS settings: %s", settings_debug)
+
+        logger.info("Forcing persistent OBS connection...")
+        try:
+            obs_client.auto_reconnect_enabled = True
+            obs_client.should_be_connected = True
+            logger.debug("Persistent connection flags set: auto_reconnect=True, should_be_connected=True")
+
+            obs_client.enable_persistent_connection()
+
+            if obs_client.connected:
+                logger.info("Successfully connected to OBS - persistent connection active")
+                logger.debug("Connection monitoring active: %s", obs_client.auto_reconnect_enabled)
+            else:
+                logger.warning("Initial connection failed but persistent reconnection is active")
+                logger.info("Connection monitor will continuously attempt reconnection...")
+
+        except Exception as e:
+            logger.error("OBS connection error during startup: %s", e)
+            logger.info("Forcing reconnection monitor anyway...")
+            try:
+                obs_client.auto_reconnect_enabled = True
+                obs_client.should_be_connected = True
+                obs_client._start_connection_monitor()
+                logger.info("Forced connection monitor started — will reconnect when OBS available")
+            except Exception as monitor_error:
+                logger.critical("Could not start connection monitor: %s", monitor_error)
+    else:
+        logger.info("No OBS settings found — connection will be available when configured")
+
+
 # =============================================================================
 # Main Application Startup
 # =============================================================================
@@ -135,75 +238,12 @@ if __name__ == '__main__':
     logger.info("=" * 84)
 
     try:
-        # Initialize file trigger watcher for StreamerBot
-        logger.info("Starting file trigger watcher...")
-        trigger_file = DATA_DIR / "trigger.txt"
-        file_watcher = TriggerFileWatcher(str(trigger_file))
-        file_watcher.start_watching()
-        logger.info("File trigger watcher started")
-
-        # Initialize OBS Scene Watcher for automatic animation triggering
-        logger.info("Starting OBS Scene Watcher...")
-        obs_scene_file = DATA_DIR / "config" / "obs_current_scene.json"
-        obs_mappings_file = DATA_DIR / "config" / "obs_mappings.json"
-        obs_scene_watcher = OBSSceneWatcher(str(obs_scene_file), str(obs_mappings_file))
-        obs_scene_watcher.start_watching()
-        logger.info("OBS Scene Watcher started")
-
-        # Start the raw WebSocket server for StreamerBot
-        logger.info("Starting Raw WebSocket server on port %d for StreamerBot...", WEBSOCKET_PORT)
-        try:
-            websocket_thread = raw_websocket_server.start_server()
-            logger.info("Raw WebSocket server started successfully")
-        except Exception as e:
-            logger.error("Error starting Raw WebSocket server: %s", e)
-            logger.warning("Continuing without Raw WebSocket server...")
-
-        # Give the WebSocket server a moment to start
-        time.sleep(1)
-        logger.info("Raw WebSocket server ready!")
-
-        # Initialize OBS WebSocket client (will attempt connection if settings exist)
-        logger.info("Initializing OBS WebSocket client...")
-        obs_client = OBSWebSocketClient()
-        set_obs_client(obs_client)
-        logger.info("OBS WebSocket client initialized")
-
-        # Attempt auto-connection if settings exist
-        logger.info("Checking for existing OBS settings...")
-        if obs_client.load_settings():
-            settings_debug = obs_client.settings.copy()
-            if 'password' in settings_debug:
-                settings_debug['password'] = '[REDACTED]' if settings_debug['password'] else '[EMPTY]'
-            logger.info("Found OBS settings: %s", settings_debug)
-
-            logger.info("Forcing persistent OBS connection...")
-            try:
-                obs_client.auto_reconnect_enabled = True
-                obs_client.should_be_connected = True
-                logger.debug("Persistent connection flags set: auto_reconnect=True, should_be_connected=True")
-
-                obs_client.enable_persistent_connection()
-
-                if obs_client.connected:
-                    logger.info("Successfully connected to OBS - persistent connection active")
-                    logger.debug("Connection monitoring active: %s", obs_client.auto_reconnect_enabled)
-                else:
-                    logger.warning("Initial connection failed but persistent reconnection is active")
-                    logger.info("Connection monitor will continuously attempt reconnection...")
-
-            except Exception as e:
-                logger.error("OBS connection error during startup: %s", e)
-                logger.info("Forcing reconnection monitor anyway...")
-                try:
-                    obs_client.auto_reconnect_enabled = True
-                    obs_client.should_be_connected = True
-                    obs_client._start_connection_monitor()
-                    logger.info("Forced connection monitor started — will reconnect when OBS available")
-                except Exception as monitor_error:
-                    logger.critical("Could not start connection monitor: %s", monitor_error)
+        if is_primary_worker():
+            start_background_services()
         else:
-            logger.info("No OBS settings found — connection will be available when configured")
+            logger.info("Secondary worker (WORKER_ROLE=%s) — raw WebSocket, watchers and OBS run on the primary worker", WORKER_ROLE)
+        if SOCKETIO_MESSAGE_QUEUE:
+            logger.info("Multi-worker mode: Socket.IO events fan out through the message queue")
 
         logger.info("Starting production server (eventlet)...")
         socketio.run(app, host='0.0.0.0', port=MAIN_PORT, debug=False)
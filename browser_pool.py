@@ -0,0 +1,291 @@
+"""
+Angels-TV-Animator: Headless browser pool for HTML thumbnails and preview clips.
+One long-lived Chromium (Playwright) with a bounded set of reusable pages,
+closed after a period of inactivity and relaunched if it crashes.
+"""
+
+import asyncio
+import logging
+import time
+from pathlib import Path
+
+from eventlet import patcher
+
+from config import THUMBNAIL_BROWSER_PAGES, THUMBNAIL_BROWSER_IDLE_SECONDS
+
+try:
+    from playwright.async_api import async_playwright
+    PLAYWRIGHT_AVAILABLE = True
+except ImportError:
+    PLAYWRIGHT_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Playwright objects belong to the asyncio loop that created them, so the pool
+# runs its own loop in a real OS thread (not a green thread) and callers on any
+# other loop hand their work over to it.
+_threading = patcher.original('threading')
+
+CHROMIUM_ARGS = [
+    '--no-sandbox',
+    '--disable-dev-shm-usage',
+    '--disable-gpu',
+    '--disable-extensions',
+    '--disable-background-timer-throttling',
+    '--disable-backgrounding-occluded-windows',
+    '--disable-renderer-backgrounding',
+]
+
+PAGE_TIMEOUT_MS = 10000     # navigation / screenshot timeout per render
+MAX_RENDERS_PER_PAGE = 50   # recycle pages so long-running animations can't leak memory
+
+
+class BrowserPool:
+    """Shared Chromium for screenshots.
+
+    - at most ``max_pages`` renders run at once; finished pages go back to the pool
+    - the browser is launched on first use and closed after ``idle_seconds``
+      without renders
+    - a crashed or disconnected browser is dropped and relaunched on the next
+      render (a render that hit the crash is retried once)
+    """
+
+    def __init__(self, max_pages=THUMBNAIL_BROWSER_PAGES, idle_seconds=THUMBNAIL_BROWSER_IDLE_SECONDS):
+        self.max_pages = max(1, max_pages)
+        self.idle_seconds = idle_seconds
+        self._loop = None
+        self._loop_lock = _threading.Lock()
+        self._playwright = None
+        self._browser = None
+        self._launch_lock = None
+        self._semaphore = None
+        self._idle_pages = []        # [(page, renders)]
+        self._active = 0
+        self._last_used = time.monotonic()
+        self._idle_task = None
+        self.stats = {'launches': 0, 'renders': 0, 'recordings': 0, 'failures': 0, 'crashes': 0,
+                      'pages_created': 0, 'idle_shutdowns': 0}
+
+    # =========================================================================
+    # Public API (callable from any asyncio loop)
+    # =========================================================================
+
+    async def screenshot(self, url, path, width, height, delay_ms=0):
+        """Load ``url`` in a pooled page and save a ``width`` x ``height`` PNG to ``path``"""
+        if not PLAYWRIGHT_AVAILABLE:
+            raise RuntimeError('Playwright is not installed')
+        future = asyncio.run_coroutine_threadsafe(
+            self._screenshot(url, str(path), width, height, delay_ms), self._ensure_loop()
+        )
+        return await asyncio.wrap_future(future)
+
+    async def record(self, url, path, width, height, duration_ms):
+        """Record ``duration_ms`` of ``url`` playing into a WebM at ``path``"""
+        if not PLAYWRIGHT_AVAILABLE:
+            raise RuntimeError('Playwright is not installed')
+        future = asyncio.run_coroutine_threadsafe(
+            self._record(url, str(path), width, height, duration_ms), self._ensure_loop()
+        )
+        return await asyncio.wrap_future(future)
+
+    def shutdown(self):
+        """Close the browser now (it is relaunched on the next render)"""
+        if self._loop is not None:
+            asyncio.run_coroutine_threadsafe(self._close_browser(), self._loop).result(timeout=30)
+
+    def get_stats(self):
+        return {
+            **self.stats,
+            'running': self._browser is not None,
+            'active_renders': self._active,
+            'idle_pages': len(self._idle_pages),
+            'max_pages': self.max_pages,
+        }
+
+    # =========================================================================
+    # Pool loop
+    # =========================================================================
+
+    def _ensure_loop(self):
+        with self._loop_lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                ready = _threading.Event()
+
+                def run():
+                    asyncio.set_event_loop(loop)
+                    self._launch_lock = asyncio.Lock()
+                    self._semaphore = asyncio.Semaphore(self.max_pages)
+                    loop.call_soon(ready.set)
+                    loop.run_forever()
+
+                _threading.Thread(target=run, name='browser-pool', daemon=True).start()
+                ready.wait()
+                self._loop = loop
+            return self._loop
+
+    async def _screenshot(self, url, path, width, height, delay_ms):
+        async with self._semaphore:
+            self._active += 1
+            try:
+                for attempt in (1, 2):
+                    try:
+                        await self._render(url, path, width, height, delay_ms)
+                        self.stats['renders'] += 1
+                        return True
+                    except Exception as e:
+                        if attempt == 1 and not self._browser_alive():
+                            logger.warning("Browser died while rendering %s — relaunching: %s", url, e)
+                            self.stats['crashes'] += 1
+                            await self._drop_browser()
+                            continue
+                        self.stats['failures'] += 1
+                        raise
+            finally:
+                self._active -= 1
+                self._last_used = time.monotonic()
+
+    async def _record(self, url, path, width, height, duration_ms):
+        # Video capture is per browser context, so recordings use a fresh
+        # context instead of a pooled page (but still count against max_pages)
+        async with self._semaphore:
+            self._active += 1
+            try:
+                await self._ensure_browser()
+                size = {'width': width, 'height': height}
+                context = await self._browser.new_context(
+                    viewport=size, record_video_dir=str(Path(path).parent), record_video_size=size
+                )
+                try:
+                    page = await context.new_page()
+                    page.set_default_timeout(PAGE_TIMEOUT_MS)
+                    await page.goto(url, wait_until='networkidle')
+                    await page.wait_for_timeout(duration_ms)
+                    video = page.video
+                finally:
+                    # The recording is only finalized once the context closes
+                    await context.close()
+                await video.save_as(path)
+                await video.delete()
+                self.stats['recordings'] += 1
+                return True
+            except Exception:
+                self.stats['failures'] += 1
+                raise
+            finally:
+                self._active -= 1
+                self._last_used = time.monotonic()
+
+    async def _render(self, url, path, width, height, delay_ms):
+        page, renders = await self._acquire_page()
+        healthy = False
+        try:
+            await page.set_viewport_size({'width': width, 'height': height})
+            await page.goto(url, wait_until='networkidle')
+            if delay_ms:
+                await page.wait_for_timeout(delay_ms)
+            await page.screenshot(path=path, type='png',
+                                  clip={'x': 0, 'y': 0, 'width': width, 'height': height})
+            healthy = True
+        finally:
+            await self._release_page(page, renders + 1, healthy)
+
+    async def _acquire_page(self):
+        await self._ensure_browser()
+        while self._idle_pages:
+            page, renders = self._idle_pages.pop()
+            if not page.is_closed():
+                return page, renders
+        page = await self._browser.new_page()
+        page.set_default_timeout(PAGE_TIMEOUT_MS)
+        self.stats['pages_created'] += 1
+        return page, 0
+
+    async def _release_page(self, page, renders, healthy):
+        if healthy and renders < MAX_RENDERS_PER_PAGE and self._browser_alive():
+            try:
+                # Stop the animation so idle pages don't burn CPU
+                await page.goto('about:blank')
+                self._idle_pages.append((page, renders))
+                return
+            except Exception:
+                pass
+        try:
+            await page.close()
+        except Exception:
+            pass
+
+    # =========================================================================
+    # Browser lifecycle
+    # =========================================================================
+
+    def _browser_alive(self):
+        return self._browser is not None and self._browser.is_connected()
+
+    async def _ensure_browser(self):
+        async with self._launch_lock:
+            if self._browser_alive():
+                return
+            await self._drop_browser()
+
+            started = time.monotonic()
+            self._playwright = await async_playwright().start()
+            self._browser = await self._playwright.chromium.launch(headless=True, args=CHROMIUM_ARGS)
+            self._browser.on('disconnected', lambda browser: self._on_disconnected(browser))
+            self.stats['launches'] += 1
+            logger.info("Thumbnail browser launched in %.2fs (up to %d pages)",
+                        time.monotonic() - started, self.max_pages)
+
+            if self._idle_task is None or self._idle_task.done():
+                self._idle_task = asyncio.ensure_future(self._idle_watch())
+
+    def _on_disconnected(self, browser):
+        if browser is self._browser:
+            logger.warning("Thumbnail browser disconnected")
+            self._browser = None
+            self._idle_pages = []
+
+    def _idle_expired(self):
+        return self._active == 0 and time.monotonic() - self._last_used >= self.idle_seconds
+
+    async def _idle_watch(self):
+        while self._browser is not None:
+            await asyncio.sleep(max(1.0, self.idle_seconds / 4))
+            if not self._idle_expired():
+                continue
+            async with self._launch_lock:
+                # A render may have started while we waited for the lock
+                if self._browser is not None and self._idle_expired():
+                    logger.info("Closing thumbnail browser after %.0fs idle", self.idle_seconds)
+                    self.stats['idle_shutdowns'] += 1
+                    await self._drop_browser()
+
+    async def _close_browser(self):
+        async with self._launch_lock:
+            await self._drop_browser()
+
+    async def _drop_browser(self):
+        browser, self._browser = self._browser, None
+        playwright, self._playwright = self._playwright, None
+        self._idle_pages = []
+        if browser is not None:
+            try:
+                await browser.close()
+            except Exception as e:
+                logger.debug("Error closing thumbnail browser: %s", e)
+        if playwright is not None:
+            try:
+                await playwright.stop()
+            except Exception as e:
+                logger.debug("Error stopping Playwright: %s", e)
+
+
+_browser_pool = None
+
+
+def get_browser_pool():
+    """Get or create the shared browser pool"""
+    global _browser_pool
+    if _browser_pool is None:
+        _browser_pool = BrowserPool()
+    return _browser_pool
@@ -15,6 +15,38 @@ __version__ = "0.9.7"
 MAIN_PORT = int(os.environ.get('PORT', 8080))
 WEBSOCKET_PORT = MAIN_PORT + 1  # Raw WebSocket port is always main port + 1
 
+# Multi-worker scaling
+# SOCKETIO_MESSAGE_QUEUE: unset = single process; 'redis://host:6379/0' (or any
+# kombu URL) = fan out events across workers; 'local://' = in-process loopback.
+SOCKETIO_MESSAGE_QUEUE = os.environ.get('SOCKETIO_MESSAGE_QUEUE', '').strip() or None
+SOCKETIO_CHANNEL = os.environ.get('SOCKETIO_CHANNEL', 'angels-tv-animator')
+# Only the 'primary' worker runs the singleton services (raw WebSocket server,
+# file/scene watchers, OBS client). Additional workers set WORKER_ROLE=secondary.
+WORKER_ROLE = os.environ.get('WORKER_ROLE', 'primary').strip().lower()
+
+# Raw WebSocket (StreamerBot) transport tuning
+RAW_WS_PING_INTERVAL = float(os.environ.get('RAW_WS_PING_INTERVAL', 20))   # seconds, 0 disables pings
+RAW_WS_PING_TIMEOUT = float(os.environ.get('RAW_WS_PING_TIMEOUT', 10))     # seconds to wait for a pong
+RAW_WS_SEND_TIMEOUT = float(os.environ.get('RAW_WS_SEND_TIMEOUT', 10))     # seconds before a stalled send disconnects
+RAW_WS_SEND_QUEUE_SIZE = int(os.environ.get('RAW_WS_SEND_QUEUE_SIZE', 256))  # outbound frames buffered per client
+# What to do when a client's send queue is full: 'drop_oldest' or 'disconnect'
+RAW_WS_OVERFLOW_POLICY = os.environ.get('RAW_WS_OVERFLOW_POLICY', 'drop_oldest').strip().lower()
+
+# File watcher backend: 'auto' (inotify on Linux, else polling), 'inotify' or 'poll'
+FILE_WATCH_BACKEND = os.environ.get('FILE_WATCH_BACKEND', 'auto').strip().lower()
+
+# HTML thumbnail rendering: one long-lived headless Chromium with a bounded page pool
+THUMBNAIL_BROWSER_PAGES = int(os.environ.get('THUMBNAIL_BROWSER_PAGES', 3))          # concurrent renders
+THUMBNAIL_BROWSER_IDLE_SECONDS = float(os.environ.get('THUMBNAIL_BROWSER_IDLE_SECONDS', 120))  # close browser when idle
+# Concurrent ffmpeg thumbnail jobs; default leaves one core for the web server
+THUMBNAIL_VIDEO_WORKERS = int(os.environ.get('THUMBNAIL_VIDEO_WORKERS', max(1, (os.cpu_count() or 2) - 1)))
+
+
+def is_primary_worker():
+    """True if this process owns the singleton background services"""
+    return WORKER_ROLE != 'secondary'
+
+
 def get_current_port():
     """Get the current server port based on environment (development vs production)"""
     if os.environ.get('FLASK_ENV') == 'development':
@@ -30,7 +62,30 @@ CONFIG_DIR = DATA_DIR / "config"
 LOGS_DIR = DATA_DIR / "logs"
 THUMBNAILS_DIR = DATA_DIR / "thumbnails"
 STATE_FILE = DATA_DIR / "state.json"
+TRIGGER_FILE = DATA_DIR / "trigger.txt"
+TRIGGER_SPOOL_DIR = DATA_DIR / "triggers"  # One file per trigger, consumed in name order
+# Opt-in: apply only the last valid trigger of each spool batch (one TV refresh per burst)
+TRIGGER_SPOOL_COALESCE = os.environ.get('TRIGGER_SPOOL_COALESCE', '').strip().lower() in ('1', 'true', 'yes')
+# Local trigger listeners (newline-delimited commands). Both are off by default:
+# they run trigger actions without authentication, so enable one by setting a
+# path (e.g. LOCAL_TRIGGER_SOCKET=data/ata.sock) only on hosts you trust.
+LOCAL_TRIGGER_SOCKET = os.environ.get('LOCAL_TRIGGER_SOCKET', 'off')
+LOCAL_TRIGGER_FIFO = os.environ.get('LOCAL_TRIGGER_FIFO', 'off')
 USERS_FILE = CONFIG_DIR / "users.json"
+# Named OBS connections: "main" uses obs_settings.json, extra instances obs_instances.json
+DEFAULT_OBS_INSTANCE = 'main'
+# Scene mappings/event rules without an "instance" field follow the main OBS
+# only; "instance": "*" opts an entry into every connection
+ANY_OBS_INSTANCE = '*'
+
+
+def obs_instance_scopes(instance):
+    """Mapping/rule scopes that apply to events from ``instance``, most specific first"""
+    if instance == DEFAULT_OBS_INSTANCE:
+        return (instance, None, ANY_OBS_INSTANCE)
+    return (instance, ANY_OBS_INSTANCE)
+
+OBS_INSTANCES_FILE = CONFIG_DIR / "obs_instances.json"
 
 # Upload limits
 MAX_UPLOAD_SIZE_MB = 500  # Maximum file upload size in megabytes
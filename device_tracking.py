@@ -1,17 +1,47 @@
 """
 Angels-TV-Animator: Connected device tracking module.
-Manages Socket.IO client tracking and device info aggregation.
+Manages Socket.IO client tracking, device info aggregation, and debounced
+device-list deltas for admin dashboards.
 """
 
 import logging
+import threading
 import time
+from collections import deque
+
+from extensions import socketio
+from event_stream import emit_event
 
 logger = logging.getLogger(__name__)
 
+# Socket.IO room joined by admin dashboards — device updates go only here
+ADMIN_ROOM = 'admins'
+# Socket.IO room joined by TV displays — TV-targeted traffic (page_refresh,
+# video_control) goes only here instead of to every connected client
+TV_ROOM = 'tvs'
+
+# Device classes a client may declare in the register_device handshake
+DEVICE_CLASSES = ('tv', 'admin', 'mobile', 'overlay', 'integration')
+DEFAULT_CHANNEL = 'main'
+# Boolean capabilities a client may declare; each has a room (cap:<name>)
+DEVICE_CAPABILITIES = ('soft_swap', 'hls')
+
+# Bursts of connects/disconnects within this window are sent as one batch
+DEVICE_DELTA_DEBOUNCE_SECONDS = 0.25
+
+# TV health telemetry
+TELEMETRY_HISTORY_SIZE = 60           # Samples kept per device (~15 min at the 15 s client interval)
+TELEMETRY_MIN_INTERVAL_SECONDS = 2    # Samples arriving faster than this are dropped
+TELEMETRY_NUMERIC_FIELDS = (
+    'rtt_ms', 'fps', 'dropped_frames', 'total_frames', 'js_heap_mb', 'load_time_ms'
+)
+
 
 # Shared mutable state for connected devices
-connected_devices = {}  # {session_id: {'type': 'tv'|'admin', 'user_agent': str, 'connected_at': timestamp}}
+connected_devices = {}  # {session_id: {'type': DEVICE_CLASSES, 'user_agent': str, 'connected_at': timestamp,
+                       #               'registered': bool, 'channel': str, 'capabilities': dict}}
 admin_sessions = set()  # Track admin dashboard sessions
+device_telemetry = {}  # {session_id: deque([sample, ...], maxlen=TELEMETRY_HISTORY_SIZE)}
 
 # Reference to RawWebSocketServer — set by app.py at startup
 _raw_websocket_server = None
@@ -23,20 +53,24 @@ def set_raw_websocket_server(server):
     _raw_websocket_server = server
 
 
+def get_raw_websocket_metrics():
+    """Raw WebSocket server metrics (clients, event bridge queues), or None if not running."""
+    if _raw_websocket_server is None:
+        return None
+    return _raw_websocket_server.get_metrics()
+
+
 def get_connected_devices_info():
     """Get information about all connected devices across all transports."""
     tv_devices = []
     admin_count = 0
     streamerbot_devices = []
+    class_counts = dict.fromkeys(DEVICE_CLASSES, 0)
     
     for session_id, device_info in connected_devices.items():
+        class_counts[device_info['type']] = class_counts.get(device_info['type'], 0) + 1
         if device_info['type'] == 'tv':
-            tv_devices.append({
-                'id': session_id,
-                'type': 'tv',
-                'user_agent': device_info['user_agent'],
-                'connected_at': device_info['connected_at']
-            })
+            tv_devices.append(_device_summary(session_id, device_info))
         elif device_info['type'] == 'admin':
             admin_count += 1
     
@@ -61,6 +95,7 @@ def get_connected_devices_info():
         'admin_count': admin_count,
         'streamerbot_devices': streamerbot_devices,
         'streamerbot_count': streamerbot_count,
+        'class_counts': class_counts,
         'total_count': len(connected_devices) + streamerbot_count
     }
 
@@ -68,3 +103,292 @@ def get_connected_devices_info():
 def get_tv_devices_count():
     """Get count of connected TV devices (excluding admin)"""
     return len([d for d in connected_devices.values() if d['type'] == 'tv'])
+
+
+# =============================================================================
+# Device Registration Handshake
+# =============================================================================
+# Clients declare what they are instead of being guessed from the Referer.
+# Unregistered (legacy) clients are treated as TVs.
+
+def channel_room(channel):
+    """Socket.IO room name for a display channel"""
+    return f"channel:{channel}"
+
+
+def capability_room(capability):
+    """Socket.IO room name for clients that declared a capability"""
+    return f"cap:{capability}"
+
+
+def _normalize_capabilities(raw):
+    """Keep only known capability flags and a sane screen size"""
+    if not isinstance(raw, dict):
+        raw = {}
+
+    capabilities = {name: bool(raw.get(name, False)) for name in DEVICE_CAPABILITIES}
+
+    screen = raw.get('screen')
+    if isinstance(screen, dict):
+        try:
+            width = int(screen.get('width', 0))
+            height = int(screen.get('height', 0))
+            if 0 < width <= 16384 and 0 < height <= 16384:
+                capabilities['screen'] = {'width': width, 'height': height}
+        except (TypeError, ValueError):
+            pass
+
+    return capabilities
+
+
+def get_device_rooms(device_info):
+    """Rooms a device belongs to based on its class, channel and capabilities"""
+    rooms = set()
+    if device_info['type'] == 'admin':
+        rooms.add(ADMIN_ROOM)
+    if device_info['type'] == 'tv':
+        rooms.add(TV_ROOM)
+        rooms.add(channel_room(device_info.get('channel', DEFAULT_CHANNEL)))
+        for name, enabled in device_info.get('capabilities', {}).items():
+            if enabled is True:
+                rooms.add(capability_room(name))
+    return rooms
+
+
+def normalize_device_class(value):
+    """Canonical form of a client-declared device class ('Admin ' -> 'admin')"""
+    return str(value if value is not None else '').strip().lower()
+
+
+def register_device(session_id, data):
+    """Apply a client's register_device handshake to the registry.
+
+    Returns ``(device_info, error)``; ``device_info`` is None on error.
+    Room membership changes are left to the caller (it owns the request
+    context needed for join_room/leave_room).
+    """
+    device_info = connected_devices.get(session_id)
+    if device_info is None:
+        return None, 'Unknown session'
+    if not isinstance(data, dict):
+        return None, 'Registration payload must be an object'
+
+    device_class = normalize_device_class(data.get('device_class'))
+    if device_class not in DEVICE_CLASSES:
+        return None, f"Unknown device class '{device_class}' (expected one of {', '.join(DEVICE_CLASSES)})"
+
+    channel = str(data.get('channel') or DEFAULT_CHANNEL).strip()[:32] or DEFAULT_CHANNEL
+
+    device_info['type'] = device_class
+    device_info['channel'] = channel
+    device_info['capabilities'] = _normalize_capabilities(data.get('capabilities'))
+    device_info['registered'] = True
+
+    if device_class == 'admin':
+        admin_sessions.add(session_id)
+    else:
+        admin_sessions.discard(session_id)
+
+    return device_info, None
+
+
+# =============================================================================
+# Incremental Device Updates
+# =============================================================================
+# Instead of rebuilding and broadcasting the full device list to every client
+# on each connect/disconnect, changes are queued as compact deltas, coalesced
+# per device, and flushed to the admin room once per debounce window.
+
+_pending_deltas = {}      # {device_id: {'op': 'add'|'update'|'remove', ...}}
+_pending_lock = threading.Lock()
+_flush_scheduled = False
+_delta_seq = 0
+
+
+def _device_summary(session_id, device_info):
+    """Compact representation of a device for snapshots and delta payloads"""
+    return {
+        'id': session_id,
+        'type': device_info.get('type'),
+        'user_agent': device_info.get('user_agent'),
+        'connected_at': device_info.get('connected_at'),
+        'registered': device_info.get('registered', False),
+        'channel': device_info.get('channel', DEFAULT_CHANNEL),
+        'capabilities': device_info.get('capabilities', {})
+    }
+
+
+def _device_counts():
+    """Cheap per-type counters sent alongside every delta batch"""
+    tv_count = 0
+    admin_count = 0
+    for device_info in connected_devices.values():
+        if device_info['type'] == 'tv':
+            tv_count += 1
+        elif device_info['type'] == 'admin':
+            admin_count += 1
+
+    streamerbot_count = len(_raw_websocket_server.clients) if _raw_websocket_server else 0
+    return {
+        'tv_count': tv_count,
+        'admin_count': admin_count,
+        'streamerbot_count': streamerbot_count,
+        'total_count': len(connected_devices) + streamerbot_count
+    }
+
+
+def queue_device_delta(op, session_id, device_info=None):
+    """Queue a device change ('add', 'update' or 'remove') for the next admin batch.
+
+    Changes to the same device inside one window are coalesced, so a client
+    that connects and disconnects within the window produces no traffic.
+    """
+    global _flush_scheduled
+
+    with _pending_lock:
+        previous = _pending_deltas.get(session_id)
+
+        if op == 'remove':
+            if previous and previous['op'] == 'add':
+                # Never announced — drop it entirely
+                del _pending_deltas[session_id]
+            else:
+                _pending_deltas[session_id] = {'op': 'remove', 'id': session_id}
+        else:
+            if previous and previous['op'] == 'add':
+                op = 'add'  # still unannounced; keep it an add with fresh data
+            _pending_deltas[session_id] = {
+                'op': op,
+                'device': _device_summary(session_id, device_info or {})
+            }
+
+        if _flush_scheduled:
+            return
+        _flush_scheduled = True
+
+    socketio.start_background_task(_flush_device_deltas)
+
+
+def _flush_device_deltas():
+    """Send all pending deltas to admin subscribers as one batch"""
+    global _flush_scheduled, _delta_seq
+
+    socketio.sleep(DEVICE_DELTA_DEBOUNCE_SECONDS)
+
+    with _pending_lock:
+        changes = list(_pending_deltas.values())
+        _pending_deltas.clear()
+        _flush_scheduled = False
+        if not changes:
+            return
+        _delta_seq += 1
+        seq = _delta_seq
+
+    try:
+        emit_event('device', 'devices_delta', {
+            'seq': seq,
+            'changes': changes,
+            'counts': _device_counts()
+        }, room=ADMIN_ROOM)
+        logger.debug("Sent device delta batch #%d (%d changes)", seq, len(changes))
+    except Exception as e:
+        logger.error("Error sending device delta batch: %s", e)
+
+
+def get_devices_snapshot():
+    """Full device list plus the delta sequence it corresponds to"""
+    with _pending_lock:
+        seq = _delta_seq
+    snapshot = get_connected_devices_info()
+    snapshot['seq'] = seq
+    return snapshot
+
+
+
+# =============================================================================
+# Device Health Telemetry
+# =============================================================================
+
+def record_device_telemetry(session_id, data):
+    """Store one telemetry sample reported by a TV client.
+
+    Only TVs report telemetry, and only known numeric fields (plus
+    ``current_media``) are kept, so a misbehaving page can't grow server
+    memory. Returns False if the sample was rejected.
+    """
+    device_info = connected_devices.get(session_id)
+    if device_info is None or device_info['type'] != 'tv' or not isinstance(data, dict):
+        return False
+
+    now = time.time()
+    history = device_telemetry.get(session_id)
+    if history and now - history[-1]['timestamp'] < TELEMETRY_MIN_INTERVAL_SECONDS:
+        return False
+
+    sample = {'timestamp': now}
+    for field in TELEMETRY_NUMERIC_FIELDS:
+        value = data.get(field)
+        if isinstance(value, (int, float)) and not isinstance(value, bool) and value >= 0:
+            sample[field] = round(float(value), 2)
+
+    current_media = data.get('current_media')
+    if isinstance(current_media, str):
+        sample['current_media'] = current_media[:255]
+
+    if history is None:
+        history = device_telemetry[session_id] = deque(maxlen=TELEMETRY_HISTORY_SIZE)
+    history.append(sample)
+    return True
+
+
+def clear_device_telemetry(session_id):
+    """Drop telemetry history for a disconnected device"""
+    device_telemetry.pop(session_id, None)
+
+
+def _summarize_telemetry(history):
+    """Aggregate a device's ring buffer into min/avg/max figures"""
+    summary = {'samples': len(history)}
+
+    rtts = [s['rtt_ms'] for s in history if 'rtt_ms' in s]
+    if rtts:
+        summary['avg_rtt_ms'] = round(sum(rtts) / len(rtts), 1)
+        summary['max_rtt_ms'] = max(rtts)
+
+    fps_values = [s['fps'] for s in history if 'fps' in s]
+    if fps_values:
+        summary['avg_fps'] = round(sum(fps_values) / len(fps_values), 1)
+        summary['min_fps'] = min(fps_values)
+
+    # Dropped/total frame counters are cumulative per page load, so the
+    # latest sample carrying them is the current figure
+    for sample in reversed(history):
+        if 'dropped_frames' in sample and sample.get('total_frames'):
+            summary['dropped_frames'] = sample['dropped_frames']
+            summary['dropped_ratio'] = round(sample['dropped_frames'] / sample['total_frames'], 4)
+            break
+
+    return summary
+
+
+def get_device_telemetry(include_history=False):
+    """Latest sample and summary for every connected TV that reports telemetry"""
+    devices = []
+    for session_id, history in list(device_telemetry.items()):
+        device_info = connected_devices.get(session_id)
+        if not device_info or device_info['type'] != 'tv' or not history:
+            continue
+
+        entry = {
+            'id': session_id,
+            'type': device_info['type'],
+            'user_agent': device_info['user_agent'],
+            'connected_at': device_info['connected_at'],
+            'latest': history[-1],
+            'summary': _summarize_telemetry(history)
+        }
+        if include_history:
+            entry['history'] = list(history)
+        devices.append(entry)
+
+    return devices
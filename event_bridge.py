@@ -0,0 +1,193 @@
+"""
+Angels-TV-Animator: Cross-loop event bridge.
+Hands work between the raw WebSocket server's asyncio loop and the
+eventlet hub that owns Flask-SocketIO, state files and emits.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+
+from eventlet.hubs import trampoline
+
+from extensions import socketio
+
+logger = logging.getLogger(__name__)
+
+# Default bound for each direction of the bridge
+BRIDGE_MAX_DEPTH = 256
+
+
+class BridgeFullError(Exception):
+    """Raised when the command queue is at capacity"""
+
+
+class EventBridge:
+    """Bounded two-way handoff between an asyncio loop and the eventlet hub.
+
+    - asyncio -> eventlet: ``await bridge.call(fn, *args)`` queues a command.
+      A background task on the eventlet side runs it (so blocking file I/O and
+      ``socketio.emit`` happen on the right hub) and the result is handed back
+      with ``loop.call_soon_threadsafe``.
+    - eventlet -> asyncio: ``bridge.push(callback, *args)`` queues a callback
+      that runs on the asyncio loop (used for push events to raw clients).
+
+    Both queues are ``collections.deque`` objects, whose append/popleft are
+    atomic, so neither side takes a lock. The eventlet side is woken through
+    a self-pipe; the asyncio side through the loop's own threadsafe wakeup.
+    Commands are rejected when the command queue is full; push events drop
+    the oldest entry instead.
+    """
+
+    def __init__(self, name='bridge', max_depth=BRIDGE_MAX_DEPTH):
+        self.name = name
+        self.max_depth = max_depth
+        self._commands = deque()
+        self._events = deque(maxlen=max_depth)
+        self._loop = None
+        self._running = False
+        self._wake_pending = False
+        self._events_scheduled = False
+        self._read_fd, self._write_fd = os.pipe()
+        os.set_blocking(self._read_fd, False)
+        os.set_blocking(self._write_fd, False)
+
+        self._metrics = {
+            'commands_posted': 0,
+            'commands_rejected': 0,
+            'commands_completed': 0,
+            'commands_failed': 0,
+            'command_max_depth': 0,
+            'command_wait_ms_total': 0.0,
+            'events_posted': 0,
+            'events_dropped': 0,
+            'events_delivered': 0,
+            'event_max_depth': 0,
+        }
+
+    # -------------------------------------------------------------------------
+    # Lifecycle
+    # -------------------------------------------------------------------------
+
+    def attach_loop(self, loop):
+        """Bind the asyncio loop that receives results and push events"""
+        self._loop = loop
+
+    def start(self):
+        """Start the eventlet-side command drainer"""
+        if self._running:
+            return
+        self._running = True
+        socketio.start_background_task(self._drain_commands)
+        logger.info("Event bridge '%s' started (max depth %d)", self.name, self.max_depth)
+
+    def stop(self):
+        self._running = False
+        self._wake()
+
+    # -------------------------------------------------------------------------
+    # asyncio -> eventlet
+    # -------------------------------------------------------------------------
+
+    async def call(self, fn, *args):
+        """Run ``fn(*args)`` on the eventlet hub and await its result"""
+        if len(self._commands) >= self.max_depth:
+            self._metrics['commands_rejected'] += 1
+            raise BridgeFullError(f"Event bridge '{self.name}' is full ({self.max_depth} pending commands)")
+
+        future = asyncio.get_running_loop().create_future()
+        self._commands.append((fn, args, future, time.monotonic()))
+        self._metrics['commands_posted'] += 1
+        self._metrics['command_max_depth'] = max(self._metrics['command_max_depth'], len(self._commands))
+        self._wake()
+        return await future
+
+    def _wake(self):
+        if self._wake_pending:
+            return
+        self._wake_pending = True
+        try:
+            os.write(self._write_fd, b'\0')
+        except BlockingIOError:
+            pass  # Pipe already holds a wakeup byte
+
+    def _wait_for_wake(self):
+        trampoline(self._read_fd, read=True)
+        try:
+            os.read(self._read_fd, 4096)
+        except BlockingIOError:
+            pass
+
+    def _drain_commands(self):
+        while self._running:
+            self._wait_for_wake()
+            self._wake_pending = False
+
+            while self._commands:
+                fn, args, future, posted_at = self._commands.popleft()
+                self._metrics['command_wait_ms_total'] += (time.monotonic() - posted_at) * 1000
+                try:
+                    result, error = fn(*args), None
+                    self._metrics['commands_completed'] += 1
+                except Exception as e:
+                    result, error = None, e
+                    self._metrics['commands_failed'] += 1
+                future.get_loop().call_soon_threadsafe(_resolve_future, future, result, error)
+                # Let other green threads (HTTP, Socket.IO) run between commands
+                socketio.sleep(0)
+
+    # -------------------------------------------------------------------------
+    # eventlet -> asyncio
+    # -------------------------------------------------------------------------
+
+    def push(self, callback, *args):
+        """Queue ``callback(*args)`` to run on the asyncio loop; drops the oldest when full"""
+        if self._loop is None or self._loop.is_closed():
+            return False
+
+        if len(self._events) >= self.max_depth:
+            self._metrics['events_dropped'] += 1
+        self._events.append((callback, args))
+        self._metrics['events_posted'] += 1
+        self._metrics['event_max_depth'] = max(self._metrics['event_max_depth'], len(self._events))
+
+        if not self._events_scheduled:
+            self._events_scheduled = True
+            self._loop.call_soon_threadsafe(self._drain_events)
+        return True
+
+    def _drain_events(self):
+        self._events_scheduled = False
+        while self._events:
+            callback, args = self._events.popleft()
+            try:
+                callback(*args)
+                self._metrics['events_delivered'] += 1
+            except Exception as e:
+                logger.error("Event bridge '%s' callback error: %s", self.name, e)
+
+    # -------------------------------------------------------------------------
+    # Metrics
+    # -------------------------------------------------------------------------
+
+    def get_metrics(self):
+        """Queue depths and counters for both directions"""
+        metrics = dict(self._metrics)
+        completed = metrics['commands_completed'] + metrics['commands_failed']
+        wait_total = metrics.pop('command_wait_ms_total')
+        metrics['command_depth'] = len(self._commands)
+        metrics['event_depth'] = len(self._events)
+        metrics['avg_command_wait_ms'] = round(wait_total / completed, 3) if completed else 0.0
+        metrics['max_depth'] = self.max_depth
+        return metrics
+
+
+def _resolve_future(future, result, error):
+    if future.done():
+        return  # Caller went away (client disconnected / cancelled)
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
@@ -0,0 +1,47 @@
+"""
+Angels-TV-Animator: Server event stream.
+Mirrors selected Socket.IO events to in-process listeners (the raw WebSocket
+server) so integrations can receive pushes without speaking Socket.IO.
+"""
+
+import logging
+
+from extensions import socketio
+
+logger = logging.getLogger(__name__)
+
+# Topic -> Socket.IO events published on it
+EVENT_TOPICS = {
+    'media': ('animation_changed', 'animation_stopped'),
+    'scene': ('scene_changed',),
+    'device': ('devices_delta',),
+    'queue': ('queue_state',),
+}
+
+_listeners = []  # callables: listener(topic, event, data)
+
+
+def add_event_listener(listener):
+    """Register ``listener(topic, event, data)`` for every published event"""
+    if listener not in _listeners:
+        _listeners.append(listener)
+
+
+def remove_event_listener(listener):
+    if listener in _listeners:
+        _listeners.remove(listener)
+
+
+def publish_event(topic, event, data):
+    """Hand an event to the in-process listeners only (no Socket.IO emit)"""
+    for listener in list(_listeners):
+        try:
+            listener(topic, event, data)
+        except Exception as e:
+            logger.error("Event listener error for %s/%s: %s", topic, event, e)
+
+
+def emit_event(topic, event, data, **emit_kwargs):
+    """``socketio.emit()`` an event and publish it on ``topic`` for listeners"""
+    socketio.emit(event, data, **emit_kwargs)
+    publish_event(topic, event, data)
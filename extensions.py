@@ -11,6 +11,7 @@ from flask_login import LoginManager
 
 import config
 from config import __version__
+from message_queue import build_socketio_queue_options
 
 # Flask application
 app = Flask(__name__)
@@ -18,8 +19,12 @@ app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'angels-tv-animator-secr
 app.config['PERMANENT_SESSION_LIFETIME'] = timedelta(hours=1)
 app.config['MAX_CONTENT_LENGTH'] = config.MAX_UPLOAD_SIZE_MB * 1024 * 1024  # Upload size limit
 
-# Socket.IO with eventlet async mode
-socketio = SocketIO(app, cors_allowed_origins="*", async_mode='eventlet')
+# Socket.IO with eventlet async mode. When SOCKETIO_MESSAGE_QUEUE is set, emits
+# are published through the queue so every worker process fans them out.
+socketio = SocketIO(
+    app, cors_allowed_origins="*", async_mode='eventlet',
+    **build_socketio_queue_options(config.SOCKETIO_MESSAGE_QUEUE, config.SOCKETIO_CHANNEL)
+)
 
 # Flask-Login
 login_manager = LoginManager()
@@ -31,19 +36,27 @@ login_manager.login_message = 'Please log in to access the admin panel.'
 # =============================================================================
 # OBS Client Service Holder
 # =============================================================================
-# The OBS client is created/destroyed at runtime by multiple routes.
-# Stored here so blueprints can access it without importing app.py
+# OBS clients are created/destroyed at runtime by multiple routes.
+# Stored here so blueprints can access them without importing app.py
 # (which would cause a double-import when app.py runs as __main__).
+# One client per named OBS instance; "main" is the one most routes manage.
 
-_obs_client = None
+_obs_clients = {}
 
 
-def get_obs_client():
-    """Get the current OBS WebSocket client instance."""
-    return _obs_client
+def get_obs_client(name=config.DEFAULT_OBS_INSTANCE):
+    """Get the OBS WebSocket client for a named instance (default: main)."""
+    return _obs_clients.get(name)
 
 
-def set_obs_client(client):
-    """Set the OBS WebSocket client instance."""
-    global _obs_client
-    _obs_client = client
+def set_obs_client(client, name=config.DEFAULT_OBS_INSTANCE):
+    """Set (or with None, remove) the OBS WebSocket client for a named instance."""
+    if client is None:
+        _obs_clients.pop(name, None)
+    else:
+        _obs_clients[name] = client
+
+
+def get_obs_clients():
+    """All OBS clients by instance name."""
+    return dict(_obs_clients)
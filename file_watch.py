@@ -0,0 +1,162 @@
+"""
+Angels-TV-Animator: Event-driven file watching.
+Linux inotify backend (via ctypes, no extra dependency) used by the file
+watchers, with a polling fallback on platforms or filesystems without it.
+"""
+
+import ctypes
+import ctypes.util
+import errno
+import logging
+import os
+import select
+import struct
+import sys
+import time
+
+from config import FILE_WATCH_BACKEND
+
+logger = logging.getLogger(__name__)
+
+# inotify event masks (see inotify(7))
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_Q_OVERFLOW = 0x00004000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = 0o2000000
+
+# Completed writes and atomic renames into the directory
+DEFAULT_WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_TO
+
+_EVENT_HEADER = struct.Struct('iIII')  # wd, mask, cookie, len
+
+POLL_INTERVAL = 0.1  # seconds, polling fallback
+IDLE_TIMEOUT = 5.0   # seconds, inotify safety re-check while idle
+
+_libc = None
+
+
+def _load_libc():
+    global _libc
+    if _libc is None:
+        _libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        _libc.inotify_init1.argtypes = [ctypes.c_int]
+        _libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+    return _libc
+
+
+def inotify_supported():
+    """True if this platform exposes inotify"""
+    if not sys.platform.startswith('linux'):
+        return False
+    try:
+        return hasattr(_load_libc(), 'inotify_init1')
+    except OSError:
+        return False
+
+
+class InotifyWatcher:
+    """Watch one directory for completed writes / renames of specific files."""
+
+    backend = 'inotify'
+
+    def __init__(self, directory, mask=DEFAULT_WATCH_MASK):
+        libc = _load_libc()
+        self.directory = str(directory)
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, f"inotify_init1 failed: {os.strerror(err)}")
+
+        wd = libc.inotify_add_watch(self.fd, os.fsencode(self.directory), mask)
+        if wd < 0:
+            err = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(err, f"inotify_add_watch failed for {self.directory}: {os.strerror(err)}")
+
+    def _read_events(self):
+        """Return the set of file names with events (None in the set = overflow, re-check all)"""
+        try:
+            buffer = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+        except OSError as e:
+            if e.errno == errno.EINTR:
+                return set()
+            raise
+
+        names = set()
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(buffer):
+            wd, mask, cookie, length = _EVENT_HEADER.unpack_from(buffer, offset)
+            offset += _EVENT_HEADER.size
+            if mask & IN_Q_OVERFLOW:
+                names.add(None)
+            elif length:
+                names.add(os.fsdecode(buffer[offset:offset + length].rstrip(b'\0')))
+            offset += length
+        return names
+
+    def wait(self, filenames=None, timeout=IDLE_TIMEOUT, suffix=None):
+        """Block (cooperatively under eventlet) until one of ``filenames`` changes.
+
+        Returns True when a relevant event arrived, False on timeout. With no
+        ``filenames``, any event in the directory counts (optionally only for
+        names ending in ``suffix``).
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            ready, _, _ = select.select([self.fd], [], [], remaining)
+            if not ready:
+                return False
+            names = self._read_events()
+            if not names:
+                continue
+            if None in names:
+                return True
+            if suffix is not None:
+                names = {name for name in names if name.endswith(suffix)}
+            if names and (filenames is None or names & set(filenames)):
+                return True
+
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+
+class PollingWatcher:
+    """Fallback: sleep for the poll interval; callers re-check on every wake."""
+
+    backend = 'poll'
+
+    def __init__(self, directory, interval=POLL_INTERVAL):
+        self.directory = str(directory)
+        self.interval = interval
+
+    def wait(self, filenames=None, timeout=None, suffix=None):
+        time.sleep(self.interval)
+        return True
+
+    def close(self):
+        pass
+
+
+def create_directory_watcher(directory, mask=DEFAULT_WATCH_MASK):
+    """Return an inotify watcher for ``directory``, or a polling watcher as fallback.
+
+    FILE_WATCH_BACKEND selects 'auto' (default), 'inotify' or 'poll'.
+    """
+    if FILE_WATCH_BACKEND != 'poll' and inotify_supported():
+        try:
+            os.makedirs(directory, exist_ok=True)
+            return InotifyWatcher(directory, mask)
+        except OSError as e:
+            logger.warning("inotify unavailable for %s (%s) — falling back to polling", directory, e)
+    elif FILE_WATCH_BACKEND == 'inotify':
+        logger.warning("FILE_WATCH_BACKEND=inotify but inotify is not supported here — falling back to polling")
+
+    return PollingWatcher(directory)
@@ -0,0 +1,181 @@
+"""
+Angels-TV-Animator: Local trigger listeners.
+Unix domain socket (and optional named pipe) that accept newline-delimited
+commands from scripts and companion tools on the same host.
+"""
+
+import json
+import logging
+import os
+import select
+import socket
+import stat
+from threading import Thread
+
+from websocket_server import BRIDGED_ACTIONS
+
+logger = logging.getLogger(__name__)
+
+DISABLED_VALUES = ('', 'off', 'none', 'false', '0')
+MAX_LINE_BYTES = 64 * 1024
+
+
+def is_enabled(path_setting):
+    """True unless the path setting is empty or one of the 'off' values"""
+    return bool(path_setting) and path_setting.strip().lower() not in DISABLED_VALUES
+
+
+def execute_local_command(line, source):
+    """Run one command line; returns the response dict.
+
+    A line is either a bare media filename (``brb.html``) or a JSON action
+    (``{"action": "get_status"}``) using the same actions as the raw WebSocket.
+    """
+    line = line.strip()
+    if not line:
+        return None
+
+    if line.startswith('{'):
+        try:
+            request = json.loads(line)
+        except json.JSONDecodeError:
+            return {'status': 'error', 'message': 'Invalid JSON format'}
+        if not isinstance(request, dict):
+            return {'status': 'error', 'message': 'Action must be a JSON object'}
+    else:
+        request = {'action': 'trigger_animation', 'animation': line}
+
+    request.setdefault('source', source)
+    action = request.get('action')
+    handler = BRIDGED_ACTIONS.get(action)
+    if handler is None:
+        return {'status': 'error', 'message': f'Unknown action type: {action}'}
+
+    try:
+        response = handler(request)
+    except Exception as e:
+        logger.error("Local trigger error: %s", e)
+        response = {'status': 'error', 'message': f'Server error: {str(e)}'}
+
+    if 'id' in request:
+        response['id'] = request['id']
+    return response
+
+
+class LocalTriggerSocket:
+    """Unix domain socket listener: one JSON response line per command line."""
+
+    def __init__(self, socket_path):
+        self.socket_path = str(socket_path)
+        self.server = None
+        self.running = False
+
+    def start(self):
+        """Bind the socket (replacing a stale one) and accept clients in the background"""
+        if os.path.exists(self.socket_path):
+            if not stat.S_ISSOCK(os.stat(self.socket_path).st_mode):
+                raise RuntimeError(f"{self.socket_path} exists and is not a socket")
+            os.unlink(self.socket_path)
+
+        self.server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.server.bind(self.socket_path)
+        os.chmod(self.socket_path, 0o660)
+        self.server.listen(16)
+        self.running = True
+
+        Thread(target=self._accept_loop, daemon=True).start()
+        logger.info("Local trigger socket listening on %s", self.socket_path)
+
+    def _accept_loop(self):
+        while self.running:
+            try:
+                conn, _ = self.server.accept()
+            except OSError as e:
+                if self.running:
+                    logger.error("Local trigger socket accept error: %s", e)
+                return
+            Thread(target=self._handle_connection, args=(conn,), daemon=True).start()
+
+    def _handle_connection(self, conn):
+        buffer = b''
+        try:
+            while self.running:
+                chunk = conn.recv(4096)
+                if not chunk:
+                    break
+                buffer += chunk
+                if len(buffer) > MAX_LINE_BYTES and b'\n' not in buffer:
+                    conn.sendall(json.dumps({'status': 'error', 'message': 'Line too long'}).encode() + b'\n')
+                    break
+
+                *lines, buffer = buffer.split(b'\n')
+                for line in lines:
+                    response = execute_local_command(line.decode('utf-8', 'replace'), 'local_socket')
+                    if response is not None:
+                        conn.sendall(json.dumps(response).encode() + b'\n')
+
+            # A final command without a trailing newline
+            if buffer.strip():
+                response = execute_local_command(buffer.decode('utf-8', 'replace'), 'local_socket')
+                if response is not None:
+                    conn.sendall(json.dumps(response).encode() + b'\n')
+        except OSError as e:
+            logger.debug("Local trigger connection closed: %s", e)
+        finally:
+            conn.close()
+
+    def stop(self):
+        self.running = False
+        if self.server:
+            self.server.close()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+
+class LocalTriggerFifo:
+    """Named pipe listener: fire-and-forget command lines (no responses)."""
+
+    def __init__(self, fifo_path):
+        self.fifo_path = str(fifo_path)
+        self.running = False
+
+    def start(self):
+        """Create the FIFO if needed and read commands in the background"""
+        if not os.path.exists(self.fifo_path):
+            os.mkfifo(self.fifo_path, 0o660)
+        elif not stat.S_ISFIFO(os.stat(self.fifo_path).st_mode):
+            raise RuntimeError(f"{self.fifo_path} exists and is not a named pipe")
+
+        self.running = True
+        Thread(target=self._read_loop, daemon=True).start()
+        logger.info("Local trigger FIFO listening on %s", self.fifo_path)
+
+    def _read_loop(self):
+        # O_RDWR keeps a writer reference open, so the pipe never reports EOF
+        # between producers and the loop can simply block in select()
+        fd = os.open(self.fifo_path, os.O_RDWR | os.O_NONBLOCK)
+        buffer = b''
+        try:
+            while self.running:
+                ready, _, _ = select.select([fd], [], [], 5.0)
+                if not ready:
+                    continue
+                try:
+                    chunk = os.read(fd, 4096)
+                except BlockingIOError:
+                    continue
+
+                buffer += chunk
+                *lines, buffer = buffer.split(b'\n')
+                if len(buffer) > MAX_LINE_BYTES:
+                    logger.warning("Discarding oversized FIFO command (%d bytes)", len(buffer))
+                    buffer = b''
+                for line in lines:
+                    response = execute_local_command(line.decode('utf-8', 'replace'), 'local_fifo')
+                    if response and response.get('status') == 'error':
+                        logger.warning("FIFO command failed: %s", response.get('message'))
+        finally:
+            os.close(fd)
+
+    def stop(self):
+        self.running = False
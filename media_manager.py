@@ -3,8 +3,10 @@ Angels-TV-Animator: Media management module.
 Handles state persistence, file discovery, media type detection, and broadcast helpers.
 """
 
+import hashlib
 import json
 import logging
+import os
 from pathlib import Path
 
 from config import (
@@ -12,6 +14,8 @@ from config import (
     HTML_EXTENSIONS, VIDEO_EXTENSIONS
 )
 from extensions import socketio
+from event_stream import emit_event
+from device_tracking import TV_ROOM
 
 logger = logging.getLogger(__name__)
 
@@ -32,9 +36,16 @@ def load_state():
 
 
 def save_state(state):
-    """Save the current state to state.json"""
-    with open(STATE_FILE, 'w') as f:
+    """Save the current state to state.json
+
+    Written via temp file + rename so other worker processes reading the
+    shared state file never see a half-written document.
+    """
+    temp_path = STATE_FILE.with_name(f"{STATE_FILE.name}.{os.getpid()}.tmp")
+    with open(temp_path, 'w') as f:
         json.dump(state, f, indent=4)
+    os.replace(temp_path, STATE_FILE)
+    invalidate_status_snapshot()
 
 
 def ensure_state_file():
@@ -69,6 +80,79 @@ def get_all_media_files():
     return sorted(get_animation_files() + get_video_files())
 
 
+# =============================================================================
+# Status Snapshot
+# =============================================================================
+# TVs poll get_status on a heartbeat. Instead of re-reading state.json and
+# re-globbing both media directories per request, the status payload is built
+# once and reused until state or catalog changes. Changes are detected with
+# three stat() calls (state file + both directories' mtimes, which also catches
+# writes by other worker processes) plus an in-process generation counter.
+
+_status_generation = 0
+_status_snapshot = None  # (fingerprint, version, payload)
+
+
+def invalidate_status_snapshot():
+    """Force the next get_status_snapshot() call to rebuild"""
+    global _status_generation
+    _status_generation += 1
+
+
+def _mtime_ns(path):
+    try:
+        return path.stat().st_mtime_ns
+    except OSError:
+        return 0
+
+
+def _status_fingerprint():
+    return (_status_generation, _mtime_ns(STATE_FILE), _mtime_ns(ANIMATIONS_DIR), _mtime_ns(VIDEOS_DIR))
+
+
+def _build_status_payload():
+    current_media = load_state().get('current_animation')
+    media_path, media_type = find_media_file(current_media) if current_media else (None, None)
+    animations = get_animation_files()
+    videos = get_video_files()
+    all_media = sorted(animations + videos)
+
+    return {
+        'current_animation': current_media,
+        'current_media': current_media,
+        'media_type': media_type,
+        'available_animations': animations,
+        'available_videos': videos,
+        'available_media': all_media,
+        'animations_count': len(animations),
+        'videos_count': len(videos),
+        'total_media_count': len(all_media)
+    }
+
+
+def get_status_snapshot():
+    """Return ``(version, payload)`` for the current state and media catalog.
+
+    ``version`` is a short content hash, so it only changes when the payload
+    does and is identical across worker processes. The payload dict is shared
+    between callers and must not be mutated.
+    """
+    global _status_snapshot
+    fingerprint = _status_fingerprint()
+    snapshot = _status_snapshot
+    if snapshot is not None and snapshot[0] == fingerprint:
+        return snapshot[1], snapshot[2]
+
+    payload = _build_status_payload()
+    serialized = json.dumps(payload, sort_keys=True, separators=(',', ':'))
+    version = hashlib.sha1(serialized.encode('utf-8')).hexdigest()[:12]
+    payload['state_version'] = version
+
+    _status_snapshot = (fingerprint, version, payload)
+    logger.debug("Rebuilt status snapshot (version %s)", version)
+    return version, payload
+
+
 # =============================================================================
 # Media Type Detection
 # =============================================================================
@@ -138,10 +222,10 @@ def serve_video(video_filename):
 
 def broadcast_media_change(media_file, media_type, source='api'):
     """
-    Broadcast a media change to all connected clients via SocketIO.
+    Broadcast a media change via SocketIO (animation_changed to everyone, page_refresh to TVs).
     Consolidates the duplicated emit pattern used across routes, watchers, and WebSocket handlers.
     """
-    socketio.emit('animation_changed', {
+    emit_event('media', 'animation_changed', {
         'current_animation': media_file,
         'media_type': media_type,
         'message': f"Media changed to '{media_file}' ({media_type}) via {source}",
@@ -153,6 +237,6 @@ def broadcast_media_change(media_file, media_type, source='api'):
         'new_media': media_file,
         'media_type': media_type,
         'source': source
-    })
+    }, room=TV_ROOM)
     
     logger.info("[%s] Broadcast media change: '%s' (%s)", source.upper(), media_file, media_type)
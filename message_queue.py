@@ -0,0 +1,76 @@
+"""
+Angels-TV-Animator: Socket.IO message queue backends for multi-worker mode.
+Builds the client manager that lets several app processes fan out events
+through a shared pub/sub channel, plus an in-process loopback stand-in.
+"""
+
+import logging
+import queue
+import threading
+
+import socketio
+
+logger = logging.getLogger(__name__)
+
+# URL scheme that selects the in-process loopback backend instead of a broker
+LOOPBACK_SCHEME = 'local://'
+
+
+class LoopbackPubSubManager(socketio.PubSubManager):
+    """In-process pub/sub backend that mimics a message broker.
+
+    Every manager created on the same channel receives every message that is
+    published on it, exactly as separate workers attached to Redis would.
+    Useful for exercising multi-worker fan-out in a single process (tests,
+    local development) without running a broker.
+    """
+
+    name = 'loopback'
+
+    # Shared across all instances: {channel: [subscriber Queue, ...]}
+    _subscribers = {}
+    _subscribers_lock = threading.Lock()
+
+    def __init__(self, url=LOOPBACK_SCHEME, channel='socketio', write_only=False, logger=None):
+        super().__init__(channel=channel, write_only=write_only, logger=logger)
+        self.url = url
+        self._inbox = queue.Queue()
+        if not write_only:
+            with self._subscribers_lock:
+                self._subscribers.setdefault(channel, []).append(self._inbox)
+
+    def _publish(self, data):
+        with self._subscribers_lock:
+            inboxes = list(self._subscribers.get(self.channel, []))
+        for inbox in inboxes:
+            inbox.put(data)
+
+    def _listen(self):
+        while True:
+            yield self._inbox.get()
+
+    def close(self):
+        """Detach this manager from its channel"""
+        with self._subscribers_lock:
+            inboxes = self._subscribers.get(self.channel, [])
+            if self._inbox in inboxes:
+                inboxes.remove(self._inbox)
+
+
+def build_socketio_queue_options(url, channel, write_only=False):
+    """Return the extra ``SocketIO()`` keyword arguments for a message queue URL.
+
+    - No URL: single-process mode, no extra options.
+    - ``local://``: in-process loopback manager.
+    - Anything else (``redis://``, ``amqp://``, ``kafka://``, ...): handed to
+      Flask-SocketIO, which picks the matching python-socketio manager.
+    """
+    if not url:
+        return {}
+
+    if url.startswith(LOOPBACK_SCHEME):
+        logger.info("Socket.IO message queue: in-process loopback (channel '%s')", channel)
+        return {'client_manager': LoopbackPubSubManager(url, channel=channel, write_only=write_only)}
+
+    logger.info("Socket.IO message queue: %s (channel '%s')", url.split('@')[-1], channel)
+    return {'message_queue': url, 'channel': channel}
@@ -5,31 +5,195 @@ Handles OBS Studio connection, scene detection, and event handling.
 
 import json
 import logging
+import random
 import time
+from collections import deque
 from datetime import datetime
-from threading import Thread
+from threading import Event, Lock, Thread
 from obswebsocket import obsws, requests, events
 
-from config import DATA_DIR, get_current_port
-from extensions import socketio
+from config import DATA_DIR, DEFAULT_OBS_INSTANCE, ANY_OBS_INSTANCE, OBS_INSTANCES_FILE
+from extensions import get_obs_clients, set_obs_client
+from event_stream import emit_event
+from obs_rules import obs_event_rules, CLIENT_IDENTIFY_SUBSCRIPTIONS
 
 logger = logging.getLogger(__name__)
 
+# Connection states (see OBSWebSocketClient.get_connection_state)
+STATE_DISCONNECTED = 'disconnected'
+STATE_CONNECTING = 'connecting'
+STATE_CONNECTED = 'connected'
+STATE_BACKOFF = 'backoff'
+STATE_STOPPED = 'stopped'
+
+RECONNECT_BASE_DELAY = 1.0     # seconds, first retry
+RECONNECT_MAX_DELAY = 60.0     # seconds, backoff cap
+HEALTH_CHECK_INTERVAL = 10.0   # seconds between GetVersion probes while connected
+STATE_HISTORY_SIZE = 20
+
+
+# =============================================================================
+# In-process Scene Dispatch
+# =============================================================================
+# The OBS client is recreated by the settings routes, so the scene handler is
+# held at module level rather than on an instance.
+
+_scene_change_handler = None
+_scene_preload_handler = None
+
+
+def set_scene_change_handler(handler):
+    """Route OBS scene changes straight to ``handler(scene_name)`` (the scene watcher)"""
+    global _scene_change_handler
+    _scene_change_handler = handler
+
+
+def set_scene_preload_handler(handler):
+    """Route upcoming scenes (studio-mode preview / transition target) to
+    ``handler(scene_name, instance, reason)`` so TVs can pre-warm their media"""
+    global _scene_preload_handler
+    _scene_preload_handler = handler
+
+
+def _event_data(message):
+    """Event payload dict (obs-websocket-py getters can raise KeyError)"""
+    data = getattr(message, 'datain', None)
+    return data if isinstance(data, dict) else {}
+
+
+def validate_instance(entry):
+    """Return an error message for an invalid OBS instance entry, or None"""
+    if not isinstance(entry, dict):
+        return 'Instance must be an object'
+    name = entry.get('name')
+    if not isinstance(name, str) or not name.strip():
+        return 'Every instance needs a name'
+    host = entry.get('host', 'localhost')
+    if not isinstance(host, str) or not host.strip():
+        return f"Instance '{name}' needs a host"
+    port = entry.get('port', 4455)
+    if isinstance(port, bool) or not isinstance(port, (int, str)) or not str(port).strip().isdigit():
+        return f"Port for instance '{name}' must be a number"
+    if not 1 <= int(port) <= 65535:
+        return f"Port for instance '{name}' must be between 1 and 65535"
+    return None
+
+
+def load_obs_instances():
+    """Extra OBS instances from obs_instances.json, by name (main is not listed there)"""
+    try:
+        if not OBS_INSTANCES_FILE.exists():
+            return {}
+        with open(OBS_INSTANCES_FILE, 'r', encoding='utf-8') as f:
+            entries = json.load(f)
+    except Exception as e:
+        logger.error("Error loading OBS instances: %s", e)
+        return {}
+
+    instances = {}
+    for entry in entries if isinstance(entries, list) else []:
+        error = validate_instance(entry)
+        if error:
+            logger.warning("Skipping OBS instance: %s", error)
+            continue
+        name = entry['name']
+        if name in (DEFAULT_OBS_INSTANCE, ANY_OBS_INSTANCE):
+            continue
+        instances[name] = {
+            'host': entry.get('host', 'localhost'),
+            'port': int(entry.get('port', 4455)),
+            'password': entry.get('password', ''),
+            'enabled': entry.get('enabled', True),
+        }
+    return instances
+
+
+def sync_obs_instances():
+    """Start, restart or stop extra OBS clients to match obs_instances.json.
+
+    Extra instances connect from their own supervisor, so a slow or
+    unreachable instance never blocks startup, requests or other instances.
+    """
+    instances = load_obs_instances()
+    clients = get_obs_clients()
+
+    for name, client in clients.items():
+        if name == DEFAULT_OBS_INSTANCE:
+            continue
+        wanted = instances.get(name)
+        if wanted is None or not wanted['enabled'] or wanted != client.settings:
+            logger.info("Stopping OBS instance '%s'", name)
+            client.disconnect(permanent=True, force=True)
+            set_obs_client(None, name)
+
+    for name, settings in instances.items():
+        if not settings['enabled'] or name in get_obs_clients():
+            continue
+        logger.info("Starting OBS instance '%s' (%s:%s)", name, settings['host'], settings['port'])
+        client = OBSWebSocketClient(name)
+        client.settings = settings
+        client.auto_reconnect_enabled = True
+        client.should_be_connected = True
+        set_obs_client(client, name)
+        client._start_connection_monitor()
+
+
+class SubscribingObsws(obsws):
+    """obsws that identifies with a chosen v5 event-subscription mask.
+
+    The library always identifies with 1023 (no Ui or high-volume events).
+    Its Identify frame is rewritten while connect() authenticates, before the
+    receive thread starts, so nothing else is sending on the socket yet.
+    """
+
+    def __init__(self, *args, event_subscriptions=CLIENT_IDENTIFY_SUBSCRIPTIONS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.event_subscriptions = event_subscriptions
+
+    def _auth(self):
+        send = self.ws.send
+
+        def send_identify(payload, *args, **kwargs):
+            message = json.loads(payload)
+            if message.get('op') == 1:
+                message['d']['eventSubscriptions'] = self.event_subscriptions
+                payload = json.dumps(message)
+            return send(payload, *args, **kwargs)
+
+        self.ws.send = send_identify
+        try:
+            super()._auth()
+        finally:
+            del self.ws.send
+
 
 class OBSWebSocketClient:
     """OBS WebSocket client with persistent connection and auto-reconnection."""
 
-    def __init__(self):
+    def __init__(self, name=DEFAULT_OBS_INSTANCE):
+        self.name = name
         self.client = None
         self.connected = False
         self.settings = {}
-        self.scene_mappings = []
-        self.connection_thread = None
         self.reconnect_attempts = 0
-        self.max_reconnect_attempts = 20
         self.auto_reconnect_enabled = True
         self.connection_monitor_thread = None
         self.should_be_connected = False
+        self.state = STATE_DISCONNECTED
+        self.state_since = time.time()
+        self.state_history = deque(maxlen=STATE_HISTORY_SIZE)
+        self._lock = Lock()  # guards the connection-attempt bookkeeping below
+        self._connect_attempt_count = 0
+        self._connect_in_flight = None  # Event set when the running attempt finishes
+        self._next_retry_at = 0.0
+        self._wake = Event()
+        self._event_subscriptions = CLIENT_IDENTIFY_SUBSCRIPTIONS
+        self._pending_scene_record = None
+        self._scene_writer_active = False
+        self._cached_scene = None
+        self._cached_preview_scene = None
+        self._cached_scene_list = []
+        self._scene_cache_updated = None
 
     # =========================================================================
     # Settings I/O
@@ -37,6 +201,14 @@ class OBSWebSocketClient:
 
     def load_settings(self):
         """Load OBS connection settings from config file"""
+        if self.name != DEFAULT_OBS_INSTANCE:
+            settings = load_obs_instances().get(self.name)
+            if settings is None:
+                logger.warning("OBS instance '%s' not found in %s", self.name, OBS_INSTANCES_FILE)
+                return False
+            self.settings = settings
+            return True
+
         try:
             obs_config_path = DATA_DIR / 'config' / 'obs_settings.json'
             logger.debug("Looking for settings at: %s", obs_config_path)
@@ -60,40 +232,57 @@ class OBSWebSocketClient:
             logger.error("Error loading OBS settings: %s", e, exc_info=True)
             return False
 
-    def load_scene_mappings(self):
-        """Load scene to animation mappings from config file"""
-        try:
-            mappings_path = DATA_DIR / 'config' / 'obs_mappings.json'
-            if mappings_path.exists():
-                with open(mappings_path, 'r') as f:
-                    self.scene_mappings = json.load(f)
-                return True
-            return False
-        except Exception as e:
-            logger.error("Error loading OBS scene mappings: %s", e)
-            return False
-
     # =========================================================================
     # Connection Management
     # =========================================================================
 
-    def connect(self):
-        """Establish connection to OBS WebSocket server"""
-        if not self.load_settings():
+    def connect(self, force=False):
+        """Establish connection to OBS WebSocket server.
+
+        Idempotent: returns immediately when connected, and a caller that had
+        to wait for an in-flight attempt gets that attempt's result instead of
+        opening a second connection. During backoff only ``force`` (an explicit
+        user request) attempts before the retry time.
+        """
+        with self._lock:
+            if self.connected:
+                return True
+            if not force and self.state == STATE_BACKOFF and time.monotonic() < self._next_retry_at:
+                return False
+            in_flight = self._connect_in_flight
+            if in_flight is None:
+                self._connect_attempt_count += 1
+                self._connect_in_flight = Event()
+
+        if in_flight is not None:
+            in_flight.wait()
+            return self.connected
+
+        try:
+            return self._attempt_connect()
+        finally:
+            with self._lock:
+                done, self._connect_in_flight = self._connect_in_flight, None
+            done.set()
+
+    def _attempt_connect(self):
+        if not self.settings and not self.load_settings():
             logger.warning("No OBS settings found, skipping connection")
+            self._connection_failed('no settings')
             return False
 
-        if not self.load_scene_mappings():
-            logger.warning("No scene mappings found, OBS events will be ignored")
-            self.scene_mappings = []
+        self._close_client()
+        self._set_state(STATE_CONNECTING, f"attempt {self.reconnect_attempts + 1}")
 
         try:
             logger.info("Attempting to connect to OBS at %s:%s", self.settings.get('host', 'localhost'), self.settings.get('port', 4455))
 
-            self.client = obsws(
+            self.client = SubscribingObsws(
                 host=self.settings.get('host', 'localhost'),
                 port=self.settings.get('port', 4455),
-                password=self.settings.get('password', '')
+                password=self.settings.get('password', ''),
+                on_disconnect=self._on_obs_disconnect,
+                event_subscriptions=obs_event_rules.required_subscriptions()
             )
 
             self.client.connect()
@@ -124,16 +313,59 @@ class OBSWebSocketClient:
                 except Exception as fallback_error:
                     logger.error("Failed to register for any scene events: %s", fallback_error)
 
+            self._register_scene_list_events()
+            self._register_transition_events()
+            self.client.register(self._on_obs_event)
+            self._event_subscriptions = CLIENT_IDENTIFY_SUBSCRIPTIONS if self.client.legacy else self.client.event_subscriptions
+            self._sync_event_subscriptions()
+            self.refresh_scene_cache()
+
             logger.info("OBS event listener setup complete, waiting for scene changes...")
+            self._set_state(STATE_CONNECTED, 'connected')
             self._start_connection_monitor()
             return True
 
         except Exception as e:
             logger.error("Failed to connect to OBS: %s", e)
             self.connected = False
-            self._schedule_reconnect()
+            self._close_client()
+            self._connection_failed(str(e))
             return False
 
+    def _connection_failed(self, reason):
+        """Enter backoff (the supervisor retries when it expires) or stay disconnected"""
+        self.reconnect_attempts += 1
+        if self.should_be_connected and self.auto_reconnect_enabled:
+            delay = self._backoff_delay()
+            self._next_retry_at = time.monotonic() + delay
+            self._set_state(STATE_BACKOFF, f"retry in {delay:.1f}s after: {reason}")
+            self._start_connection_monitor()
+        else:
+            self._set_state(STATE_DISCONNECTED, reason)
+
+    def _backoff_delay(self):
+        """Exponential backoff with jitter: a random delay in [cap/2, cap]"""
+        cap = min(RECONNECT_MAX_DELAY, RECONNECT_BASE_DELAY * 2 ** max(0, self.reconnect_attempts - 1))
+        return random.uniform(cap / 2, cap)
+
+    def _close_client(self):
+        # Detach first so our own disconnect is not reported as a lost connection
+        client, self.client = self.client, None
+        if client:
+            try:
+                client.disconnect()
+            except Exception as e:
+                logger.debug("Error closing previous OBS client: %s", e)
+
+    def _on_obs_disconnect(self, client):
+        """obsws callback when OBS closes the socket; hand reconnection to the supervisor"""
+        if client is not self.client or not self.connected:
+            return
+        self.connected = False
+        self._next_retry_at = time.monotonic()
+        self._set_state(STATE_DISCONNECTED, 'connection lost')
+        self._wake.set()
+
     def disconnect(self, permanent=False, force=False):
         """Disconnect from OBS WebSocket server
 
@@ -143,25 +375,29 @@ class OBSWebSocketClient:
         """
         self.connected = False
 
-        if permanent and not force:
-            try:
-                obs_config_path = DATA_DIR / 'config' / 'obs_settings.json'
-                if obs_config_path.exists():
-                    with open(obs_config_path, 'r') as f:
-                        settings = json.load(f)
-                    if settings.get('enabled', True):
-                        logger.warning("REFUSING permanent disconnect - OBS is enabled in settings!")
-                        logger.info("Keeping auto-reconnection active per user settings")
-                        return
-            except Exception as settings_error:
-                logger.warning("Could not check settings for disconnect: %s", settings_error)
-                logger.warning("Refusing permanent disconnect due to settings check failure")
-                return
+        if permanent:
+            if not force:
+                try:
+                    obs_config_path = DATA_DIR / 'config' / 'obs_settings.json'
+                    if obs_config_path.exists():
+                        with open(obs_config_path, 'r') as f:
+                            settings = json.load(f)
+                        if settings.get('enabled', True):
+                            logger.warning("REFUSING permanent disconnect - OBS is enabled in settings!")
+                            logger.info("Keeping auto-reconnection active per user settings")
+                            return
+                except Exception as settings_error:
+                    logger.warning("Could not check settings for disconnect: %s", settings_error)
+                    logger.warning("Refusing permanent disconnect due to settings check failure")
+                    return
 
             self.should_be_connected = False
             self.auto_reconnect_enabled = False
+            self._set_state(STATE_STOPPED, 'permanent disconnect')
+            self._wake.set()
             logger.info("Permanently disconnecting from OBS WebSocket server")
         else:
+            self._set_state(STATE_DISCONNECTED, 'disconnect requested')
             logger.info("Temporarily disconnecting from OBS WebSocket server")
 
         if self.client:
@@ -232,7 +468,7 @@ class OBSWebSocketClient:
 
             return False, error_msg
 
-    def enable_persistent_connection(self):
+    def enable_persistent_connection(self, force=False):
         """Enable persistent auto-reconnection to OBS"""
         logger.info("Enabling persistent OBS connection...")
         self.auto_reconnect_enabled = True
@@ -245,7 +481,7 @@ class OBSWebSocketClient:
                     return False
 
             logger.info("Attempting OBS connection for persistent mode...")
-            success = self.connect()
+            success = self.connect(force=force)
             if not success:
                 logger.warning("Initial connection failed, but will keep trying...")
 
@@ -318,8 +554,191 @@ class OBSWebSocketClient:
             logger.error("Error getting OBS scene list: %s", e)
             return []
 
-    def _save_current_scene_to_storage(self, scene_name):
-        """Save current scene to persistent storage file"""
+    def get_preview_scene(self):
+        """Get the studio-mode preview scene from OBS (None when studio mode is off)"""
+        if not self.connected or not self.client:
+            return None
+
+        try:
+            response = self.client.call(requests.GetCurrentPreviewScene())
+            if not response.status:
+                return None
+            data = getattr(response, 'datain', None) or {}
+            return data.get('currentPreviewSceneName') or data.get('sceneName')
+        except Exception as e:
+            logger.debug("Error getting OBS preview scene: %s", e)
+            return None
+
+    # =========================================================================
+    # Scene Cache
+    # =========================================================================
+    # Kept current by OBS events so status/scene routes never wait on OBS.
+
+    def refresh_scene_cache(self):
+        """Re-read the current scene and scene list from OBS into the cache"""
+        current_scene = self.get_current_scene()
+        scene_list = self.get_scene_list()
+        self._cached_scene = current_scene
+        self._cached_preview_scene = self.get_preview_scene()
+        self._cached_scene_list = scene_list
+        self._scene_cache_updated = time.time()
+        logger.debug("Scene cache refreshed: current=%s, %d scenes", current_scene, len(scene_list))
+
+    def get_scene_cache(self):
+        """Cached scene state plus its age; ``stale`` when OBS is not connected"""
+        updated = self._scene_cache_updated
+        return {
+            'current_scene': self._cached_scene,
+            'preview_scene': self._cached_preview_scene,
+            'scene_list': list(self._cached_scene_list),
+            'cache_updated': updated,
+            'cache_age': round(time.time() - updated, 3) if updated else None,
+            'stale': not self.connected or updated is None,
+        }
+
+    def get_instance_status(self):
+        """Connection state and cached scenes for this instance (no OBS round trip)"""
+        return {
+            'name': self.name,
+            'host': self.settings.get('host'),
+            'port': self.settings.get('port'),
+            'connected': self.connected,
+            'connection': self.get_connection_state(),
+            **self.get_scene_cache(),
+        }
+
+    def _register_scene_list_events(self):
+        handlers = (
+            ('SceneCreated', self._on_scene_created),
+            ('SceneRemoved', self._on_scene_removed),
+            ('SceneNameChanged', self._on_scene_renamed),
+            ('SceneListChanged', self._on_scene_list_changed),
+        )
+        for event_name, handler in handlers:
+            try:
+                self.client.register(handler, getattr(events, event_name))
+            except Exception as e:
+                logger.debug("Could not register for %s events: %s", event_name, e)
+
+    def _on_scene_created(self, message):
+        scene_name = _event_data(message).get('sceneName')
+        if scene_name and scene_name not in self._cached_scene_list:
+            self._cached_scene_list = self._cached_scene_list + [scene_name]
+            self._scene_cache_updated = time.time()
+
+    def _on_scene_removed(self, message):
+        scene_name = _event_data(message).get('sceneName')
+        if scene_name in self._cached_scene_list:
+            self._cached_scene_list = [s for s in self._cached_scene_list if s != scene_name]
+            self._scene_cache_updated = time.time()
+
+    def _on_scene_renamed(self, message):
+        data = _event_data(message)
+        old_name, new_name = data.get('oldSceneName'), data.get('sceneName')
+        if not old_name or not new_name:
+            self.refresh_scene_cache()
+            return
+        self._cached_scene_list = [new_name if s == old_name else s for s in self._cached_scene_list]
+        if self._cached_scene == old_name:
+            self._cached_scene = new_name
+        self._scene_cache_updated = time.time()
+
+    def _on_scene_list_changed(self, message):
+        scenes = _event_data(message).get('scenes')
+        if not isinstance(scenes, list):
+            return
+        self._cached_scene_list = [scene['sceneName'] for scene in scenes if isinstance(scene, dict) and 'sceneName' in scene]
+        self._scene_cache_updated = time.time()
+
+    # =========================================================================
+    # Transition Pre-warming
+    # =========================================================================
+    # In studio mode the next program scene is known before it goes live: it is
+    # the preview scene. Its media is announced to TVs when the preview changes
+    # and again when the transition starts, so the flip at CurrentProgramSceneChanged
+    # lands on media that is already loaded. Outside studio mode OBS reports the
+    # program change as the transition starts, so there is nothing to pre-warm.
+
+    def _register_transition_events(self):
+        handlers = (
+            ('CurrentPreviewSceneChanged', self._on_preview_scene_changed),
+            ('SceneTransitionStarted', self._on_transition_started),
+            ('StudioModeStateChanged', self._on_studio_mode_changed),
+        )
+        for event_name, handler in handlers:
+            try:
+                self.client.register(handler, getattr(events, event_name))
+            except Exception as e:
+                logger.debug("Could not register for %s events: %s", event_name, e)
+
+    def _on_preview_scene_changed(self, message):
+        scene_name = _event_data(message).get('sceneName')
+        if not scene_name:
+            return
+        self._cached_preview_scene = scene_name
+        self._preload_scene(scene_name, 'preview')
+
+    def _on_transition_started(self, message):
+        if self._cached_preview_scene:
+            self._preload_scene(self._cached_preview_scene, 'transition')
+
+    def _on_studio_mode_changed(self, message):
+        if not _event_data(message).get('studioModeEnabled'):
+            self._cached_preview_scene = None
+
+    def _preload_scene(self, scene_name, reason):
+        if _scene_preload_handler is None or scene_name == self._cached_scene:
+            return
+        try:
+            _scene_preload_handler(scene_name, self.name, reason)
+        except Exception as e:
+            logger.warning("Scene preload failed (non-critical): %s", e)
+
+    # =========================================================================
+    # Event Rules
+    # =========================================================================
+
+    def _on_obs_event(self, message):
+        """Catch-all OBS event hook: one table lookup picks the rules to evaluate"""
+        try:
+            event_type = type(message).__name__
+            # Most events (volume meters, media cursor updates) have no rules
+            if obs_event_rules.handles(event_type):
+                obs_event_rules.handle_event(event_type, _event_data(message), self.name)
+        except Exception as e:
+            logger.error("OBS event rule dispatch failed: %s", e)
+
+    def _sync_event_subscriptions(self):
+        """Re-identify when the rules need other events than the connection was identified with.
+
+        Only needed when rules change while connected; new connections already
+        identify with the right mask. Never raises into the supervisor loop.
+        """
+        mask = obs_event_rules.required_subscriptions()
+        client = self.client
+        if mask == self._event_subscriptions or not client or client.legacy:
+            return
+        ws = getattr(client, 'ws', None)
+        if ws is None or not ws.connected:
+            logger.debug("OBS event subscriptions not updated: no open connection")
+            return
+        try:
+            # websocket-client sends each frame under ws.lock, the same path
+            # obsws.call() uses, so this can't interleave with a request. The
+            # library logs OBS's Identified reply (op 2) as an unknown message.
+            ws.send(json.dumps({'op': 3, 'd': {'eventSubscriptions': mask}}))
+            self._event_subscriptions = mask
+            client.event_subscriptions = mask
+            logger.info("OBS event subscriptions updated (mask %d)", mask)
+        except Exception as e:
+            logger.warning("Could not update OBS event subscriptions: %s", e)
+
+    def _save_current_scene_to_storage(self, scene_name, dispatched=False):
+        """Save current scene to persistent storage file.
+
+        ``dispatched`` marks records whose scene was already handled in-process,
+        so the scene file watcher does not trigger it a second time.
+        """
         if not scene_name or not isinstance(scene_name, str):
             raise ValueError(f"Invalid scene name for storage: {scene_name}")
 
@@ -349,6 +768,8 @@ class OBSWebSocketClient:
 
             scene_data['current_scene'] = scene_name
             scene_data['last_updated'] = datetime.now().isoformat()
+            if dispatched:
+                scene_data['dispatched'] = True
 
             config_dir = DATA_DIR / 'config'
             config_dir.mkdir(parents=True, exist_ok=True)
@@ -395,34 +816,28 @@ class OBSWebSocketClient:
 
             scene_name = scene_name.strip()
             logger.info("[%s] OBS Scene change detected: '%s'", event_time, scene_name)
+            self._cached_scene = scene_name
+            self._scene_cache_updated = time.time()
 
         except Exception as initial_error:
             logger.error("Initial scene change processing failed: %s", initial_error)
             return
 
-        # 1. Save scene data via HTTP API (for file-based watcher)
-        try:
-            import requests as http_requests
-            current_port = get_current_port()
-            response = http_requests.post(
-                f'http://localhost:{current_port}/api/obs/current-scene',
-                json={'current_scene': scene_name},
-                headers={'Content-Type': 'application/json'},
-                timeout=1
-            )
-            storage_time = datetime.now().strftime("%H:%M:%S.%f")[:-3]
-            if response.status_code == 200:
-                logger.debug("[%s] Scene data saved: %s", storage_time, scene_name)
-            else:
-                logger.warning("Scene data save failed (status %d): %s", response.status_code, response.text)
-        except Exception as api_error:
-            logger.warning("Scene data save failed (non-critical): %s", api_error)
+        # 1. Dispatch to the mapping lookup / trigger directly (no file round trip)
+        dispatched = False
+        if _scene_change_handler is not None:
+            try:
+                _scene_change_handler(scene_name, self.name)
+                dispatched = True
+            except Exception as dispatch_error:
+                logger.error("In-process scene dispatch failed: %s", dispatch_error)
 
         # 2. Emit to frontend
         try:
             emit_time = datetime.now().strftime("%H:%M:%S.%f")[:-3]
-            socketio.emit('scene_changed', {
+            emit_event('scene', 'scene_changed', {
                 'scene_name': scene_name,
+                'instance': self.name,
                 'timestamp': time.time(),
                 'event_time': emit_time
             })
@@ -430,74 +845,101 @@ class OBSWebSocketClient:
         except Exception as emit_error:
             logger.warning("Socket.IO emission failed (non-critical): %s", emit_error)
 
-        logger.info("[%s] Scene change processing completed", datetime.now().strftime('%H:%M:%S.%f')[:-3])
+        # 3. Record the main instance's scene in obs_current_scene.json in the background
+        if self.name == DEFAULT_OBS_INSTANCE:
+            self._record_scene(scene_name, dispatched)
 
-    def _schedule_reconnect(self):
-        """Schedule a reconnection attempt"""
-        if self.reconnect_attempts < self.max_reconnect_attempts:
-            self.reconnect_attempts += 1
-            delay = min(30, 2 ** self.reconnect_attempts)
-            logger.info("Scheduling OBS reconnection attempt %d/%d in %d seconds", self.reconnect_attempts, self.max_reconnect_attempts, delay)
+        logger.info("[%s] Scene change processing completed", datetime.now().strftime('%H:%M:%S.%f')[:-3])
 
-            def reconnect_after_delay():
-                time.sleep(delay)
-                if not self.connected:
-                    logger.info("Attempting OBS reconnection (%d/%d)", self.reconnect_attempts, self.max_reconnect_attempts)
-                    self.connect()
+    def _record_scene(self, scene_name, dispatched):
+        """Write-behind for obs_current_scene.json; rapid changes coalesce to the latest scene"""
+        self._pending_scene_record = (scene_name, dispatched)
+        if self._scene_writer_active:
+            return
+        self._scene_writer_active = True
+        Thread(target=self._scene_record_writer, daemon=True).start()
 
-            Thread(target=reconnect_after_delay, daemon=True).start()
-        else:
-            logger.warning("Max OBS reconnection attempts (%d) reached. Will retry later...", self.max_reconnect_attempts)
+    def _scene_record_writer(self):
+        try:
+            while self._pending_scene_record is not None:
+                scene_name, dispatched = self._pending_scene_record
+                self._pending_scene_record = None
+                try:
+                    self._save_current_scene_to_storage(scene_name, dispatched=dispatched)
+                    logger.debug("Scene record saved: %s", scene_name)
+                except Exception as e:
+                    logger.warning("Scene record save failed (non-critical): %s", e)
+        finally:
+            self._scene_writer_active = False
 
-            def reset_attempts_later():
-                time.sleep(300)
-                self.reconnect_attempts = 0
-                if self.should_be_connected and not self.connected:
-                    logger.info("Retrying OBS connection after cooldown period...")
-                    self._schedule_reconnect()
+    # =========================================================================
+    # Internal: Connection Supervisor
+    # =========================================================================
+    # One green thread owns all reconnect timing and health checks, so OBS
+    # flapping never multiplies threads or overlapping connection attempts.
 
-            Thread(target=reset_attempts_later, daemon=True).start()
+    def _set_state(self, state, reason):
+        if state == self.state:
+            return
+        logger.info("OBS connection [%s]: %s → %s (%s)", self.name, self.state, state, reason)
+        self.state = state
+        self.state_since = time.time()
+        self.state_history.append({'state': state, 'reason': reason, 'at': self.state_since})
+
+    def get_connection_state(self):
+        """Current connection state, retry timing and recent transitions"""
+        next_retry_in = None
+        if self.state == STATE_BACKOFF:
+            next_retry_in = round(max(0.0, self._next_retry_at - time.monotonic()), 1)
+        return {
+            'state': self.state,
+            'since': self.state_since,
+            'reconnect_attempts': self.reconnect_attempts,
+            'next_retry_in': next_retry_in,
+            'history': list(self.state_history),
+        }
 
     def _start_connection_monitor(self):
-        """Start a background thread to monitor and maintain OBS connection"""
+        """Start the connection supervisor (or nudge it if already running)"""
         if self.connection_monitor_thread and self.connection_monitor_thread.is_alive():
+            self._wake.set()
             return
 
-        def connection_monitor():
-            logger.info("Starting OBS connection monitor with persistent reconnection...")
-            monitor_loop_count = 0
-            while self.auto_reconnect_enabled:
-                try:
-                    time.sleep(10)
-                    monitor_loop_count += 1
-
-                    if monitor_loop_count % 6 == 0:
-                        logger.debug("Connection monitor status: should_connect=%s, connected=%s, auto_reconnect=%s", self.should_be_connected, self.connected, self.auto_reconnect_enabled)
-
-                    if self.should_be_connected and not self.connected:
-                        logger.info("Connection monitor: OBS disconnected — forcing reconnect...")
-                        success = self.connect()
-                        if success:
-                            logger.info("Connection monitor: Reconnection successful")
-                        else:
-                            logger.warning("Connection monitor: Reconnection failed, will retry in 10 seconds")
-                    elif self.connected and self.client:
-                        try:
-                            self.client.call(requests.GetVersion())
-                        except Exception as e:
-                            logger.warning("Connection monitor: OBS connection test failed: %s", e)
-                            self.connected = False
-                            if self.should_be_connected:
-                                success = self.connect()
-                                if success:
-                                    logger.info("Connection monitor: Reconnection after test failure successful")
-                                else:
-                                    logger.warning("Connection monitor: Reconnection after test failure failed")
+        self.connection_monitor_thread = Thread(target=self._supervise_connection, daemon=True)
+        self.connection_monitor_thread.start()
 
-                except Exception as e:
-                    logger.error("Connection monitor error: %s", e)
-                    logger.info("Connection monitor continuing despite error...")
-                    time.sleep(30)
+    def _next_wakeup(self):
+        if self.should_be_connected and not self.connected:
+            return max(0.0, self._next_retry_at - time.monotonic())
+        return HEALTH_CHECK_INTERVAL
 
-        self.connection_monitor_thread = Thread(target=connection_monitor, daemon=True)
-        self.connection_monitor_thread.start()
+    def _supervise_connection(self):
+        logger.info("Starting OBS connection supervisor...")
+        while self.auto_reconnect_enabled:
+            self._wake.wait(self._next_wakeup())
+            self._wake.clear()
+            if not self.auto_reconnect_enabled:
+                break
+
+            try:
+                if self.should_be_connected and not self.connected:
+                    if time.monotonic() >= self._next_retry_at:
+                        self.connect()
+                elif self.connected and self.client:
+                    self._check_health()
+            except Exception as e:
+                logger.error("Connection supervisor error: %s", e)
+                self._next_retry_at = time.monotonic() + RECONNECT_BASE_DELAY
+
+        logger.info("OBS connection supervisor stopped")
+
+    def _check_health(self):
+        try:
+            self.client.call(requests.GetVersion())
+            self._sync_event_subscriptions()
+        except Exception as e:
+            logger.warning("OBS health check failed: %s", e)
+            self.connected = False
+            self._close_client()
+            self._next_retry_at = time.monotonic()
+            self._set_state(STATE_DISCONNECTED, f"health check failed: {e}")
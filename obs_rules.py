@@ -0,0 +1,233 @@
+"""
+Angels-TV-Animator: OBS event rules.
+Maps OBS events beyond scene changes (stream/record state, input mute/active,
+media playback, vendor/custom events) to trigger or queue actions, compiled
+into a per-event-type table from obs_event_rules.json.
+"""
+
+import json
+import logging
+import time
+from pathlib import Path
+
+from config import DATA_DIR, DEFAULT_OBS_INSTANCE, TRIGGER_SPOOL_DIR, obs_instance_scopes
+from scene_watcher import apply_file_trigger, enqueue_spool_trigger
+
+logger = logging.getLogger(__name__)
+
+RULES_FILE = DATA_DIR / 'config' / 'obs_event_rules.json'
+
+RULE_ACTIONS = ('trigger', 'queue')
+
+# Events arrive on the OBS receive thread (InputVolumeMeters many times a
+# second), so hand edits to the rules file are picked up by a stat() at most
+# this often; the rules API invalidates the table immediately
+RULES_FILE_CHECK_INTERVAL = 1.0  # seconds
+
+# obs-websocket v5 EventSubscription bits. "All" covers every non-high-volume
+# category (General..Ui); the client library identifies with 1023, which leaves
+# out Ui events such as StudioModeStateChanged, so the first sync re-identifies.
+# High-volume events have to be requested explicitly.
+CLIENT_IDENTIFY_SUBSCRIPTIONS = 1023
+EVENT_SUBSCRIPTION_ALL = 2047
+HIGH_VOLUME_SUBSCRIPTIONS = {
+    'InputVolumeMeters': 1 << 16,
+    'InputActiveStateChanged': 1 << 17,
+    'InputShowStateChanged': 1 << 18,
+    'SceneItemTransformChanged': 1 << 19,
+}
+
+# Bumped by the rules API so the next event recompiles the table
+_rules_generation = 0
+
+
+def invalidate_event_rules():
+    """Force the rule table to recompile on the next event"""
+    global _rules_generation
+    _rules_generation += 1
+
+
+def validate_rule(rule):
+    """Return an error message for an invalid rule, or None"""
+    if not isinstance(rule, dict):
+        return 'Rule must be an object'
+    if not isinstance(rule.get('event'), str) or not rule['event']:
+        return 'Rule is missing "event"'
+    if rule.get('action', 'trigger') not in RULE_ACTIONS:
+        return f"Unknown action '{rule.get('action')}' (expected one of: {', '.join(RULE_ACTIONS)})"
+    if not rule.get('animation') and not rule.get('animation_field'):
+        return f"Rule for '{rule['event']}' needs \"animation\" or \"animation_field\""
+    if not isinstance(rule.get('when', {}), dict):
+        return f"\"when\" for '{rule['event']}' must be an object"
+    return None
+
+
+def _field(data, path):
+    """Look up a dotted path (``eventData.animation``) in event data"""
+    value = data
+    for key in path:
+        if not isinstance(value, dict) or key not in value:
+            return None
+        value = value[key]
+    return value
+
+
+def _compile_predicate(when):
+    """``when`` maps field paths to a value, or to a list of accepted values"""
+    checks = []
+    for path, expected in when.items():
+        accepted = tuple(expected) if isinstance(expected, list) else (expected,)
+        checks.append((tuple(path.split('.')), accepted))
+    return tuple(checks)
+
+
+def _matches(checks, data):
+    for path, accepted in checks:
+        if _field(data, path) not in accepted:
+            return False
+    return True
+
+
+def _run_trigger(animation_name):
+    return apply_file_trigger(animation_name, 'obs_event_rule')
+
+
+def _run_queue(animation_name):
+    enqueue_spool_trigger(TRIGGER_SPOOL_DIR, animation_name)
+    return True
+
+
+ACTION_HANDLERS = {
+    'trigger': _run_trigger,
+    'queue': _run_queue,
+}
+
+
+class OBSEventRules:
+    """Event type -> rules table, recompiled when the rules file changes.
+
+    Dispatch is one dict lookup per OBS event; only rules for that event type
+    have their predicates evaluated, in file order. Every matching rule runs.
+    Rules without an ``instance`` follow the main OBS; "*" matches every instance.
+    """
+
+    def __init__(self, rules_file_path=RULES_FILE):
+        self.rules_file_path = Path(rules_file_path)
+        self._fingerprint = None
+        self._checked_at = None
+        self._checked_generation = None
+        self._table = {}
+        self.stats = {'events': 0, 'matched': 0, 'failed': 0, 'compile_count': 0}
+
+    def _file_fingerprint(self):
+        try:
+            st = self.rules_file_path.stat()
+            return (_rules_generation, st.st_mtime_ns, st.st_size)
+        except OSError:
+            return (_rules_generation, None, None)
+
+    def _load(self):
+        if not self.rules_file_path.exists():
+            return []
+        try:
+            with open(self.rules_file_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except Exception as e:
+            logger.error("Error loading OBS event rules: %s", e)
+            return []
+        if isinstance(data, list):
+            return data
+        return data.get('rules', []) if isinstance(data, dict) else []
+
+    def compile(self, rules):
+        table = {}
+        for position, rule in enumerate(rules):
+            error = validate_rule(rule)
+            if error:
+                logger.warning("Skipping OBS event rule #%d: %s", position, error)
+                continue
+            if not rule.get('enabled', True):
+                continue
+            animation_field = rule.get('animation_field')
+            table.setdefault(rule['event'], []).append({
+                'name': rule.get('name') or f"{rule['event']} #{position}",
+                'instance': rule.get('instance') or None,
+                'checks': _compile_predicate(rule.get('when', {})),
+                'action': rule.get('action', 'trigger'),
+                'animation': rule.get('animation'),
+                'animation_field': tuple(animation_field.split('.')) if animation_field else None,
+            })
+
+        self._table = {event: tuple(entries) for event, entries in table.items()}
+        self.stats['compile_count'] += 1
+        logger.info("Compiled OBS event rules: %d rules for %d event types",
+                    sum(len(entries) for entries in self._table.values()), len(self._table))
+
+    def _ensure_current(self):
+        now = time.monotonic()
+        if (self._checked_generation == _rules_generation and self._checked_at is not None
+                and now - self._checked_at < RULES_FILE_CHECK_INTERVAL):
+            return
+        self._checked_at = now
+        self._checked_generation = _rules_generation
+
+        fingerprint = self._file_fingerprint()
+        if fingerprint != self._fingerprint:
+            self.compile(self._load())
+            self._fingerprint = fingerprint
+
+    def handles(self, event_type):
+        """True if any rule listens for this event type (cheap pre-check for hot events)"""
+        self._ensure_current()
+        return event_type in self._table
+
+    def event_types(self):
+        self._ensure_current()
+        return set(self._table)
+
+    def required_subscriptions(self):
+        """EventSubscription mask covering every event type the rules use"""
+        mask = EVENT_SUBSCRIPTION_ALL
+        for event_type in self.event_types():
+            mask |= HIGH_VOLUME_SUBSCRIPTIONS.get(event_type, 0)
+        return mask
+
+    def handle_event(self, event_type, data, instance=DEFAULT_OBS_INSTANCE):
+        """Run every rule matching this event; returns the number of actions run"""
+        self._ensure_current()
+        rules = self._table.get(event_type)
+        if not rules:
+            return 0
+        scopes = obs_instance_scopes(instance)
+
+        self.stats['events'] += 1
+        ran = 0
+        for rule in rules:
+            if rule['instance'] not in scopes or not _matches(rule['checks'], data):
+                continue
+            animation = _field(data, rule['animation_field']) if rule['animation_field'] else rule['animation']
+            if not animation:
+                logger.warning("OBS event rule '%s' matched but produced no animation", rule['name'])
+                continue
+
+            self.stats['matched'] += 1
+            logger.info("OBS event rule '%s' matched: %s '%s'", rule['name'], rule['action'], animation)
+            try:
+                if not ACTION_HANDLERS[rule['action']](str(animation)):
+                    self.stats['failed'] += 1
+            except Exception as e:
+                self.stats['failed'] += 1
+                logger.error("OBS event rule '%s' action failed: %s", rule['name'], e)
+            ran += 1
+        return ran
+
+    def get_stats(self):
+        self._ensure_current()
+        return {
+            **self.stats,
+            'event_types': sorted(self._table),
+            'rules': sum(len(entries) for entries in self._table.values()),
+        }
+
+
+obs_event_rules = OBSEventRules()
@@ -5,9 +5,7 @@ Handles admin pages, user management API, file management API, thumbnails, and t
 
 import json
 import logging
-import asyncio
 import eventlet
-import eventlet.tpool
 from pathlib import Path
 from datetime import datetime
 from flask import Blueprint, render_template, request, jsonify, redirect, url_for, session, send_from_directory
@@ -29,12 +27,20 @@ from media_manager import (
     load_state, find_media_file,
     get_animation_files, get_video_files, get_all_media_files
 )
-from device_tracking import get_connected_devices_info
+from device_tracking import get_connected_devices_info, get_device_telemetry
 from thumbnail_service import get_thumbnail_service
+from browser_pool import get_browser_pool
+from thumbnail_jobs import get_thumbnail_engine, JOB_DONE, JOB_SKIPPED
 
 admin_bp = Blueprint('admin', __name__)
 logger = logging.getLogger(__name__)
 
+# How long an on-demand thumbnail request waits for generation before
+# falling back to the SVG placeholder
+THUMBNAIL_WAIT_SECONDS = 30
+# Thumbnail URLs carrying the content hash (?v=) never change content
+THUMBNAIL_IMMUTABLE_CACHE = 'private, max-age=31536000, immutable'
+
 # Import generate_password_hash for user creation
 from werkzeug.security import generate_password_hash
 
@@ -48,24 +54,6 @@ def request_entity_too_large(error):
     }), 413
 
 
-def _run_async(coro):
-    """Run an async coroutine in a real OS thread via eventlet.tpool.
-    
-    eventlet monkey-patches asyncio and threading, so creating a new asyncio
-    event loop inside a green thread fails with 'Cannot run the event loop
-    while another loop is running'.  tpool.execute dispatches to a real
-    native thread where asyncio works normally.
-    """
-    def _worker():
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        try:
-            return loop.run_until_complete(coro)
-        finally:
-            loop.close()
-    return eventlet.tpool.execute(_worker)
-
-
 # =============================================================================
 # Admin Page Routes
 # =============================================================================
@@ -409,6 +397,18 @@ def admin_status():
         return jsonify({'error': str(e)}), 500
 
 
+@admin_bp.route('/admin/api/devices/telemetry')
+@api_admin_required
+def admin_device_telemetry():
+    """API endpoint for per-device health telemetry (RTT, FPS, dropped frames, heap)"""
+    try:
+        include_history = request.args.get('history', '').lower() in ('1', 'true', 'yes')
+        devices = get_device_telemetry(include_history=include_history)
+        return jsonify({'devices': devices, 'count': len(devices)})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
 @admin_bp.route('/admin/api/files')
 @api_admin_required
 def admin_list_files():
@@ -416,6 +416,8 @@ def admin_list_files():
     try:
         files = []
 
+        thumbnail_service = get_thumbnail_service(f"http://localhost:{get_current_port()}")
+
         for filename in get_animation_files():
             file_path = ANIMATIONS_DIR / filename
             files.append({
@@ -423,7 +425,8 @@ def admin_list_files():
                 'type': 'animation',
                 'size': file_path.stat().st_size if file_path.exists() else 0,
                 'url': f'/animations/{filename}',
-                'thumbnail': f'/admin/api/thumbnail/{filename}'
+                'thumbnail': thumbnail_service.get_thumbnail_url(filename, file_path) or f'/admin/api/thumbnail/{filename}',
+                'preview': thumbnail_service.get_preview_info(filename, file_path)
             })
 
         for filename in get_video_files():
@@ -433,7 +436,8 @@ def admin_list_files():
                 'type': 'video',
                 'size': file_path.stat().st_size if file_path.exists() else 0,
                 'url': f'/videos/{filename}',
-                'thumbnail': f'/admin/api/thumbnail/{filename}'
+                'thumbnail': thumbnail_service.get_thumbnail_url(filename, file_path) or f'/admin/api/thumbnail/{filename}',
+                'preview': thumbnail_service.get_preview_info(filename, file_path)
             })
 
         return jsonify({'files': files})
@@ -479,20 +483,9 @@ def admin_upload_file():
         file_path = destination_dir / filename
         file.save(str(file_path))
 
-        # Generate thumbnail in a real OS thread (eventlet.tpool)
+        # Queue thumbnail generation; the upload response doesn't wait for it
         try:
-            thumbnail_service = get_thumbnail_service(f"http://localhost:{get_current_port()}")
-            try:
-                success, thumbnail_name = _run_async(
-                    thumbnail_service.generate_thumbnail(filename, file_path)
-                )
-                if success:
-                    app.logger.info(f"Generated thumbnail for uploaded file: {filename}")
-                else:
-                    app.logger.warning(f"Failed to generate thumbnail for uploaded file: {filename}")
-            except Exception as e:
-                app.logger.error(f"Thumbnail generation error for {filename}: {str(e)}")
-
+            get_thumbnail_engine().submit(filename, file_path)
         except Exception as e:
             app.logger.warning(f"Could not start thumbnail generation for {filename}: {str(e)}")
 
@@ -532,10 +525,8 @@ def admin_delete_file(file_type, filename):
 
         try:
             thumbnail_service = get_thumbnail_service(f"http://localhost:{get_current_port()}")
-            thumbnail_path = thumbnail_service.get_thumbnail_path(filename)
-            if thumbnail_path.exists():
-                thumbnail_path.unlink()
-                app.logger.info(f"Deleted thumbnail for: {filename}")
+            thumbnail_service.forget(filename)
+            app.logger.info(f"Deleted thumbnail for: {filename}")
         except Exception as e:
             app.logger.warning(f"Could not delete thumbnail for {filename}: {str(e)}")
 
@@ -548,58 +539,47 @@ def admin_delete_file(file_type, filename):
         return jsonify({'error': str(e)}), 500
 
 
+def _send_thumbnail(thumbnail_service, filename, source_path):
+    """Serve the variant matching ?w= and the Accept header, or None if there is none"""
+    variant = thumbnail_service.serve_thumbnail(
+        filename,
+        width=request.args.get('w', type=int),
+        accept=request.headers.get('Accept', '')
+    )
+    if not variant:
+        return None
+
+    thumbnail_path, mimetype = variant
+    response = send_from_directory(str(thumbnail_path.parent), thumbnail_path.name, mimetype=mimetype)
+    response.headers['Vary'] = 'Accept'
+    version = request.args.get('v')
+    if version and source_path and version == thumbnail_service.thumbnail_version(filename, source_path):
+        response.headers['Cache-Control'] = THUMBNAIL_IMMUTABLE_CACHE
+    return response
+
+
 @admin_bp.route('/admin/api/thumbnail/<filename>')
 @admin_required
 def admin_thumbnail(filename):
-    """Generate or serve thumbnails for files"""
+    """Generate or serve thumbnails for files (?w=<pixels> picks a size, ?v=<hash> enables long caching)"""
     try:
         thumbnail_service = get_thumbnail_service(f"http://localhost:{get_current_port()}")
+        source_path, _ = find_media_file(filename)
 
-        thumbnail_path = thumbnail_service.serve_thumbnail(filename)
-        if thumbnail_path:
-            return send_from_directory(
-                str(thumbnail_path.parent),
-                thumbnail_path.name,
-                mimetype='image/png'
-            )
+        response = _send_thumbnail(thumbnail_service, filename, source_path)
+        if response:
+            return response
 
         file_ext = filename.lower().split('.')[-1]
 
-        if file_ext in ['html', 'htm']:
-            html_path = Path(ANIMATIONS_DIR) / filename
-            if html_path.exists():
-                try:
-                    success, thumbnail_name = _run_async(
-                        thumbnail_service.generate_thumbnail(filename, html_path)
-                    )
-                    if success:
-                        thumbnail_path = thumbnail_service.serve_thumbnail(filename)
-                        if thumbnail_path:
-                            return send_from_directory(
-                                str(thumbnail_path.parent),
-                                thumbnail_path.name,
-                                mimetype='image/png'
-                            )
-                except Exception as e:
-                    app.logger.warning(f"Failed to generate HTML thumbnail for {filename}: {str(e)}")
-
-        elif file_ext in ['mp4', 'webm', 'mov', 'avi', 'mkv']:
-            video_path = Path(VIDEOS_DIR) / filename
-            if video_path.exists():
-                try:
-                    success, thumbnail_name = _run_async(
-                        thumbnail_service.generate_thumbnail(filename, video_path)
-                    )
-                    if success:
-                        thumbnail_path = thumbnail_service.serve_thumbnail(filename)
-                        if thumbnail_path:
-                            return send_from_directory(
-                                str(thumbnail_path.parent),
-                                thumbnail_path.name,
-                                mimetype='image/png'
-                            )
-                except Exception as e:
-                    app.logger.warning(f"Failed to generate video thumbnail for {filename}: {str(e)}")
+        # Generate through the job engine: concurrent requests for the same
+        # file share one job, and the worker pools bound the total load
+        if source_path:
+            job = get_thumbnail_engine().submit(filename, source_path)
+            if job is not None and job.wait(THUMBNAIL_WAIT_SECONDS) in (JOB_DONE, JOB_SKIPPED):
+                response = _send_thumbnail(thumbnail_service, filename, source_path)
+                if response:
+                    return response
 
         # Fallback SVG placeholders
         if file_ext in ['html', 'htm']:
@@ -625,44 +605,86 @@ def admin_thumbnail(filename):
         return jsonify({'error': str(e)}), 500
 
 
+@admin_bp.route('/admin/api/preview/<filename>/<asset>')
+@admin_required
+def admin_preview(filename, asset):
+    """Serve a hover preview asset: 'video' (looping WebM) or 'sprite' (frame strip JPEG)"""
+    try:
+        thumbnail_service = get_thumbnail_service(f"http://localhost:{get_current_port()}")
+        source_path, _ = find_media_file(filename)
+
+        preview = thumbnail_service.get_preview_path(filename, asset)
+        if not preview:
+            # Previews take a while (HTML ones are recorded in real time), so
+            # queue one and let the client retry instead of waiting here
+            if source_path:
+                get_thumbnail_engine().submit_preview(filename, source_path)
+            return jsonify({'error': 'Preview not generated yet'}), 404
+
+        preview_path, mimetype = preview
+        response = send_from_directory(str(preview_path.parent), preview_path.name, mimetype=mimetype)
+        version = request.args.get('v')
+        if version and source_path and version == thumbnail_service.thumbnail_version(filename, source_path):
+            response.headers['Cache-Control'] = THUMBNAIL_IMMUTABLE_CACHE
+        return response
+
+    except Exception as e:
+        app.logger.error(f"Preview error for {filename}: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+
 @admin_bp.route('/admin/api/thumbnails/generate', methods=['POST'])
 @admin_required
 def admin_generate_thumbnails():
-    """Generate thumbnails for all files"""
+    """Queue thumbnail jobs for all files and clean up orphaned thumbnails"""
     try:
         thumbnail_service = get_thumbnail_service(f"http://localhost:{get_current_port()}")
+        batch = get_thumbnail_engine().submit_all(Path(ANIMATIONS_DIR), Path(VIDEOS_DIR))
 
-        def generate_all_thumbnails():
+        def cleanup_orphans():
             try:
-                results = _run_async(
-                    thumbnail_service.generate_all_thumbnails(
-                        Path(ANIMATIONS_DIR),
-                        Path(VIDEOS_DIR)
-                    )
-                )
-                app.logger.info(f"Thumbnail generation complete: {results}")
-
                 cleaned_count = thumbnail_service.cleanup_orphaned_thumbnails(
                     Path(ANIMATIONS_DIR),
                     Path(VIDEOS_DIR)
                 )
-                results['orphaned_cleaned'] = cleaned_count
-                return results
+                app.logger.info(f"Removed {cleaned_count} orphaned thumbnail(s)")
             except Exception as e:
-                app.logger.error(f"Bulk thumbnail generation failed: {str(e)}")
-                return {'error': str(e)}
+                app.logger.error(f"Orphaned thumbnail cleanup failed: {str(e)}")
 
-        eventlet.spawn_n(generate_all_thumbnails)
+        eventlet.spawn_n(cleanup_orphans)
 
         return jsonify({
             'success': True,
-            'message': 'Thumbnail generation started in background'
+            'message': 'Thumbnail generation started in background',
+            'batch': batch
         })
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
+@admin_bp.route('/admin/api/thumbnails/jobs', methods=['GET'])
+@admin_required
+def admin_thumbnail_jobs():
+    """Thumbnail job engine status: queue depth, running jobs, recent results, batches"""
+    try:
+        return jsonify(get_thumbnail_engine().get_status())
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@admin_bp.route('/admin/api/thumbnails/jobs/cancel', methods=['POST'])
+@admin_required
+def admin_cancel_thumbnail_jobs():
+    """Cancel queued thumbnail jobs: one job_id, one batch_id, or everything"""
+    try:
+        data = request.get_json(silent=True) or {}
+        cancelled = get_thumbnail_engine().cancel(job_id=data.get('job_id'), batch_id=data.get('batch_id'))
+        return jsonify({'success': True, 'cancelled': cancelled})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
 @admin_bp.route('/admin/api/thumbnails/status', methods=['GET'])
 @admin_required
 def admin_thumbnails_status():
@@ -670,7 +692,8 @@ def admin_thumbnails_status():
     try:
         thumbnail_service = get_thumbnail_service(f"http://localhost:{get_current_port()}")
 
-        thumbnail_count = len(list(thumbnail_service.thumbnails_dir.glob('*.png')))
+        # Full-size masters only (<hash>.png), not the sized variants
+        thumbnail_count = len([p for p in thumbnail_service.thumbnails_dir.glob('*.png') if '-' not in p.stem])
 
         html_files = list(Path(ANIMATIONS_DIR).glob('*.html')) if Path(ANIMATIONS_DIR).exists() else []
         video_extensions = ['*.mp4', '*.webm', '*.mov', '*.avi', '*.mkv']
@@ -697,7 +720,8 @@ def admin_thumbnails_status():
             'video_files': len(video_files),
             'thumbnail_count': thumbnail_count,
             'files_with_thumbnails': files_with_thumbnails,
-            'completion_percentage': round((files_with_thumbnails / total_files * 100) if total_files > 0 else 100, 1)
+            'completion_percentage': round((files_with_thumbnails / total_files * 100) if total_files > 0 else 100, 1),
+            'browser_pool': get_browser_pool().get_stats()
         })
 
     except Exception as e:
@@ -10,10 +10,12 @@ import traceback
 from datetime import datetime
 from flask import Blueprint, request, jsonify
 
-from config import DATA_DIR
+from config import DATA_DIR, DEFAULT_OBS_INSTANCE, ANY_OBS_INSTANCE, OBS_INSTANCES_FILE, is_primary_worker
 from auth_manager import admin_required
-from obs_manager import OBSWebSocketClient
-from extensions import get_obs_client as _get_obs_client, set_obs_client as _set_obs_client
+from obs_manager import OBSWebSocketClient, load_obs_instances, sync_obs_instances, validate_instance
+from scene_mappings import validate_mapping, invalidate_scene_mappings
+from obs_rules import RULES_FILE, obs_event_rules, validate_rule, invalidate_event_rules
+from extensions import get_obs_client as _get_obs_client, set_obs_client as _set_obs_client, get_obs_clients
 
 obs_api_bp = Blueprint('obs_api', __name__)
 logger = logging.getLogger(__name__)
@@ -159,23 +161,145 @@ def api_obs_mappings_post():
             return jsonify({'success': False, 'error': 'No mappings data provided'}), 400
 
         mappings = data['mappings']
+        if not isinstance(mappings, list):
+            return jsonify({'success': False, 'error': 'Mappings must be a list'}), 400
 
         for mapping in mappings:
-            if not isinstance(mapping, dict) or 'sceneName' not in mapping or 'animation' not in mapping:
-                return jsonify({'success': False, 'error': 'Invalid mapping structure'}), 400
+            error = validate_mapping(mapping)
+            if error:
+                return jsonify({'success': False, 'error': error}), 400
 
         config_dir = DATA_DIR / 'config'
         config_dir.mkdir(exist_ok=True)
 
+        # Atomic write so the scene watcher never compiles a half-written file
         mappings_path = config_dir / 'obs_mappings.json'
-        with open(mappings_path, 'w') as f:
+        temp_path = mappings_path.with_suffix('.tmp')
+        with open(temp_path, 'w') as f:
             json.dump(mappings, f, indent=2)
+        temp_path.replace(mappings_path)
+        invalidate_scene_mappings()
 
         return jsonify({'success': True})
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
+# =============================================================================
+# OBS Instances
+# =============================================================================
+
+@obs_api_bp.route('/api/obs/instances', methods=['GET'])
+@admin_required
+def api_obs_instances_get():
+    """Get the extra OBS instances and the status of every connection"""
+    try:
+        instances = [
+            {'name': name, **{k: v for k, v in settings.items() if k != 'password'},
+             'password_set': bool(settings.get('password'))}
+            for name, settings in load_obs_instances().items()
+        ]
+        return jsonify({'success': True, 'instances': instances, 'status': _instance_statuses()})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@obs_api_bp.route('/api/obs/instances', methods=['POST'])
+@admin_required
+def api_obs_instances_post():
+    """Save the extra OBS instances and start/stop their connections"""
+    try:
+        data = request.get_json()
+
+        if not data or not isinstance(data.get('instances'), list):
+            return jsonify({'success': False, 'error': 'No instances list provided'}), 400
+
+        existing = load_obs_instances()
+        instances, names = [], set()
+        for entry in data['instances']:
+            error = validate_instance(entry)
+            if error:
+                return jsonify({'success': False, 'error': error}), 400
+            name = entry['name']
+            if name in (DEFAULT_OBS_INSTANCE, ANY_OBS_INSTANCE) or name in names:
+                return jsonify({'success': False, 'error': f"Duplicate or reserved instance name '{name}'"}), 400
+            names.add(name)
+            instances.append({
+                'name': name,
+                'host': entry.get('host', 'localhost'),
+                'port': int(entry.get('port', 4455)),
+                # GET never returns passwords, so a blank one keeps the saved value
+                'password': entry.get('password') or existing.get(name, {}).get('password', ''),
+                'enabled': entry.get('enabled', True),
+            })
+
+        OBS_INSTANCES_FILE.parent.mkdir(exist_ok=True)
+        temp_path = OBS_INSTANCES_FILE.with_suffix('.tmp')
+        with open(temp_path, 'w') as f:
+            json.dump(instances, f, indent=2)
+        temp_path.replace(OBS_INSTANCES_FILE)
+
+        if is_primary_worker():
+            sync_obs_instances()
+
+        return jsonify({'success': True, 'status': _instance_statuses()})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+# =============================================================================
+# OBS Event Rules
+# =============================================================================
+
+@obs_api_bp.route('/api/obs/event-rules', methods=['GET'])
+@admin_required
+def api_obs_event_rules_get():
+    """Get OBS event rules and their match counters"""
+    try:
+        rules = []
+        if RULES_FILE.exists():
+            with open(RULES_FILE, 'r') as f:
+                content = f.read().strip()
+            if content:
+                try:
+                    rules = json.loads(content)
+                except json.JSONDecodeError:
+                    rules = []
+            if not isinstance(rules, list):
+                rules = []
+
+        return jsonify({'success': True, 'rules': rules, 'stats': obs_event_rules.get_stats()})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@obs_api_bp.route('/api/obs/event-rules', methods=['POST'])
+@admin_required
+def api_obs_event_rules_post():
+    """Save OBS event rules"""
+    try:
+        data = request.get_json()
+
+        if not data or not isinstance(data.get('rules'), list):
+            return jsonify({'success': False, 'error': 'No rules list provided'}), 400
+
+        for rule in data['rules']:
+            error = validate_rule(rule)
+            if error:
+                return jsonify({'success': False, 'error': error}), 400
+
+        RULES_FILE.parent.mkdir(exist_ok=True)
+        temp_path = RULES_FILE.with_suffix('.tmp')
+        with open(temp_path, 'w') as f:
+            json.dump(data['rules'], f, indent=2)
+        temp_path.replace(RULES_FILE)
+        invalidate_event_rules()
+
+        return jsonify({'success': True, 'stats': obs_event_rules.get_stats()})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
 # =============================================================================
 # OBS Connection Management
 # =============================================================================
@@ -238,7 +362,7 @@ def api_obs_connect():
             obs_client = OBSWebSocketClient()
             _set_obs_client(obs_client)
 
-        obs_client.enable_persistent_connection()
+        obs_client.enable_persistent_connection(force=True)
 
         if obs_client.connected:
             return jsonify({'success': True, 'message': 'Connected to OBS WebSocket server with persistent connection'})
@@ -257,7 +381,10 @@ def api_obs_disconnect():
         obs_client = _get_obs_client()
         if obs_client:
             obs_client.disconnect(permanent=True)
-            _set_obs_client(None)
+            # A refused disconnect (OBS enabled in settings) keeps the client
+            # and its supervisor; dropping it would orphan a live connection
+            if not obs_client.auto_reconnect_enabled:
+                _set_obs_client(None)
 
         return jsonify({'success': True, 'message': 'Permanently disconnected from OBS WebSocket server'})
 
@@ -265,6 +392,11 @@ def api_obs_disconnect():
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
+def _instance_statuses():
+    """Cached status of every named OBS connection (never waits on OBS)"""
+    return {name: client.get_instance_status() for name, client in get_obs_clients().items()}
+
+
 @obs_api_bp.route('/api/obs/status', methods=['GET'])
 @admin_required
 def api_obs_status():
@@ -295,7 +427,9 @@ def api_obs_status():
                 'disabled': True
             })
 
-        if obs_client is None:
+        if obs_client is None and not is_primary_worker():
+            logger.debug("Secondary worker — OBS client lives on the primary worker")
+        elif obs_client is None:
             logger.info("obs_client is None, attempting to initialize...")
             try:
                 obs_client = OBSWebSocketClient()
@@ -320,49 +454,24 @@ def api_obs_status():
             logger.debug("OBS Status - connected: %s, should_be_connected: %s", obs_client.connected, obs_client.should_be_connected)
 
         if obs_client and obs_client.connected:
-            try:
-                logger.debug("Testing connection health by requesting scene data...")
-                current_scene = obs_client.get_current_scene()
-                scene_list = obs_client.get_scene_list()
-
-                logger.debug("Connection test successful - Current scene: %s, Scene count: %d", current_scene, len(scene_list) if scene_list else 0)
-
-                if current_scene:
-                    try:
-                        obs_client._save_current_scene_to_storage(current_scene)
-                        logger.debug("Updated persistent storage with current scene: %s", current_scene)
-                    except Exception as storage_error:
-                        logger.warning("Failed to update storage in status check: %s", storage_error)
-
-                return jsonify({
-                    'success': True,
-                    'connected': True,
-                    'current_scene': current_scene,
-                    'scene_list': scene_list
-                })
-            except Exception as e:
-                logger.warning("OBS Status - Connection test failed: %s", e)
-                obs_client.connected = False
-
-                error_str = str(e)
-                if "10060" in error_str or "timeout" in error_str.lower() or "connection" in error_str.lower():
-                    error_message = "Connection failed: Please verify your connection details"
-                else:
-                    error_message = f"Connection error: {str(e)}"
-
-                return jsonify({
-                    'success': True,
-                    'connected': False,
-                    'current_scene': None,
-                    'scene_list': [],
-                    'error': error_message
-                })
+            # Served from the event-maintained cache; the connection monitor
+            # checks the link itself, so polling here never waits on OBS
+            scene_cache = obs_client.get_scene_cache()
+            return jsonify({
+                'success': True,
+                'connected': True,
+                'connection': obs_client.get_connection_state(),
+                'instances': _instance_statuses(),
+                **scene_cache
+            })
         else:
             return jsonify({
                 'success': True,
                 'connected': False,
                 'current_scene': None,
-                'scene_list': []
+                'scene_list': [],
+                'connection': obs_client.get_connection_state() if obs_client else None,
+                'instances': _instance_statuses()
             })
 
     except Exception as e:
@@ -372,14 +481,21 @@ def api_obs_status():
 @obs_api_bp.route('/api/obs/scenes', methods=['GET'])
 @admin_required
 def api_obs_scenes():
-    """Get list of all OBS scenes - TRANSIENT DATA for UI only"""
+    """Get list of all OBS scenes - TRANSIENT DATA for UI only (?refresh=1 re-reads OBS)"""
     try:
         obs_client = _get_obs_client()
 
         if obs_client and obs_client.connected:
-            scene_list = obs_client.get_scene_list()
-            logger.debug("Fetched scene list for UI: %d scenes", len(scene_list) if scene_list else 0)
-            return jsonify({'success': True, 'scenes': scene_list})
+            if request.args.get('refresh'):
+                obs_client.refresh_scene_cache()
+            scene_cache = obs_client.get_scene_cache()
+            logger.debug("Scene list for UI: %d scenes (cache age %ss)", len(scene_cache['scene_list']), scene_cache['cache_age'])
+            return jsonify({
+                'success': True,
+                'scenes': scene_cache['scene_list'],
+                'cache_updated': scene_cache['cache_updated'],
+                'cache_age': scene_cache['cache_age'],
+            })
         else:
             return jsonify({'success': False, 'error': 'Not connected to OBS'})
 
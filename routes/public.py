@@ -3,20 +3,24 @@ Angels-TV-Animator: Public route blueprint.
 Handles unauthenticated routes: index, trigger, animations, health, mobile, video serving.
 """
 
-import json
 import logging
 import os
 import shutil
 import time
 from flask import Blueprint, jsonify, request, send_from_directory, render_template
 
-from config import ANIMATIONS_DIR, VIDEOS_DIR, DATA_DIR, STATE_FILE, __version__
+from config import (
+    ANIMATIONS_DIR, VIDEOS_DIR, DATA_DIR, __version__,
+    SOCKETIO_MESSAGE_QUEUE, WORKER_ROLE, get_current_port
+)
 from extensions import socketio, get_obs_client
-from device_tracking import get_connected_devices_info
+from event_stream import emit_event
+from device_tracking import TV_ROOM, get_connected_devices_info, get_raw_websocket_metrics
 from media_manager import (
     load_state, save_state, find_media_file, serve_video,
     get_animation_files, get_video_files, get_all_media_files
 )
+from thumbnail_service import get_thumbnail_service
 
 public_bp = Blueprint('public', __name__)
 logger = logging.getLogger(__name__)
@@ -85,7 +89,7 @@ def trigger():
         state['current_animation'] = media_file
         save_state(state)
 
-        socketio.emit('animation_changed', {
+        emit_event('media', 'animation_changed', {
             'current_animation': media_file,
             'media_type': media_type,
             'message': f"Media changed to '{media_file}' ({media_type})",
@@ -97,7 +101,7 @@ def trigger():
             'reason': 'media_changed',
             'new_media': media_file,
             'media_type': media_type
-        })
+        }, room=TV_ROOM)
         logger.debug("[TRIGGER] Emitted 'page_refresh' for '%s'", media_file)
 
         return jsonify({
@@ -133,7 +137,7 @@ def trigger_get():
         state['current_animation'] = media_file
         save_state(state)
 
-        socketio.emit('animation_changed', {
+        emit_event('media', 'animation_changed', {
             'current_animation': media_file,
             'media_type': media_type,
             'message': f"Media changed to '{media_file}' ({media_type}) via GET trigger",
@@ -144,7 +148,7 @@ def trigger_get():
             'reason': 'get_trigger',
             'new_media': media_file,
             'media_type': media_type
-        })
+        }, room=TV_ROOM)
 
         return jsonify({
             "success": True,
@@ -185,10 +189,9 @@ def stop_animations():
         state = load_state()
         state['current_animation'] = None
 
-        with open(STATE_FILE, 'w') as f:
-            json.dump(state, f, indent=2)
+        save_state(state)
 
-        socketio.emit('animation_stopped', {
+        emit_event('media', 'animation_stopped', {
             'message': 'All animations stopped',
             'timestamp': time.time()
         })
@@ -271,8 +274,14 @@ def health():
             "total_clients": devices.get('total_count', 0),
         },
         "obs": obs_status,
+        "raw_websocket": get_raw_websocket_metrics(),
         "disk": disk_info,
         "uptime_seconds": uptime_seconds,
+        "worker": {
+            "role": WORKER_ROLE,
+            "pid": os.getpid(),
+            "message_queue": bool(SOCKETIO_MESSAGE_QUEUE),
+        },
     }), 200
 
 
@@ -281,6 +290,7 @@ def list_files():
     """Public API endpoint to list all files for mobile interface"""
     try:
         files = []
+        thumbnail_service = get_thumbnail_service(f"http://localhost:{get_current_port()}")
 
         for filename in get_animation_files():
             file_path = ANIMATIONS_DIR / filename
@@ -289,7 +299,8 @@ def list_files():
                 'type': 'animation',
                 'size': file_path.stat().st_size if file_path.exists() else 0,
                 'url': f'/animations/{filename}',
-                'thumbnail': f'/admin/api/thumbnail/{filename}'
+                'thumbnail': thumbnail_service.get_thumbnail_url(filename, file_path) or f'/admin/api/thumbnail/{filename}',
+                'preview': thumbnail_service.get_preview_info(filename, file_path)
             })
 
         for filename in get_video_files():
@@ -299,7 +310,8 @@ def list_files():
                 'type': 'video',
                 'size': file_path.stat().st_size if file_path.exists() else 0,
                 'url': f'/videos/{filename}',
-                'thumbnail': f'/admin/api/thumbnail/{filename}'
+                'thumbnail': thumbnail_service.get_thumbnail_url(filename, file_path) or f'/admin/api/thumbnail/{filename}',
+                'preview': thumbnail_service.get_preview_info(filename, file_path)
             })
 
         state = load_state()
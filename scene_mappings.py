@@ -0,0 +1,178 @@
+"""
+Angels-TV-Animator: Compiled OBS scene mappings.
+Turns obs_mappings.json into an exact-name dict plus ordered pattern rules,
+recompiled only when the file (or the mappings API) changes.
+"""
+
+import fnmatch
+import json
+import logging
+import re
+from pathlib import Path
+
+from config import DATA_DIR, DEFAULT_OBS_INSTANCE, obs_instance_scopes
+
+logger = logging.getLogger(__name__)
+
+MAPPINGS_FILE = DATA_DIR / 'config' / 'obs_mappings.json'
+
+# Mapping "match" kinds; entries without one are exact scene names
+MATCH_TYPES = ('exact', 'glob', 'regex', 'default')
+
+# Bumped by the mappings API so the next lookup recompiles even if the
+# file's mtime did not visibly change
+_mappings_generation = 0
+
+
+def invalidate_scene_mappings():
+    """Force every index to recompile on its next lookup"""
+    global _mappings_generation
+    _mappings_generation += 1
+
+
+def validate_mapping(mapping):
+    """Return an error message for an invalid mapping entry, or None"""
+    if not isinstance(mapping, dict) or 'animation' not in mapping:
+        return 'Invalid mapping structure'
+
+    match = mapping.get('match', 'exact')
+    if match not in MATCH_TYPES:
+        return f"Unknown match type '{match}' (expected one of: {', '.join(MATCH_TYPES)})"
+    if match != 'default' and 'sceneName' not in mapping:
+        return 'Invalid mapping structure'
+    if match != 'default' and (not isinstance(mapping['sceneName'], str) or not mapping['sceneName']):
+        return 'Scene name must be a non-empty string'
+    if mapping.get('instance') is not None and not isinstance(mapping['instance'], str):
+        return f"Instance for '{mapping.get('sceneName')}' must be a string"
+    if 'priority' in mapping:
+        try:
+            int(mapping['priority'])
+        except (TypeError, ValueError):
+            return f"Invalid priority for '{mapping.get('sceneName')}'"
+    if match == 'regex':
+        try:
+            re.compile(mapping['sceneName'])
+        except re.error as e:
+            return f"Invalid regex '{mapping['sceneName']}': {e}"
+    return None
+
+
+class SceneMappingIndex:
+    """Scene name -> animation lookup compiled from the mappings file.
+
+    - exact mappings live in a dict (first entry wins, as with the old scan)
+    - glob/regex rules are tried in priority order (higher first, then file order)
+    - a ``default`` entry applies when nothing else matches
+
+    An optional ``instance`` field scopes a mapping to one named OBS
+    connection ("*" for every connection); unscoped mappings follow the main
+    OBS only, so a backup instance mirroring its scenes doesn't trigger twice.
+    Entries scoped to the reporting instance win over general ones at every
+    stage (exact, then pattern rules, then defaults).
+    """
+
+    def __init__(self, mappings_file_path=MAPPINGS_FILE):
+        self.mappings_file_path = Path(mappings_file_path)
+        self._fingerprint = None
+        self._exact = {}      # instance (None = main only, '*' = any) -> {scene: animation}
+        self._rules = []
+        self._defaults = {}   # instance (None = main only, '*' = any) -> animation
+        self.compile_count = 0
+
+    def _file_fingerprint(self):
+        try:
+            st = self.mappings_file_path.stat()
+            return (_mappings_generation, st.st_mtime_ns, st.st_size)
+        except OSError:
+            return (_mappings_generation, None, None)
+
+    def _load(self):
+        if not self.mappings_file_path.exists():
+            return []
+        try:
+            with open(self.mappings_file_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except Exception as e:
+            logger.error("Error loading scene mappings: %s", e)
+            return []
+        if isinstance(data, list):
+            return data
+        return data.get('mappings', []) if isinstance(data, dict) else []
+
+    def compile(self, mappings):
+        """Build the lookup structures from a list of mapping entries"""
+        exact, rules, defaults = {}, [], {}
+
+        for position, mapping in enumerate(mappings):
+            error = validate_mapping(mapping)
+            animation = mapping.get('animation') if isinstance(mapping, dict) else None
+            if error or not animation:
+                logger.warning("Skipping scene mapping #%d: %s", position, error or 'no animation')
+                continue
+
+            match = mapping.get('match', 'exact')
+            scene = mapping.get('sceneName')
+            instance = mapping.get('instance') or None
+            if match == 'exact':
+                exact.setdefault(instance, {}).setdefault(scene, animation)
+            elif match == 'default':
+                defaults.setdefault(instance, animation)
+            else:
+                try:
+                    pattern = re.compile(fnmatch.translate(scene) if match == 'glob' else scene)
+                except (TypeError, re.error) as e:
+                    logger.warning("Skipping scene mapping #%d: %s", position, e)
+                    continue
+                rules.append((-int(mapping.get('priority', 0)), position, pattern, scene, animation, instance))
+
+        rules.sort(key=lambda rule: (rule[0], rule[1]))
+        self._exact = exact
+        self._rules = [rule[2:] for rule in rules]
+        self._defaults = defaults
+        self.compile_count += 1
+        logger.info("Compiled scene mappings: %d exact, %d pattern rules, %d defaults",
+                    sum(len(names) for names in exact.values()), len(self._rules), len(defaults))
+
+    def _ensure_current(self):
+        fingerprint = self._file_fingerprint()
+        if fingerprint != self._fingerprint:
+            try:
+                self.compile(self._load())
+            except Exception as e:
+                # Keep serving the previous index; retried on the next lookup
+                logger.error("Error compiling scene mappings: %s", e)
+                return
+            self._fingerprint = fingerprint
+
+    def lookup(self, scene_name, instance=DEFAULT_OBS_INSTANCE):
+        """Return ``(animation, matched_by)`` for a scene, or ``(None, None)``"""
+        self._ensure_current()
+        scopes = obs_instance_scopes(instance)
+        tiers = (scopes[:1], scopes[1:])
+
+        for tier in tiers:
+            for scope in tier:
+                animation = self._exact.get(scope, {}).get(scene_name)
+                if animation:
+                    return animation, 'exact'
+
+        for tier in tiers:
+            for pattern, source, animation, scope in self._rules:
+                if scope in tier and pattern.fullmatch(scene_name):
+                    return animation, source
+
+        for tier in tiers:
+            for scope in tier:
+                animation = self._defaults.get(scope)
+                if animation:
+                    return animation, 'default'
+        return None, None
+
+    def get_stats(self):
+        self._ensure_current()
+        return {
+            'exact': sum(len(names) for names in self._exact.values()),
+            'rules': len(self._rules),
+            'defaults': dict((scope or DEFAULT_OBS_INSTANCE, animation) for scope, animation in self._defaults.items()),
+            'compile_count': self.compile_count,
+        }
@@ -1,23 +1,68 @@
 """
 Angels-TV-Animator: File watcher modules.
-TriggerFileWatcher — watches for StreamerBot file triggers.
-OBSSceneWatcher    — watches obs_current_scene.json and triggers animations via scene mappings.
+TriggerFileWatcher  — watches for StreamerBot file triggers.
+TriggerSpoolWatcher — lossless spool directory of one-file-per-trigger requests.
+OBSSceneWatcher     — triggers animations via scene mappings, pushed in-process by the
+                      OBS client or picked up from obs_current_scene.json.
 """
 
 import os
+import itertools
 import json
 import logging
 import time
+import uuid
 from pathlib import Path
 from datetime import datetime
 from threading import Thread
 
-from config import DATA_DIR
+from config import DATA_DIR, DEFAULT_OBS_INSTANCE
 from extensions import socketio
+from event_stream import emit_event, publish_event
+from device_tracking import TV_ROOM
 from media_manager import find_media_file, load_state, save_state
+from file_watch import create_directory_watcher
+from scene_mappings import SceneMappingIndex
 
 logger = logging.getLogger(__name__)
 
+# A preload for the same media inside this window is not re-sent (the preview
+# change and the transition start usually announce the same target)
+PRELOAD_REPEAT_SECONDS = 10.0
+
+
+def apply_file_trigger(animation_name, reason):
+    """Switch the current media for a local (file/socket) trigger; returns True on success"""
+    try:
+        media_path, media_type = find_media_file(animation_name)
+        if not media_path:
+            logger.warning("Media file '%s' not found", animation_name)
+            return False
+
+        state = load_state()
+        state['current_animation'] = animation_name
+        save_state(state)
+
+        emit_event('media', 'animation_changed', {
+            'current_animation': animation_name,
+            'media_type': media_type,
+            'message': f"Media changed to '{animation_name}' ({media_type}) via {reason.replace('_', ' ')}",
+            'refresh_page': True
+        })
+
+        socketio.emit('page_refresh', {
+            'reason': reason,
+            'new_media': animation_name,
+            'media_type': media_type
+        }, room=TV_ROOM)
+
+        logger.info("Successfully triggered animation: %s (%s)", animation_name, media_type)
+        return True
+
+    except Exception as e:
+        logger.error("Error handling trigger: %s", e)
+        return False
+
 
 class TriggerFileWatcher:
     """Watch for file-based triggers from StreamerBot"""
@@ -34,61 +79,232 @@ class TriggerFileWatcher:
         logger.info("Started watching trigger file: %s", self.trigger_file_path)
 
     def _watch_file(self):
-        """Watch for changes to the trigger file"""
-        while self.running:
-            try:
-                if os.path.exists(self.trigger_file_path):
-                    current_modified = os.path.getmtime(self.trigger_file_path)
+        """Watch for changes to the trigger file (inotify when available, else 100ms polling)"""
+        watcher = create_directory_watcher(os.path.dirname(os.path.abspath(self.trigger_file_path)))
+        watched_name = os.path.basename(self.trigger_file_path)
+        logger.info("Trigger file watcher using %s backend", watcher.backend)
 
-                    if current_modified > self.last_modified:
-                        self.last_modified = current_modified
+        try:
+            while self.running:
+                self._check_trigger_file()
+                watcher.wait({watched_name})
+        finally:
+            watcher.close()
+
+    def _check_trigger_file(self):
+        """Consume the trigger file if it changed since the last check"""
+        try:
+            if os.path.exists(self.trigger_file_path):
+                current_modified = os.path.getmtime(self.trigger_file_path)
 
-                        with open(self.trigger_file_path, 'r') as f:
-                            animation_name = f.read().strip()
+                if current_modified > self.last_modified:
+                    self.last_modified = current_modified
 
-                        if animation_name:
-                            logger.info("File trigger received: %s", animation_name)
-                            self._handle_trigger(animation_name)
+                    with open(self.trigger_file_path, 'r') as f:
+                        animation_name = f.read().strip()
 
-                        os.remove(self.trigger_file_path)
+                    if animation_name:
+                        logger.info("File trigger received: %s", animation_name)
+                        self._handle_trigger(animation_name)
 
-            except Exception as e:
-                logger.error("Error watching trigger file: %s", e)
+                    os.remove(self.trigger_file_path)
 
-            time.sleep(0.1)
+        except Exception as e:
+            logger.error("Error watching trigger file: %s", e)
 
     def _handle_trigger(self, animation_name):
         """Handle the animation trigger"""
-        try:
-            media_path, media_type = find_media_file(animation_name)
-            if not media_path:
-                logger.warning("Media file '%s' not found", animation_name)
-                return
+        apply_file_trigger(animation_name, 'file_trigger')
 
-            state = load_state()
-            state['current_animation'] = animation_name
-            save_state(state)
+    def stop_watching(self):
+        """Stop watching the trigger file"""
+        self.running = False
 
-            socketio.emit('animation_changed', {
-                'current_animation': animation_name,
-                'media_type': media_type,
-                'message': f"Media changed to '{animation_name}' ({media_type}) via file trigger",
-                'refresh_page': True
-            })
 
-            socketio.emit('page_refresh', {
-                'reason': 'file_trigger',
-                'new_media': animation_name,
-                'media_type': media_type
-            })
+# Orders triggers queued by this process within the same millisecond
+_spool_sequence = itertools.count()
+
+
+def enqueue_spool_trigger(spool_dir, animation_name):
+    """Queue one trigger file in the spool directory (atomic rename); returns its path"""
+    spool_dir = Path(spool_dir)
+    spool_dir.mkdir(parents=True, exist_ok=True)
+    name = f"{int(time.time() * 1000):013d}-{next(_spool_sequence) % 1000000:06d}-{uuid.uuid4().hex[:8]}"
+    temp_path = spool_dir / f"{name}.tmp"
+    final_path = spool_dir / f"{name}{TriggerSpoolWatcher.SUFFIX}"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        f.write(animation_name)
+    os.replace(temp_path, final_path)
+    return final_path
+
+
+class TriggerSpoolWatcher:
+    """Lossless file triggers: one file per trigger in a spool directory.
+
+    Producers write ``<name>.tmp`` and rename it to ``<name>.trigger`` (atomic),
+    e.g. ``1718000000123-follow.trigger``. Files are consumed in name order.
+    Each file is claimed by renaming it to ``.work``, then acknowledged by
+    renaming it into ``done/`` (or ``failed/`` for unknown media). ``.work``
+    files left over from a crash are re-queued on startup.
+
+    Pending triggers are claimed in batches and every valid one is applied
+    in order, each acknowledged once applied. With ``coalesce`` (opt-in) only
+    the last valid trigger of a batch is applied and the rest are counted as
+    superseded, so a burst causes a single TV refresh.
+    """
+
+    SUFFIX = '.trigger'
+    CLAIMED_SUFFIX = '.work'
+    BATCH_SIZE = 100
+    KEEP_PROCESSED = 200
+
+    def __init__(self, spool_dir, coalesce=False):
+        self.spool_dir = Path(spool_dir)
+        self.coalesce = coalesce
+        self.done_dir = self.spool_dir / 'done'
+        self.failed_dir = self.spool_dir / 'failed'
+        self.running = False
+        self.stats = {'processed': 0, 'applied': 0, 'superseded': 0, 'failed': 0, 'batches': 0}
+
+    def start_watching(self):
+        """Recover interrupted work and start consuming the spool directory"""
+        for directory in (self.spool_dir, self.done_dir, self.failed_dir):
+            directory.mkdir(parents=True, exist_ok=True)
 
-            logger.info("Successfully triggered animation: %s (%s)", animation_name, media_type)
+        for entry in os.scandir(self.spool_dir):
+            if entry.name.endswith(self.CLAIMED_SUFFIX):
+                os.replace(entry.path, entry.path[:-len(self.CLAIMED_SUFFIX)] + self.SUFFIX)
+                logger.warning("Re-queued interrupted spool trigger: %s", entry.name)
 
-        except Exception as e:
-            logger.error("Error handling trigger: %s", e)
+        self.running = True
+        Thread(target=self._watch_spool, daemon=True).start()
+        logger.info("Started watching trigger spool: %s", self.spool_dir)
+
+    def _watch_spool(self):
+        watcher = create_directory_watcher(self.spool_dir)
+        logger.info("Trigger spool watcher using %s backend", watcher.backend)
+
+        try:
+            while self.running:
+                try:
+                    self._process_pending()
+                except Exception as e:
+                    logger.error("Error processing trigger spool: %s", e)
+                    time.sleep(1)
+                watcher.wait(suffix=self.SUFFIX)
+        finally:
+            watcher.close()
+
+    def _pending_names(self):
+        return sorted(entry.name for entry in os.scandir(self.spool_dir)
+                      if entry.name.endswith(self.SUFFIX) and entry.is_file())
+
+    def _claim(self, name):
+        """Rename a pending file to .work; returns the claimed path or None if it vanished"""
+        source = self.spool_dir / name
+        claimed = source.with_name(name[:-len(self.SUFFIX)] + self.CLAIMED_SUFFIX)
+        try:
+            os.replace(source, claimed)
+            return claimed
+        except FileNotFoundError:
+            return None
+
+    def _read_trigger(self, path):
+        """Animation name from a spool file (plain text or {"animation": ...} JSON)"""
+        with open(path, 'r', encoding='utf-8') as f:
+            content = f.read().strip()
+        if content.startswith('{'):
+            try:
+                return str(json.loads(content).get('animation') or '').strip()
+            except (json.JSONDecodeError, AttributeError):
+                return ''
+        return content
+
+    def _acknowledge(self, claimed, ok):
+        target_dir = self.done_dir if ok else self.failed_dir
+        os.replace(claimed, target_dir / (claimed.name[:-len(self.CLAIMED_SUFFIX)] + self.SUFFIX))
+
+    def _process_pending(self):
+        """Consume pending triggers in name order, one batch at a time"""
+        pending = self._pending_names()
+        while pending:
+            batch, pending = pending[:self.BATCH_SIZE], pending[self.BATCH_SIZE:]
+
+            entries = []  # (claimed path, animation name, media exists)
+            for name in batch:
+                claimed = self._claim(name)
+                if claimed is None:
+                    continue
+                try:
+                    animation_name = self._read_trigger(claimed)
+                except (OSError, UnicodeDecodeError) as e:
+                    logger.error("Unreadable spool trigger %s: %s", name, e)
+                    animation_name = ''
+                valid = bool(animation_name) and find_media_file(animation_name)[0] is not None
+                if not valid:
+                    logger.warning("Spool trigger %s rejected: media '%s' not found", name, animation_name)
+                entries.append((claimed, animation_name, valid))
+
+            valid_entries = [entry for entry in entries if entry[2]]
+            last_valid = valid_entries[-1][0] if valid_entries else None
+
+            applied = []
+            superseded = failed = 0
+            for claimed, animation_name, valid in entries:
+                ok = valid
+                if valid and self.coalesce and claimed is not last_valid:
+                    superseded += 1
+                elif valid:
+                    ok = apply_file_trigger(animation_name, 'spool_trigger')
+                    if ok:
+                        applied.append(animation_name)
+                if not ok:
+                    failed += 1
+                self._acknowledge(claimed, ok)
+
+            self.stats['batches'] += 1
+            self.stats['processed'] += len(entries)
+            self.stats['applied'] += len(applied)
+            self.stats['superseded'] += superseded
+            self.stats['failed'] += failed
+            if entries:
+                logger.info("Spool batch: %d trigger(s), %d applied, %d superseded, %d failed",
+                            len(entries), len(applied), superseded, failed)
+                publish_event('queue', 'queue_state', {
+                    'source': 'trigger_spool',
+                    'batch_size': len(entries),
+                    'applied': applied,
+                    'superseded': superseded,
+                    'failed': failed,
+                    'pending': len(pending)
+                })
+
+            if not pending:
+                pending = self._pending_names()
+
+        self._prune(self.done_dir)
+        self._prune(self.failed_dir)
+
+    def _prune(self, directory):
+        """Keep only the newest KEEP_PROCESSED acknowledged files"""
+        names = sorted(entry.name for entry in os.scandir(directory))
+        for name in names[:-self.KEEP_PROCESSED]:
+            try:
+                os.remove(directory / name)
+            except OSError:
+                pass
+
+    def get_stats(self):
+        """Counters plus the number of triggers currently waiting"""
+        stats = dict(self.stats)
+        try:
+            stats['pending'] = len(self._pending_names())
+        except OSError:
+            stats['pending'] = None
+        return stats
 
     def stop_watching(self):
-        """Stop watching the trigger file"""
+        """Stop consuming the spool directory"""
         self.running = False
 
 
@@ -98,9 +314,12 @@ class OBSSceneWatcher:
     def __init__(self, scene_file_path, mappings_file_path):
         self.scene_file_path = Path(scene_file_path)
         self.mappings_file_path = Path(mappings_file_path)
+        self.mapping_index = SceneMappingIndex(self.mappings_file_path)
         self.running = False
         self.watch_thread = None
         self.last_scene = None
+        self.instance_scenes = {}  # Last scene per extra OBS instance
+        self.last_preload = (None, 0.0)  # (animation, monotonic time sent)
         self.last_modified = 0
 
         logger.info("OBS Scene Watcher initialized:")
@@ -120,54 +339,69 @@ class OBSSceneWatcher:
 
     def _watch_scene_file(self):
         """Watch the scene file for changes and trigger animations"""
-        logger.debug("OBS Scene Watcher monitoring started...")
+        watcher = create_directory_watcher(self.scene_file_path.parent)
+        logger.debug("OBS Scene Watcher monitoring started (%s backend)...", watcher.backend)
 
-        while self.running:
-            try:
-                if self.scene_file_path.exists():
-                    current_modified = self.scene_file_path.stat().st_mtime
-
-                    if current_modified > self.last_modified:
-                        self.last_modified = current_modified
-                        logger.debug("[%s] Scene file change detected", datetime.now().strftime('%H:%M:%S.%f')[:-3])
+        try:
+            while self.running:
+                try:
+                    self._check_scene_file()
+                    watcher.wait({self.scene_file_path.name})
+                except Exception as e:
+                    logger.error("Scene watcher error: %s", e)
+                    time.sleep(1)
+        finally:
+            watcher.close()
+
+    def _check_scene_file(self):
+        """Handle a scene change if the scene file was modified since the last check"""
+        if not self.scene_file_path.exists():
+            return
 
-                        try:
-                            with open(self.scene_file_path, 'r', encoding='utf-8') as f:
-                                scene_data = json.load(f)
-                                current_scene = scene_data.get('current_scene')
+        current_modified = self.scene_file_path.stat().st_mtime
+        if current_modified <= self.last_modified:
+            return
 
-                            if current_scene and current_scene != self.last_scene:
-                                logger.info("Scene change detected: '%s' → '%s'", self.last_scene, current_scene)
-                                self.last_scene = current_scene
-                                self._handle_scene_change(current_scene)
+        self.last_modified = current_modified
+        logger.debug("[%s] Scene file change detected", datetime.now().strftime('%H:%M:%S.%f')[:-3])
 
-                        except (json.JSONDecodeError, KeyError, Exception) as e:
-                            logger.error("Error reading scene file: %s", e)
+        try:
+            with open(self.scene_file_path, 'r', encoding='utf-8') as f:
+                scene_data = json.load(f)
+                current_scene = scene_data.get('current_scene')
 
-                time.sleep(0.1)
+            # Written behind by the OBS client after dispatch_scene() already ran
+            if scene_data.get('dispatched'):
+                return
 
-            except Exception as e:
-                logger.error("Scene watcher error: %s", e)
-                time.sleep(1)
+            if current_scene and current_scene != self.last_scene:
+                logger.info("Scene change detected: '%s' → '%s'", self.last_scene, current_scene)
+                self.last_scene = current_scene
+                self._handle_scene_change(current_scene)
+
+        except (json.JSONDecodeError, KeyError, Exception) as e:
+            logger.error("Error reading scene file: %s", e)
+
+    def dispatch_scene(self, scene_name, instance=DEFAULT_OBS_INSTANCE):
+        """Handle a scene change pushed in-process by an OBS client"""
+        if instance == DEFAULT_OBS_INSTANCE:
+            previous, self.last_scene = self.last_scene, scene_name
+        else:
+            previous = self.instance_scenes.get(instance)
+            self.instance_scenes[instance] = scene_name
+        if scene_name == previous:
+            return
+        logger.info("Scene change dispatched [%s]: '%s' → '%s'", instance, previous, scene_name)
+        self._handle_scene_change(scene_name, instance)
 
-    def _handle_scene_change(self, scene_name):
+    def _handle_scene_change(self, scene_name, instance=DEFAULT_OBS_INSTANCE):
         """Handle a scene change by checking mappings and triggering animations"""
         try:
             logger.debug("Processing scene change: '%s'", scene_name)
 
-            mappings = self._load_scene_mappings()
-            if not mappings:
-                logger.debug("No scene mappings configured")
-                return
-
-            animation_name = None
-            for mapping in mappings:
-                if mapping.get('sceneName') == scene_name:
-                    animation_name = mapping.get('animation')
-                    break
-
+            animation_name, matched_by = self.mapping_index.lookup(scene_name, instance)
             if animation_name:
-                logger.info("Found mapping: '%s' → '%s'", scene_name, animation_name)
+                logger.info("Found mapping: '%s' → '%s' (%s)", scene_name, animation_name, matched_by)
                 self._trigger_animation(animation_name, scene_name)
             else:
                 logger.debug("No animation mapping found for scene '%s'", scene_name)
@@ -175,24 +409,35 @@ class OBSSceneWatcher:
         except Exception as e:
             logger.error("Error handling scene change: %s", e)
 
-    def _load_scene_mappings(self):
-        """Load scene mappings from the mappings file"""
-        try:
-            if self.mappings_file_path.exists():
-                with open(self.mappings_file_path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    if isinstance(data, list):
-                        mappings = data
-                    else:
-                        mappings = data.get('mappings', [])
-                    logger.debug("Loaded %d scene mappings", len(mappings))
-                    return mappings
-            else:
-                logger.debug("Scene mappings file not found")
-                return []
-        except Exception as e:
-            logger.error("Error loading scene mappings: %s", e)
-            return []
+    def preload_scene(self, scene_name, instance=DEFAULT_OBS_INSTANCE, reason='preview'):
+        """Tell TVs to pre-warm the media mapped to an upcoming scene.
+
+        Returns the animation announced, or None when there is nothing to preload.
+        """
+        animation_name, _ = self.mapping_index.lookup(scene_name, instance)
+        if not animation_name:
+            return None
+
+        last_animation, sent_at = self.last_preload
+        if animation_name == last_animation and time.monotonic() - sent_at < PRELOAD_REPEAT_SECONDS:
+            return None
+        if animation_name == load_state().get('current_animation'):
+            return None
+
+        media_path, media_type = find_media_file(animation_name)
+        if not media_path:
+            return None
+
+        self.last_preload = (animation_name, time.monotonic())
+        socketio.emit('media_preload', {
+            'animation': animation_name,
+            'media_type': media_type,
+            'url': f"/videos/{animation_name}" if media_type == 'video' else None,
+            'scene_name': scene_name,
+            'reason': reason
+        }, room=TV_ROOM)
+        logger.info("Preloading '%s' on TVs for upcoming scene '%s' (%s)", animation_name, scene_name, reason)
+        return animation_name
 
     def _trigger_animation(self, animation_name, scene_name):
         """Trigger an animation by directly updating state and emitting SocketIO commands"""
@@ -209,7 +454,7 @@ class OBSSceneWatcher:
             save_state(state)
             logger.debug("Updated backend state to: %s", animation_name)
 
-            socketio.emit('animation_changed', {
+            emit_event('media', 'animation_changed', {
                 'current_animation': animation_name,
                 'media_type': media_type,
                 'message': f"Media changed to '{animation_name}' ({media_type})",
@@ -221,7 +466,7 @@ class OBSSceneWatcher:
                 'reason': 'media_changed',
                 'new_media': animation_name,
                 'media_type': media_type
-            })
+            }, room=TV_ROOM)
             logger.debug("[AUTO-TRIGGER] Emitted 'page_refresh' for '%s'", animation_name)
 
             logger.info("Successfully auto-triggered animation: %s (%s) for scene: %s", animation_name, media_type, scene_name)
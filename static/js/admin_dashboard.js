@@ -1,7 +1,8 @@
 class AdminDashboard {
     constructor() {
         this.socket = null;
-        this.connectedDevices = [];
+        this.connectedDevices = new Map();  // device id -> device summary
+        this.deviceSeq = null;              // last applied devices_delta sequence
         this.isLoadingStatus = false;
         this.initWebSocket();
         this.loadStatus();
@@ -15,7 +16,7 @@ class AdminDashboard {
             this.socket.on('connect', () => {
                 console.log('Connected to server');
                 // Register as admin dashboard
-                this.socket.emit('register_admin');
+                this.socket.emit('register_device', { device_class: 'admin' });
                 this.updateConnectionStatus(true);
             });
             
@@ -29,9 +30,15 @@ class AdminDashboard {
                 this.loadStatus(); // Refresh dashboard when animation changes
             });
             
+            // Full snapshot (sent after registering as admin or on request)
             this.socket.on('devices_updated', (data) => {
-                console.log('Devices updated:', data);
-                this.updateDevicesList(data);
+                console.log('Devices snapshot:', data);
+                this.applyDevicesSnapshot(data);
+            });
+            
+            // Debounced incremental changes
+            this.socket.on('devices_delta', (data) => {
+                this.applyDevicesDelta(data);
             });
             
             this.socket.on('connect_error', (error) => {
@@ -86,6 +93,7 @@ class AdminDashboard {
             this.clearErrorState();
             this.updateStatusDisplay(data);
             this.loadMediaList();
+            this.loadDeviceTelemetry();
             
         } catch (error) {
             console.error('Failed to load status:', error);
@@ -217,6 +225,63 @@ class AdminDashboard {
         }
     }
 
+    async loadDeviceTelemetry() {
+        try {
+            const response = await fetch('/admin/api/devices/telemetry');
+            const data = await response.json();
+            
+            if (data.error) {
+                throw new Error(data.error);
+            }
+            
+            this.updateTelemetryList(data.devices || []);
+            
+        } catch (error) {
+            console.error('Failed to load device telemetry:', error);
+        }
+    }
+    
+    updateTelemetryList(devices) {
+        const telemetryList = document.getElementById('tvTelemetryList');
+        if (!telemetryList) return;
+        
+        // Thresholds for flagging underpowered TVs or heavy animations
+        const warn = (value, text) => value ? `<span class="metric-warn">${text}</span>` : text;
+        
+        telemetryList.innerHTML = devices.map(device => {
+            const latest = device.latest || {};
+            const summary = device.summary || {};
+            const metrics = [];
+            
+            if (summary.avg_fps !== undefined) {
+                metrics.push(warn(summary.min_fps < 30, `${summary.avg_fps} fps (min ${summary.min_fps})`));
+            }
+            if (summary.avg_rtt_ms !== undefined) {
+                metrics.push(warn(summary.avg_rtt_ms > 250, `RTT ${summary.avg_rtt_ms} ms`));
+            }
+            if (summary.dropped_ratio !== undefined) {
+                metrics.push(warn(summary.dropped_ratio > 0.05,
+                    `${summary.dropped_frames} dropped (${(summary.dropped_ratio * 100).toFixed(1)}%)`));
+            }
+            if (latest.js_heap_mb !== undefined) {
+                metrics.push(warn(latest.js_heap_mb > 200, `heap ${latest.js_heap_mb.toFixed(0)} MB`));
+            }
+            if (latest.load_time_ms !== undefined) {
+                metrics.push(warn(latest.load_time_ms > 5000, `load ${(latest.load_time_ms / 1000).toFixed(1)}s`));
+            }
+            
+            return `
+                <div class="device-item" title="${device.user_agent}">
+                    <div>
+                        <span>${latest.current_media || 'Unknown media'}</span>
+                        <span class="device-id">${device.id.substring(0, 8)} • ${this.formatConnectionTime(device.connected_at)}</span>
+                    </div>
+                    <div class="device-metrics">${metrics.join(' • ') || 'Waiting for metrics...'}</div>
+                </div>
+            `;
+        }).join('');
+    }
+
     updateStreamerbotStatus(streamerbotDevices, streamerbotCount) {
         const indicator = document.getElementById('streamerbotIndicator');
         const status = document.getElementById('streamerbotStatus');
@@ -268,6 +333,41 @@ class AdminDashboard {
         }
     }
 
+    applyDevicesSnapshot(devicesInfo) {
+        this.connectedDevices.clear();
+        (devicesInfo.tv_devices || []).forEach(device => this.connectedDevices.set(device.id, device));
+        this.deviceSeq = typeof devicesInfo.seq === 'number' ? devicesInfo.seq : null;
+        this.updateDevicesList(devicesInfo);
+    }
+    
+    applyDevicesDelta(delta) {
+        if (this.deviceSeq === null || delta.seq <= this.deviceSeq) {
+            return; // Snapshot not received yet, or already covered by it
+        }
+        if (delta.seq !== this.deviceSeq + 1) {
+            // Missed a batch — resync from a full snapshot
+            console.log('Device delta gap detected, requesting snapshot');
+            this.deviceSeq = null;
+            this.socket.emit('request_devices_snapshot');
+            return;
+        }
+        
+        delta.changes.forEach(change => {
+            if (change.op === 'remove') {
+                this.connectedDevices.delete(change.id);
+            } else if (change.device.type === 'tv') {
+                this.connectedDevices.set(change.device.id, change.device);
+            } else {
+                this.connectedDevices.delete(change.device.id);
+            }
+        });
+        this.deviceSeq = delta.seq;
+        
+        const counts = delta.counts || {};
+        this.updateTVDevicesList(Array.from(this.connectedDevices.values()), counts.tv_count || 0);
+        this.updateStreamerbotStatus([], counts.streamerbot_count || 0);
+    }
+    
     // Legacy method for WebSocket events - now delegates to specific methods
     updateDevicesList(devicesInfo) {
         if (devicesInfo.tv_devices) {
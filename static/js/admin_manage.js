@@ -2,11 +2,77 @@ class FileManager {
     constructor() {
         this.currentFilter = 'all';
         this.files = [];
+        this.thumbnailBatch = null;
         this.initDragAndDrop();
         this.initFileInput();
+        this.initThumbnailProgress();
         this.loadFiles();
     }
     
+    initThumbnailProgress() {
+        // Live progress of thumbnail jobs (sent to the admin room)
+        if (typeof io === 'undefined') return;
+        this.socket = io();
+        this.socket.on('connect', () => {
+            this.socket.emit('register_device', { device_class: 'admin' });
+        });
+        this.socket.on('thumbnail_progress', (data) => this.handleThumbnailProgress(data));
+    }
+    
+    handleThumbnailProgress(data) {
+        const progress = document.getElementById('thumbnailProgress');
+        const cancelBtn = document.getElementById('cancelThumbnailsBtn');
+        const batch = data.batch;
+        if (!progress || !batch) return;
+        
+        const finished = batch.done + batch.failed + batch.skipped + batch.cancelled;
+        progress.style.display = 'block';
+        
+        if (batch.finished) {
+            progress.textContent = `Done: ${batch.done} generated, ${batch.skipped} up to date, ` +
+                `${batch.failed} failed, ${batch.cancelled} cancelled`;
+            cancelBtn.style.display = 'none';
+            this.thumbnailBatch = null;
+            this.loadFiles();
+        } else {
+            const current = data.job.state === 'running' ? ` — ${data.job.filename}` : '';
+            progress.textContent = `Generating ${finished}/${batch.total}` +
+                (batch.failed ? ` (${batch.failed} failed)` : '') + current;
+            cancelBtn.style.display = 'inline-block';
+            this.thumbnailBatch = batch.id;
+        }
+    }
+    
+    // Thumbnails come in 160/320/640px variants; the server picks WebP or PNG from Accept
+    thumbnailSrc(url, width) {
+        return `${url}${url.includes('?') ? '&' : '?'}w=${width}`;
+    }
+    
+    thumbnailSrcset(url) {
+        return [160, 320, 640].map(width => `${this.thumbnailSrc(url, width)} ${width}w`).join(', ');
+    }
+    
+    async cancelThumbnails() {
+        try {
+            const response = await fetch('/admin/api/thumbnails/jobs/cancel', {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json'
+                },
+                body: JSON.stringify(this.thumbnailBatch ? { batch_id: this.thumbnailBatch } : {})
+            });
+            const result = await response.json();
+            
+            if (result.success) {
+                this.showNotification(`⏹️ Cancelled ${result.cancelled} queued thumbnail job(s)`, 'success');
+            } else {
+                this.showNotification(`❌ Failed to cancel: ${result.error}`, 'error');
+            }
+        } catch (error) {
+            this.showNotification(`❌ Error cancelling thumbnails: ${error.message}`, 'error');
+        }
+    }
+    
     initDragAndDrop() {
         const uploadArea = document.getElementById('uploadArea');
         
@@ -136,11 +202,12 @@ class FileManager {
             return;
         }
         
-        filesGrid.innerHTML = filteredFiles.map(file => `
+        filesGrid.innerHTML = filteredFiles.map((file, index) => `
             <div class="file-card">
                 <div class="file-left">
-                    <div class="file-thumbnail">
-                        <img src="${file.thumbnail}" alt="${file.name}" 
+                    <div class="file-thumbnail" data-index="${index}">
+                        <img src="${this.thumbnailSrc(file.thumbnail, 320)}" alt="${file.name}"
+                             srcset="${this.thumbnailSrcset(file.thumbnail)}" sizes="120px" loading="lazy"
                              onerror="this.style.display='none'; this.nextElementSibling.style.display='flex';">
                         <div class="file-placeholder" style="display: none;">
                             <i class="fa-solid ${file.type === 'video' ? 'fa-video' : 'fa-file'}"></i>
@@ -170,6 +237,34 @@ class FileManager {
                 </div>
             </div>
         `).join('');
+        
+        // Hover plays the file's looping preview clip (generated in the background)
+        filesGrid.querySelectorAll('.file-thumbnail').forEach(thumbnail => {
+            const file = filteredFiles[thumbnail.dataset.index];
+            if (!file.preview) return;
+            thumbnail.addEventListener('mouseenter', () => this.showPreview(thumbnail, file.preview));
+            thumbnail.addEventListener('mouseleave', () => this.hidePreview(thumbnail));
+        });
+    }
+    
+    showPreview(thumbnail, preview) {
+        if (thumbnail.querySelector('.file-preview')) return;
+        const video = document.createElement('video');
+        video.className = 'file-preview';
+        video.src = preview.video;
+        video.muted = true;
+        video.loop = true;
+        video.playsInline = true;
+        video.autoplay = true;
+        thumbnail.appendChild(video);
+    }
+    
+    hidePreview(thumbnail) {
+        const video = thumbnail.querySelector('.file-preview');
+        if (video) {
+            video.pause();
+            video.remove();
+        }
     }
     
     async playFile(filename) {
@@ -362,12 +457,15 @@ public class CPHInline
             const result = await response.json();
             
             if (result.success) {
-                this.showNotification('✅ Thumbnail generation started! This may take a few minutes.', 'success');
-                
-                // Auto-refresh status after a delay
-                setTimeout(() => {
-                    this.checkThumbnailStatus();
-                }, 5000);
+                // Up-to-date files are skipped by the workers and reported in the progress line
+                const queued = result.batch.total;
+                if (queued > 0) {
+                    this.thumbnailBatch = result.batch.id;
+                    document.getElementById('cancelThumbnailsBtn').style.display = 'inline-block';
+                    this.showNotification(`✅ Checking ${queued} file(s) for thumbnails...`, 'success');
+                } else {
+                    this.showNotification('ℹ️ No animations or videos to generate thumbnails for.', 'success');
+                }
             } else {
                 this.showNotification(`❌ Failed to start thumbnail generation: ${result.error}`, 'error');
             }
@@ -448,4 +546,11 @@ document.addEventListener('DOMContentLoaded', () => {
             fileManager.checkThumbnailStatus();
         });
     }
+    
+    const cancelBtn = document.getElementById('cancelThumbnailsBtn');
+    if (cancelBtn) {
+        cancelBtn.addEventListener('click', () => {
+            fileManager.cancelThumbnails();
+        });
+    }
 });
\ No newline at end of file
@@ -15,7 +15,10 @@
  *   new ATAIntegration('myElement', {
  *     showStatusIndicator: true,
  *     enableFlashEffects: true,
- *     enablePageRefresh: true
+ *     enablePageRefresh: true,
+ *     telemetryInterval: 15000,  // 0 disables health telemetry
+ *     deviceClass: 'tv',         // tv | overlay | integration
+ *     channel: 'main'            // display channel (also ?channel= in the URL)
  *   });
  */
 
@@ -27,8 +30,11 @@ class ATAIntegration {
             enableFlashEffects: true,
             enablePageRefresh: true,
             heartbeatInterval: 30000,
+            telemetryInterval: 15000,
             refreshDelay: 500,
             animationChangeDelay: 1000,
+            deviceClass: 'tv',
+            channel: null,
             ...options
         };
         
@@ -39,6 +45,10 @@ class ATAIntegration {
         // WebSocket
         this.socket = null;
         this.currentScene = this.getCurrentSceneName();
+        this.loadedMedia = null;
+        this.statusVersion = null;
+        this.preloaded = null;
+        this.preloadVideo = null;
         
         // Initialize
         this.init();
@@ -56,6 +66,10 @@ class ATAIntegration {
         if (this.options.heartbeatInterval > 0) {
             this.startHeartbeat();
         }
+        
+        if (this.options.telemetryInterval > 0) {
+            this.startTelemetry();
+        }
     }
     
     getCurrentSceneName() {
@@ -65,6 +79,26 @@ class ATAIntegration {
         return filename.replace('.html', '') || 'animation';
     }
     
+    registerDevice() {
+        // Declare class, capabilities and channel so the server can target us
+        const params = new URLSearchParams(window.location.search);
+        const probe = document.createElement('video');
+        
+        this.socket.emit('register_device', {
+            device_class: this.options.deviceClass,
+            channel: this.options.channel || params.get('channel') || 'main',
+            capabilities: {
+                soft_swap: false,
+                hls: probe.canPlayType('application/vnd.apple.mpegurl') !== '',
+                screen: { width: window.screen.width, height: window.screen.height }
+            }
+        }, (ack) => {
+            if (ack && !ack.success) {
+                console.warn('Device registration rejected:', ack.error);
+            }
+        });
+    }
+    
     createStatusIndicator() {
         // Create status indicator element
         this.statusIndicator = document.createElement('div');
@@ -86,6 +120,7 @@ class ATAIntegration {
             this.socket.on('connect', () => {
                 console.log('Connected to Angels-TV-Animator server');
                 this.updateStatus('Connected', true);
+                this.registerDevice();
                 
                 if (this.options.enableFlashEffects) {
                     this.flashAnimation();
@@ -104,10 +139,11 @@ class ATAIntegration {
                 
                 // Auto-refresh page if requested (for seamless media changes)
                 if (this.options.enablePageRefresh && data.refresh_page) {
-                    console.log('Page refresh requested, reloading in ' + this.options.animationChangeDelay + 'ms...');
+                    const delay = this.flipDelay(data.current_animation, this.options.animationChangeDelay);
+                    console.log('Page refresh requested, reloading in ' + delay + 'ms...');
                     setTimeout(() => {
                         window.location.reload();
-                    }, this.options.animationChangeDelay);
+                    }, delay);
                 }
             });
             
@@ -119,17 +155,18 @@ class ATAIntegration {
                     this.showRefreshNotification(data);
                     setTimeout(() => {
                         window.location.reload();
-                    }, this.options.refreshDelay);
+                    }, this.flipDelay(data.new_media, this.options.refreshDelay));
                 }
             });
             
-            this.socket.on('status', (data) => {
-                console.log('Server status:', data);
-                if (data.current_animation) {
-                    console.log(`Current animation: ${data.current_animation}`);
-                }
+            // Upcoming OBS scene (studio-mode preview / transition): warm its media now
+            this.socket.on('media_preload', (data) => {
+                console.log('Media preload:', data);
+                this.preloadMedia(data);
             });
             
+            this.socket.on('status', (data) => this.handleStatus(data));
+            
             this.socket.on('error', (data) => {
                 console.error('Server error:', data);
                 this.updateStatus('Error: ' + data.message, false);
@@ -165,6 +202,29 @@ class ATAIntegration {
         }
     }
     
+    preloadMedia(data) {
+        this.preloaded = { media: data.animation, at: Date.now() };
+        if (data.media_type !== 'video' || !data.url) return;
+        
+        // A hidden, muted video buffers the file into the HTTP cache for the next page load
+        if (!this.preloadVideo) {
+            this.preloadVideo = document.createElement('video');
+            this.preloadVideo.muted = true;
+            this.preloadVideo.preload = 'auto';
+            this.preloadVideo.style.display = 'none';
+            document.body.appendChild(this.preloadVideo);
+        }
+        this.preloadVideo.src = data.url;
+        this.preloadVideo.load();
+    }
+    
+    flipDelay(media, defaultDelay) {
+        // Media announced by media_preload is already warm, so flip without waiting
+        const warm = this.preloaded && this.preloaded.media === media &&
+            Date.now() - this.preloaded.at < 120000;
+        return warm ? 0 : defaultDelay;
+    }
+    
     showRefreshNotification(data) {
         // Show a brief notification before page refresh
         const notification = document.createElement('div');
@@ -200,15 +260,96 @@ class ATAIntegration {
         }, 1500);
     }
     
+    handleStatus(data) {
+        console.log('Server status:', data);
+        if (data.state_version) {
+            this.statusVersion = data.state_version;
+        }
+        if (data.current_animation) {
+            console.log(`Current animation: ${data.current_animation}`);
+            // First status after page load names the media this page is showing
+            if (this.loadedMedia === null) {
+                this.loadedMedia = data.current_animation;
+            }
+        }
+    }
+    
     startHeartbeat() {
-        // Request status every interval to keep connection alive
+        // Lightweight heartbeat: the server only sends the full status back when our version is stale
         setInterval(() => {
             if (this.socket && this.socket.connected) {
-                this.socket.emit('get_status');
+                this.socket.emit('status_heartbeat', { version: this.statusVersion }, (ack) => {
+                    if (ack && ack.status) {
+                        this.handleStatus(ack.status);
+                    }
+                });
             }
         }, this.options.heartbeatInterval);
     }
     
+    startTelemetry() {
+        // Report lightweight health metrics so the admin dashboard can spot struggling TVs
+        setInterval(() => {
+            if (this.socket && this.socket.connected) {
+                this.sendTelemetry();
+            }
+        }, this.options.telemetryInterval);
+    }
+    
+    async sendTelemetry() {
+        const [fps, rtt] = await Promise.all([this.sampleFps(1000), this.measureRtt()]);
+        const sample = {
+            current_media: this.loadedMedia || this.currentScene,
+            fps: fps,
+            rtt_ms: rtt
+        };
+        
+        const loadTime = this.getLoadTime();
+        if (loadTime !== null) sample.load_time_ms = loadTime;
+        
+        if (performance.memory) {
+            sample.js_heap_mb = performance.memory.usedJSHeapSize / (1024 * 1024);
+        }
+        
+        this.socket.emit('device_telemetry', sample);
+    }
+    
+    sampleFps(durationMs) {
+        // Count animation frames over a short window (no permanent rAF loop)
+        return new Promise((resolve) => {
+            let frames = 0;
+            const start = performance.now();
+            const tick = (now) => {
+                frames++;
+                if (now - start < durationMs) {
+                    requestAnimationFrame(tick);
+                } else {
+                    resolve(Math.round(frames * 1000 / (now - start)));
+                }
+            };
+            requestAnimationFrame(tick);
+        });
+    }
+    
+    measureRtt() {
+        return new Promise((resolve) => {
+            const sentAt = performance.now();
+            const timeout = setTimeout(() => resolve(null), 5000);
+            this.socket.emit('telemetry_ping', Date.now(), () => {
+                clearTimeout(timeout);
+                resolve(Math.round(performance.now() - sentAt));
+            });
+        });
+    }
+    
+    getLoadTime() {
+        const nav = performance.getEntriesByType ? performance.getEntriesByType('navigation')[0] : null;
+        if (nav && nav.loadEventEnd > 0) {
+            return Math.round(nav.loadEventEnd - nav.startTime);
+        }
+        return null;
+    }
+    
     // Public API methods
     
     /**
@@ -2,6 +2,40 @@ let socket;
 let currentAnimation = null;
 let mediaFiles = [];
 
+// Thumbnails come in 160/320/640px variants; the server picks WebP or PNG from Accept
+const THUMBNAIL_WIDTHS = [160, 320, 640];
+
+function thumbnailSrc(url, width) {
+    return `${url}${url.includes('?') ? '&' : '?'}w=${width}`;
+}
+
+function thumbnailSrcset(url) {
+    return THUMBNAIL_WIDTHS.map(width => `${thumbnailSrc(url, width)} ${width}w`).join(', ');
+}
+
+// Hovering a tile (mouse/pen) scrubs through its sprite strip of evenly spaced frames
+function attachSpriteScrub(thumbnail, preview) {
+    const sprite = thumbnail.querySelector('.media-sprite');
+    const lastFrame = Math.max(preview.frames - 1, 1);
+
+    thumbnail.addEventListener('pointermove', function(event) {
+        if (event.pointerType === 'touch') return;
+        if (!sprite.style.backgroundImage) {
+            sprite.style.backgroundImage = `url("${preview.sprite}")`;
+            sprite.style.backgroundSize = `${preview.frames * 100}% 100%`;
+        }
+        const rect = thumbnail.getBoundingClientRect();
+        const position = Math.min(Math.max((event.clientX - rect.left) / rect.width, 0), 0.999);
+        const frame = Math.floor(position * preview.frames);
+        sprite.style.backgroundPosition = `${(frame / lastFrame) * 100}% 0`;
+        sprite.style.display = 'block';
+    });
+
+    thumbnail.addEventListener('pointerleave', function() {
+        sprite.style.display = 'none';
+    });
+}
+
 // Initialize WebSocket connection
 function initializeSocket() {
     // Socket.IO connects to the main Flask-SocketIO server (same port as web interface)
@@ -10,6 +44,8 @@ function initializeSocket() {
     socket.on('connect', function() {
         updateConnectionStatus(true);
         console.log('Connected to Flask-SocketIO server');
+        // Identify as a remote control so TV-only traffic is not sent here
+        socket.emit('register_device', { device_class: 'mobile' });
     });
 
     socket.on('disconnect', function() {
@@ -101,9 +137,11 @@ function updateMediaDisplay() {
         item.innerHTML = `
             <div class="media-thumbnail" title="${buttonTitle}">
                 ${file.thumbnail ? 
-                    `<img src="${file.thumbnail}" alt="${file.name}">` :
+                    `<img src="${thumbnailSrc(file.thumbnail, 320)}" alt="${file.name}"
+                          srcset="${thumbnailSrcset(file.thumbnail)}" sizes="(max-width: 600px) 50vw, 200px" loading="lazy">` :
                     `<i class="${thumbIcon}"></i>`
                 }
+                ${file.preview ? '<div class="media-sprite"></div>' : ''}
                 <div class="thumbnail-overlay">
                     <i class="fas ${controlIcon}"></i>
                 </div>
@@ -111,6 +149,10 @@ function updateMediaDisplay() {
             </div>
         `;
 
+        if (file.preview) {
+            attachSpriteScrub(item.querySelector('.media-thumbnail'), file.preview);
+        }
+
         // Add click handler and haptic feedback to entire card
         item.addEventListener('click', function() {
             playAnimation(file.name);
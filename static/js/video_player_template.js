@@ -5,12 +5,16 @@ class VideoPlayer {
         this.videoInfo = document.getElementById('videoInfo');
         this.loadingIndicator = document.getElementById('loadingIndicator');
         this.socket = null;
+        this.statusVersion = null;
+        this.preloaded = null;
+        this.preloadVideo = null;
         this.filename = window.videoFilename || 'Unknown';
         
         this.initVideo();
         this.initWebSocket();
         this.initKeyboardControls();
         this.startHeartbeat();
+        this.startTelemetry();
     }
     
     initVideo() {
@@ -50,6 +54,21 @@ class VideoPlayer {
         });
     }
     
+    registerDevice() {
+        // Declare class, capabilities and channel so the server can target us
+        const channel = new URLSearchParams(window.location.search).get('channel') || 'main';
+        
+        this.socket.emit('register_device', {
+            device_class: 'tv',
+            channel: channel,
+            capabilities: {
+                soft_swap: false,
+                hls: this.video.canPlayType('application/vnd.apple.mpegurl') !== '',
+                screen: { width: window.screen.width, height: window.screen.height }
+            }
+        });
+    }
+    
     initWebSocket() {
         try {
             const serverUrl = window.location.origin;
@@ -59,6 +78,7 @@ class VideoPlayer {
             this.socket.on('connect', () => {
                 console.log('Connected to Angels-TV-Animator server');
                 this.updateStatus('Connected', true);
+                this.registerDevice();
             });
             
             this.socket.on('disconnect', () => {
@@ -73,10 +93,11 @@ class VideoPlayer {
                 
                 // Auto-refresh page if requested (for seamless media changes)
                 if (data.refresh_page) {
-                    console.log('Page refresh requested, reloading in 1 second...');
+                    const delay = this.flipDelay(data.current_animation, 1000);
+                    console.log('Page refresh requested, reloading in ' + delay + 'ms...');
                     setTimeout(() => {
                         window.location.reload();
-                    }, 1000);
+                    }, delay);
                 }
             });
             
@@ -86,7 +107,13 @@ class VideoPlayer {
                 this.showRefreshNotification(data);
                 setTimeout(() => {
                     window.location.reload();
-                }, 500);
+                }, this.flipDelay(data.new_media, 500));
+            });
+            
+            // Upcoming OBS scene (studio-mode preview / transition): warm its media now
+            this.socket.on('media_preload', (data) => {
+                console.log('Media preload:', data);
+                this.preloadMedia(data);
             });
             
             // Video control events
@@ -97,6 +124,7 @@ class VideoPlayer {
             
             this.socket.on('status', (data) => {
                 console.log('Server status:', data);
+                this.statusVersion = data.state_version || this.statusVersion;
             });
             
             this.socket.on('error', (data) => {
@@ -209,8 +237,31 @@ class VideoPlayer {
             console.log('Media changed, reloading...');
             setTimeout(() => {
                 window.location.reload();
-            }, 500);
+            }, this.flipDelay(data.current_animation, 500));
+        }
+    }
+    
+    preloadMedia(data) {
+        this.preloaded = { media: data.animation, at: Date.now() };
+        if (data.media_type !== 'video' || !data.url) return;
+        
+        // A hidden, muted video buffers the file into the HTTP cache for the next page load
+        if (!this.preloadVideo) {
+            this.preloadVideo = document.createElement('video');
+            this.preloadVideo.muted = true;
+            this.preloadVideo.preload = 'auto';
+            this.preloadVideo.style.display = 'none';
+            document.body.appendChild(this.preloadVideo);
         }
+        this.preloadVideo.src = data.url;
+        this.preloadVideo.load();
+    }
+    
+    flipDelay(media, defaultDelay) {
+        // Media announced by media_preload is already warm, so flip without waiting
+        const warm = this.preloaded && this.preloaded.media === media &&
+            Date.now() - this.preloaded.at < 120000;
+        return warm ? 0 : defaultDelay;
     }
     
     showRefreshNotification(data) {
@@ -303,13 +354,87 @@ class VideoPlayer {
     }
     
     startHeartbeat() {
-        // Request status every 30 seconds
+        // Lightweight heartbeat every 30 seconds; full status only comes back when it changed
         setInterval(() => {
             if (this.socket && this.socket.connected) {
-                this.socket.emit('get_status');
+                this.socket.emit('status_heartbeat', { version: this.statusVersion }, (ack) => {
+                    if (ack && ack.status) {
+                        console.log('Server status:', ack.status);
+                    }
+                    if (ack && ack.version) {
+                        this.statusVersion = ack.version;
+                    }
+                });
             }
         }, 30000);
     }
+    
+    startTelemetry() {
+        // Report playback health every 15 seconds for the admin dashboard
+        setInterval(() => {
+            if (this.socket && this.socket.connected) {
+                this.sendTelemetry();
+            }
+        }, 15000);
+    }
+    
+    async sendTelemetry() {
+        const [fps, rtt] = await Promise.all([this.sampleFps(1000), this.measureRtt()]);
+        const sample = {
+            current_media: this.filename,
+            fps: fps,
+            rtt_ms: rtt
+        };
+        
+        // Decoder health: cumulative dropped vs. total frames since page load
+        if (typeof this.video.getVideoPlaybackQuality === 'function') {
+            const quality = this.video.getVideoPlaybackQuality();
+            sample.dropped_frames = quality.droppedVideoFrames;
+            sample.total_frames = quality.totalVideoFrames;
+        } else if (typeof this.video.webkitDroppedFrameCount === 'number') {
+            sample.dropped_frames = this.video.webkitDroppedFrameCount;
+            sample.total_frames = this.video.webkitDecodedFrameCount;
+        }
+        
+        const nav = performance.getEntriesByType ? performance.getEntriesByType('navigation')[0] : null;
+        if (nav && nav.loadEventEnd > 0) {
+            sample.load_time_ms = Math.round(nav.loadEventEnd - nav.startTime);
+        }
+        
+        if (performance.memory) {
+            sample.js_heap_mb = performance.memory.usedJSHeapSize / (1024 * 1024);
+        }
+        
+        this.socket.emit('device_telemetry', sample);
+    }
+    
+    sampleFps(durationMs) {
+        // Count animation frames over a short window (no permanent rAF loop)
+        return new Promise((resolve) => {
+            let frames = 0;
+            const start = performance.now();
+            const tick = (now) => {
+                frames++;
+                if (now - start < durationMs) {
+                    requestAnimationFrame(tick);
+                } else {
+                    resolve(Math.round(frames * 1000 / (now - start)));
+                }
+            };
+            requestAnimationFrame(tick);
+        });
+    }
+    
+    measureRtt() {
+        return new Promise((resolve) => {
+            const sentAt = performance.now();
+            const timeout = setTimeout(() => resolve(null), 5000);
+            this.socket.emit('telemetry_ping', Date.now(), () => {
+                clearTimeout(timeout);
+                resolve(Math.round(performance.now() - sentAt));
+            });
+        });
+    }
 }
 
 // Initialize video player when page loads
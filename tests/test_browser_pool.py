@@ -0,0 +1,164 @@
+import asyncio
+
+import pytest
+
+import browser_pool
+from browser_pool import BrowserPool
+
+
+class FakePage:
+    def __init__(self, browser):
+        self.browser = browser
+        self.urls = []
+        self.closed = False
+
+    def is_closed(self):
+        return self.closed
+
+    def set_default_timeout(self, timeout):
+        pass
+
+    async def set_viewport_size(self, size):
+        pass
+
+    async def goto(self, url, wait_until=None):
+        self.urls.append(url)
+        failure = self.browser.failures.pop(0) if url != 'about:blank' and self.browser.failures else None
+        if failure == 'crash':
+            self.browser.crash()
+            raise RuntimeError('Target closed')
+        if failure:
+            raise RuntimeError(failure)
+
+    async def wait_for_timeout(self, ms):
+        pass
+
+    async def screenshot(self, **kwargs):
+        pass
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeBrowser:
+    def __init__(self, failures):
+        self.failures = failures
+        self.connected = True
+        self.pages = []
+        self.handlers = {}
+
+    def is_connected(self):
+        return self.connected
+
+    def on(self, event, handler):
+        self.handlers[event] = handler
+
+    def crash(self):
+        self.connected = False
+        self.handlers['disconnected'](self)
+
+    async def new_page(self):
+        page = FakePage(self)
+        self.pages.append(page)
+        return page
+
+    async def close(self):
+        self.connected = False
+
+
+class FakePlaywright:
+    """Stands in for ``async_playwright()``; ``failures`` scripts what goto() does per render"""
+
+    def __init__(self):
+        self.failures = []
+        self.browsers = []
+        self.chromium = self
+
+    def __call__(self):
+        return self
+
+    async def start(self):
+        return self
+
+    async def stop(self):
+        pass
+
+    async def launch(self, headless=True, args=()):
+        browser = FakeBrowser(self.failures)
+        self.browsers.append(browser)
+        return browser
+
+
+@pytest.fixture
+def playwright(monkeypatch):
+    playwright = FakePlaywright()
+    monkeypatch.setattr(browser_pool, 'async_playwright', playwright, raising=False)
+    return playwright
+
+
+def run_renders(pool, count=1):
+    async def renders():
+        pool._launch_lock = asyncio.Lock()
+        pool._semaphore = asyncio.Semaphore(pool.max_pages)
+        for i in range(count):
+            await pool._screenshot(f'http://localhost/anim{i}.html', '/tmp/thumb.png', 320, 180, 0)
+        await pool._drop_browser()
+    asyncio.run(renders())
+
+
+def test_pages_are_reused_between_renders(playwright):
+    pool = BrowserPool(max_pages=2, idle_seconds=60)
+    run_renders(pool, 3)
+
+    page, = playwright.browsers[0].pages
+    assert page.urls[1] == 'about:blank'  # parked between renders
+    assert pool.stats['launches'] == 1
+    assert pool.stats['pages_created'] == 1
+    assert pool.stats['renders'] == 3
+
+
+def test_pages_are_recycled_after_max_renders(playwright, monkeypatch):
+    monkeypatch.setattr(browser_pool, 'MAX_RENDERS_PER_PAGE', 2)
+    pool = BrowserPool(idle_seconds=60)
+    run_renders(pool, 5)
+
+    first, second, third = playwright.browsers[0].pages
+    assert first.closed and second.closed
+    assert pool.stats['pages_created'] == 3
+
+
+def test_failed_page_is_closed_and_not_retried(playwright):
+    playwright.failures.append('net::ERR_FILE_NOT_FOUND')
+    pool = BrowserPool(idle_seconds=60)
+
+    with pytest.raises(RuntimeError, match='ERR_FILE_NOT_FOUND'):
+        run_renders(pool)
+
+    page, = playwright.browsers[0].pages
+    assert page.closed
+    assert pool.stats['failures'] == 1
+    assert pool.stats['crashes'] == 0
+
+
+def test_crashed_browser_is_relaunched_and_the_render_retried(playwright):
+    playwright.failures.append('crash')
+    pool = BrowserPool(idle_seconds=60)
+    run_renders(pool)
+
+    assert len(playwright.browsers) == 2
+    assert pool.stats['crashes'] == 1
+    assert pool.stats['launches'] == 2
+    assert pool.stats['renders'] == 1
+    assert pool.stats['failures'] == 0
+
+
+def test_repeated_crash_fails_the_render(playwright):
+    playwright.failures.extend(['crash', 'crash'])
+    pool = BrowserPool(idle_seconds=60)
+
+    with pytest.raises(RuntimeError, match='Target closed'):
+        run_renders(pool)
+
+    assert pool.stats['crashes'] == 1
+    assert pool.stats['failures'] == 1
+    assert pool.get_stats()['running'] is False
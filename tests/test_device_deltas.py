@@ -0,0 +1,67 @@
+import pytest
+
+import device_tracking
+from device_tracking import ADMIN_ROOM, queue_device_delta
+
+
+@pytest.fixture
+def flush(monkeypatch):
+    """Capture scheduled flushes and emitted batches instead of running them"""
+    scheduled, emitted = [], []
+    monkeypatch.setattr(device_tracking, '_pending_deltas', {})
+    monkeypatch.setattr(device_tracking, '_flush_scheduled', False)
+    monkeypatch.setattr(device_tracking, '_delta_seq', 0)
+    monkeypatch.setattr(device_tracking, 'connected_devices', {
+        'tv-1': {'type': 'tv', 'user_agent': 'TV', 'connected_at': 1.0},
+        'tv-2': {'type': 'tv', 'user_agent': 'TV', 'connected_at': 2.0},
+    })
+    monkeypatch.setattr(device_tracking, '_raw_websocket_server', None)
+    monkeypatch.setattr(device_tracking.socketio, 'start_background_task', scheduled.append)
+    monkeypatch.setattr(device_tracking.socketio, 'sleep', lambda seconds: None)
+    monkeypatch.setattr(device_tracking, 'emit_event',
+                        lambda topic, event, data, room=None: emitted.append((topic, event, data, room)))
+
+    def run():
+        for task in scheduled:
+            task()
+        scheduled.clear()
+        return emitted
+    run.scheduled = scheduled
+    return run
+
+
+def test_burst_is_sent_once_to_admins(flush):
+    devices = device_tracking.connected_devices
+    queue_device_delta('add', 'tv-1', devices['tv-1'])
+    queue_device_delta('add', 'tv-2', devices['tv-2'])
+    queue_device_delta('update', 'tv-1', devices['tv-1'])
+    queue_device_delta('remove', 'old-tv')
+
+    assert len(flush.scheduled) == 1
+    (topic, event, data, room), = flush()
+
+    assert (topic, event, room) == ('device', 'devices_delta', ADMIN_ROOM)
+    assert data['seq'] == 1
+    assert [(change['op'], change.get('id') or change['device']['id']) for change in data['changes']] == [
+        ('add', 'tv-1'), ('add', 'tv-2'), ('remove', 'old-tv'),
+    ]
+    assert data['counts']['tv_count'] == 2
+
+
+def test_connect_and_disconnect_inside_one_window_sends_nothing(flush):
+    queue_device_delta('add', 'tv-1', device_tracking.connected_devices['tv-1'])
+    queue_device_delta('remove', 'tv-1')
+
+    assert flush() == []
+    assert device_tracking._flush_scheduled is False
+
+
+def test_each_window_gets_the_next_sequence_number(flush):
+    queue_device_delta('add', 'tv-1', device_tracking.connected_devices['tv-1'])
+    flush()
+    queue_device_delta('remove', 'tv-1')
+    emitted = flush()
+
+    assert [data['seq'] for _, _, data, _ in emitted] == [1, 2]
+    assert emitted[1][2]['changes'] == [{'op': 'remove', 'id': 'tv-1'}]
+    assert device_tracking.get_devices_snapshot()['seq'] == 2
@@ -0,0 +1,55 @@
+import pytest
+
+import auth_manager  # noqa: F401 — registers the Flask-Login user loader
+import websocket_handlers  # noqa: F401 — registers the Socket.IO handlers
+from device_tracking import ADMIN_ROOM, TV_ROOM, admin_sessions, connected_devices
+from extensions import app, socketio
+
+
+@pytest.fixture
+def client():
+    client = socketio.test_client(app)
+    yield client
+    if client.is_connected():
+        client.disconnect()
+
+
+def session_rooms(client):
+    sid = socketio.server.manager.sid_from_eio_sid(client.eio_sid, '/')
+    return sid, set(socketio.server.manager.get_rooms(sid, '/'))
+
+
+@pytest.mark.parametrize('device_class', ['admin', 'Admin', ' ADMIN '])
+def test_logged_out_admin_registration_is_rejected(client, device_class):
+    ack = client.emit('register_device', {'device_class': device_class}, callback=True)
+
+    sid, rooms = session_rooms(client)
+    assert ack['success'] is False
+    assert ADMIN_ROOM not in rooms
+    assert sid not in admin_sessions
+    assert connected_devices[sid]['type'] == 'tv'
+    assert not [msg for msg in client.get_received() if msg['name'] == 'devices_updated']
+
+
+def test_legacy_register_admin_requires_login(client):
+    ack = client.emit('register_admin', callback=True)
+
+    assert ack['success'] is False
+    assert ADMIN_ROOM not in session_rooms(client)[1]
+
+
+def test_device_class_is_normalized(client):
+    ack = client.emit('register_device', {'device_class': ' TV ', 'channel': 'lobby'}, callback=True)
+
+    assert (ack['success'], ack['device_class'], ack['channel']) == (True, 'tv', 'lobby')
+    assert TV_ROOM in session_rooms(client)[1]
+
+
+def test_connect_ignores_admin_referer():
+    client = socketio.test_client(app, headers={'Referer': 'http://localhost/admin'})
+    try:
+        sid, rooms = session_rooms(client)
+        assert connected_devices[sid]['type'] == 'tv'
+        assert ADMIN_ROOM not in rooms
+    finally:
+        client.disconnect()
@@ -0,0 +1,48 @@
+import pytest
+
+import device_tracking
+from device_tracking import get_device_telemetry, record_device_telemetry
+
+
+@pytest.fixture(autouse=True)
+def devices(monkeypatch):
+    devices = {
+        session_id: {'type': device_class, 'user_agent': 'UA', 'connected_at': 1.0}
+        for session_id, device_class in (('tv', 'tv'), ('admin', 'admin'), ('phone', 'mobile'),
+                                         ('overlay', 'overlay'))
+    }
+    monkeypatch.setattr(device_tracking, 'connected_devices', devices)
+    monkeypatch.setattr(device_tracking, 'device_telemetry', {})
+    return devices
+
+
+def test_tv_samples_are_recorded_and_filtered():
+    assert record_device_telemetry('tv', {
+        'rtt_ms': 12.345, 'fps': 59.9, 'dropped_frames': -1, 'js_heap_mb': True,
+        'current_media': 'x' * 300, 'extra': 'ignored',
+    })
+
+    sample = device_tracking.device_telemetry['tv'][-1]
+    assert set(sample) == {'timestamp', 'rtt_ms', 'fps', 'current_media'}
+    assert sample['rtt_ms'] == 12.35
+    assert len(sample['current_media']) == 255
+
+
+@pytest.mark.parametrize('session_id', ['admin', 'phone', 'overlay', 'unknown'])
+def test_only_connected_tvs_may_report(session_id):
+    assert record_device_telemetry(session_id, {'fps': 60}) is False
+    assert device_tracking.device_telemetry == {}
+
+
+def test_samples_faster_than_the_minimum_interval_are_dropped():
+    assert record_device_telemetry('tv', {'fps': 60})
+    assert record_device_telemetry('tv', {'fps': 30}) is False
+    assert len(device_tracking.device_telemetry['tv']) == 1
+
+
+def test_report_lists_only_tvs(devices):
+    record_device_telemetry('tv', {'rtt_ms': 10})
+    record_device_telemetry('phone', {'rtt_ms': 10})
+    devices['tv']['type'] = 'admin'  # re-registered after reporting
+
+    assert get_device_telemetry() == []
@@ -0,0 +1,116 @@
+import asyncio
+import threading
+
+import eventlet
+import pytest
+
+from event_bridge import BridgeFullError, EventBridge
+
+
+@pytest.fixture
+def loop():
+    # The asyncio side runs in its own OS thread, as the raw WebSocket server does
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    yield loop
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(5)
+    loop.close()
+
+
+def wait_for(future, timeout=5):
+    # Keep the eventlet hub (and so the command drainer) running while we wait
+    deadline = eventlet.hubs.get_hub().clock() + timeout
+    while not future.done() and eventlet.hubs.get_hub().clock() < deadline:
+        eventlet.sleep(0.01)
+    return future.result(0)
+
+
+def test_call_runs_on_the_hub_and_returns_the_result(loop):
+    bridge = EventBridge('test')
+    bridge.attach_loop(loop)
+    bridge.start()
+    try:
+        hub_threads = []
+
+        def work(a, b):
+            hub_threads.append(threading.get_ident())
+            return a + b
+
+        future = asyncio.run_coroutine_threadsafe(bridge.call(work, 2, 3), loop)
+
+        assert wait_for(future) == 5
+        assert hub_threads == [threading.get_ident()]
+        assert bridge.get_metrics()['commands_completed'] == 1
+    finally:
+        bridge.stop()
+
+
+def test_call_propagates_exceptions(loop):
+    bridge = EventBridge('test')
+    bridge.attach_loop(loop)
+    bridge.start()
+    try:
+        def fail():
+            raise ValueError('boom')
+
+        future = asyncio.run_coroutine_threadsafe(bridge.call(fail), loop)
+
+        with pytest.raises(ValueError, match='boom'):
+            wait_for(future)
+        assert bridge.get_metrics()['commands_failed'] == 1
+    finally:
+        bridge.stop()
+
+
+def test_call_rejected_when_full(loop):
+    bridge = EventBridge('test', max_depth=1)
+    bridge._commands.append(('pending',))
+
+    future = asyncio.run_coroutine_threadsafe(bridge.call(lambda: None), loop)
+
+    with pytest.raises(BridgeFullError):
+        future.result(5)
+    assert bridge.get_metrics()['commands_rejected'] == 1
+
+
+def test_push_delivers_in_order_on_the_loop(loop):
+    bridge = EventBridge('test')
+    bridge.attach_loop(loop)
+    received, done = [], threading.Event()
+
+    def callback(value):
+        received.append((value, threading.get_ident()))
+        if value == 3:
+            done.set()
+
+    for value in (1, 2, 3):
+        assert bridge.push(callback, value)
+
+    assert done.wait(5)
+    assert [value for value, _ in received] == [1, 2, 3]
+    assert {ident for _, ident in received} != {threading.get_ident()}
+
+
+def test_push_drops_oldest_when_full():
+    loop = asyncio.new_event_loop()
+    try:
+        bridge = EventBridge('test', max_depth=2)
+        bridge.attach_loop(loop)
+        received = []
+        for value in (1, 2, 3):
+            bridge.push(received.append, value)
+
+        # Nothing has run yet: drain the queued callback on the (idle) loop
+        loop.run_until_complete(asyncio.sleep(0))
+
+        assert received == [2, 3]
+        metrics = bridge.get_metrics()
+        assert (metrics['events_dropped'], metrics['events_delivered']) == (1, 2)
+    finally:
+        loop.close()
+
+
+def test_push_without_loop():
+    assert EventBridge('test').push(print, 'x') is False
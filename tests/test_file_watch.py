@@ -0,0 +1,72 @@
+import os
+
+import pytest
+
+import file_watch
+from file_watch import InotifyWatcher, PollingWatcher, create_directory_watcher, inotify_supported
+
+needs_inotify = pytest.mark.skipif(not inotify_supported(), reason='inotify not available')
+
+
+@pytest.fixture
+def watcher(tmp_path):
+    watcher = InotifyWatcher(tmp_path)
+    yield watcher
+    watcher.close()
+
+
+@needs_inotify
+def test_completed_write_wakes_the_watcher(tmp_path, watcher):
+    (tmp_path / 'trigger.txt').write_text('brb.html')
+
+    assert watcher.wait(['trigger.txt'], timeout=1)
+
+
+@needs_inotify
+def test_atomic_rename_wakes_the_watcher(tmp_path, watcher):
+    (tmp_path / 'scene.json.tmp').write_text('{}')
+    assert watcher.wait(['scene.json'], timeout=0.05) is False  # the temp file is not watched
+
+    os.replace(tmp_path / 'scene.json.tmp', tmp_path / 'scene.json')
+
+    assert watcher.wait(['scene.json'], timeout=1)
+
+
+@needs_inotify
+def test_suffix_filter_and_timeout(tmp_path, watcher):
+    (tmp_path / 'notes.txt').write_text('x')
+    assert watcher.wait(suffix='.trigger', timeout=0.05) is False
+
+    (tmp_path / '0001.trigger').write_text('brb.html')
+    assert watcher.wait(suffix='.trigger', timeout=1)
+
+
+def test_poll_backend_setting(tmp_path, monkeypatch):
+    monkeypatch.setattr(file_watch, 'FILE_WATCH_BACKEND', 'poll')
+
+    watcher = create_directory_watcher(tmp_path)
+
+    assert isinstance(watcher, PollingWatcher) and watcher.backend == 'poll'
+
+
+def test_falls_back_to_polling_without_inotify(tmp_path, monkeypatch):
+    monkeypatch.setattr(file_watch, 'FILE_WATCH_BACKEND', 'inotify')
+    monkeypatch.setattr(file_watch, 'inotify_supported', lambda: False)
+
+    assert isinstance(create_directory_watcher(tmp_path), PollingWatcher)
+
+
+def test_falls_back_to_polling_when_the_watch_fails(tmp_path, monkeypatch):
+    def no_watches(directory, mask):
+        raise OSError(28, 'inotify watch limit reached')
+
+    monkeypatch.setattr(file_watch, 'FILE_WATCH_BACKEND', 'auto')
+    monkeypatch.setattr(file_watch, 'inotify_supported', lambda: True)
+    monkeypatch.setattr(file_watch, 'InotifyWatcher', no_watches)
+
+    assert isinstance(create_directory_watcher(tmp_path / 'new'), PollingWatcher)
+    assert (tmp_path / 'new').is_dir()
+
+
+def test_polling_watcher_always_reports_a_wake(tmp_path):
+    assert PollingWatcher(tmp_path, interval=0).wait(['anything']) is True
@@ -0,0 +1,105 @@
+import json
+import os
+import socket
+
+import pytest
+
+import local_trigger
+from local_trigger import LocalTriggerSocket, execute_local_command, is_enabled
+
+
+@pytest.fixture
+def actions(monkeypatch):
+    calls = []
+
+    def trigger(request):
+        calls.append(request)
+        return {'status': 'success', 'animation': request['animation']}
+
+    monkeypatch.setattr(local_trigger, 'BRIDGED_ACTIONS', {
+        'trigger_animation': trigger,
+        'get_status': lambda request: {'status': 'success', 'current_animation': 'idle.html'},
+    })
+    return calls
+
+
+@pytest.fixture
+def listener(tmp_path, actions):
+    listener = LocalTriggerSocket(tmp_path / 'ata.sock')
+    listener.start()
+    yield listener
+    listener.stop()
+
+
+def exchange(path, payload, replies):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.settimeout(5)
+        client.connect(str(path))
+        client.sendall(payload)
+        client.shutdown(socket.SHUT_WR)
+        data = b''
+        while data.count(b'\n') < replies:
+            chunk = client.recv(4096)
+            if not chunk:
+                break
+            data += chunk
+    return [json.loads(line) for line in data.splitlines()]
+
+
+def test_disabled_values():
+    assert not is_enabled('off')
+    assert not is_enabled(' None ')
+    assert not is_enabled('')
+    assert is_enabled('/run/ata.sock')
+
+
+def test_bare_filename_and_json_actions(actions):
+    assert execute_local_command('brb.html\n', 'test')['animation'] == 'brb.html'
+    response = execute_local_command('{"action": "get_status", "id": 7}', 'test')
+
+    assert (response['current_animation'], response['id']) == ('idle.html', 7)
+    assert actions[0]['source'] == 'test'
+    assert execute_local_command('   ', 'test') is None
+
+
+@pytest.mark.parametrize('line, message', [
+    ('{"action": ', 'Invalid JSON format'),
+    ('{"action": "reboot"}', 'Unknown action type: reboot'),
+])
+def test_bad_commands(actions, line, message):
+    assert execute_local_command(line, 'test') == {'status': 'error', 'message': message}
+    assert actions == []
+
+
+def test_socket_answers_one_line_per_command(listener, actions):
+    replies = exchange(listener.socket_path, b'a.html\n{"action": "get_status"}\n{bad\nb.html', 4)
+
+    assert [reply['status'] for reply in replies] == ['success', 'success', 'error', 'success']
+    assert replies[2]['message'] == 'Invalid JSON format'
+    assert [call['animation'] for call in actions] == ['a.html', 'b.html']
+    assert all(call['source'] == 'local_socket' for call in actions)
+
+
+def test_restart_replaces_stale_socket(tmp_path, actions):
+    path = tmp_path / 'ata.sock'
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(str(path))
+    stale.close()  # Leaves the socket file behind, like a crashed server
+
+    listener = LocalTriggerSocket(path)
+    listener.start()
+    try:
+        assert exchange(path, b'a.html\n', 1)[0]['status'] == 'success'
+        assert oct(os.stat(path).st_mode & 0o777) == oct(0o660)
+    finally:
+        listener.stop()
+    assert not path.exists()
+
+
+def test_refuses_to_replace_a_regular_file(tmp_path):
+    path = tmp_path / 'ata.sock'
+    path.write_text('not a socket')
+
+    with pytest.raises(RuntimeError):
+        LocalTriggerSocket(path).start()
+    assert path.read_text() == 'not a socket'
@@ -0,0 +1,56 @@
+import itertools
+
+import pytest
+
+from message_queue import LOOPBACK_SCHEME, LoopbackPubSubManager, build_socketio_queue_options
+
+_channels = itertools.count()
+
+
+@pytest.fixture
+def channel():
+    # Loopback subscribers are shared per channel across instances
+    return f"test-{next(_channels)}"
+
+
+def test_loopback_fans_out_to_every_subscriber(channel):
+    publisher = LoopbackPubSubManager(channel=channel)
+    subscriber = LoopbackPubSubManager(channel=channel)
+
+    publisher._publish({'method': 'emit', 'event': 'ping'})
+
+    assert next(publisher._listen()) == {'method': 'emit', 'event': 'ping'}
+    assert next(subscriber._listen()) == {'method': 'emit', 'event': 'ping'}
+
+
+def test_loopback_channels_are_isolated(channel):
+    publisher = LoopbackPubSubManager(channel=channel)
+    other = LoopbackPubSubManager(channel=channel + '-other')
+
+    publisher._publish('hello')
+
+    assert other._inbox.empty()
+
+
+def test_loopback_write_only_and_closed_managers_receive_nothing(channel):
+    publisher = LoopbackPubSubManager(channel=channel, write_only=True)
+    closed = LoopbackPubSubManager(channel=channel)
+    closed.close()
+
+    publisher._publish('hello')
+
+    assert publisher._inbox.empty()
+    assert closed._inbox.empty()
+
+
+def test_queue_options_by_url():
+    assert build_socketio_queue_options(None, 'ata') == {}
+
+    options = build_socketio_queue_options(LOOPBACK_SCHEME, 'ata')
+    assert isinstance(options['client_manager'], LoopbackPubSubManager)
+    assert options['client_manager'].channel == 'ata'
+    options['client_manager'].close()
+
+    assert build_socketio_queue_options('redis://localhost:6379/0', 'ata') == {
+        'message_queue': 'redis://localhost:6379/0', 'channel': 'ata'
+    }
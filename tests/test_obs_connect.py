@@ -0,0 +1,108 @@
+import json
+import threading
+
+from obs_manager import OBSWebSocketClient, SubscribingObsws
+from obs_rules import EVENT_SUBSCRIPTION_ALL, obs_event_rules
+
+
+def test_concurrent_connects_share_one_attempt(monkeypatch):
+    client = OBSWebSocketClient()
+    started, release = threading.Event(), threading.Event()
+
+    def slow_attempt():
+        started.set()
+        release.wait(5)
+        client.connected = True
+        return True
+
+    monkeypatch.setattr(client, '_attempt_connect', slow_attempt)
+    results = []
+    first = threading.Thread(target=lambda: results.append(client.connect()))
+    first.start()
+    started.wait(5)
+
+    # Callers arriving while the attempt runs wait for it instead of starting another
+    waiters = [threading.Thread(target=lambda: results.append(client.connect())) for _ in range(3)]
+    for thread in waiters:
+        thread.start()
+    release.set()
+    for thread in [first] + waiters:
+        thread.join(5)
+
+    assert results == [True] * 4
+    assert client._connect_attempt_count == 1
+    assert client._connect_in_flight is None
+
+
+def test_failed_attempt_allows_next_one(monkeypatch):
+    client = OBSWebSocketClient()
+    monkeypatch.setattr(client, '_attempt_connect', lambda: False)
+
+    assert client.connect(force=True) is False
+    assert client.connect(force=True) is False
+    assert client._connect_attempt_count == 2
+
+
+class FakeWs:
+    def __init__(self, replies=(), connected=True):
+        self.replies = list(replies)
+        self.sent = []
+        self.connected = connected
+
+    def recv(self):
+        return self.replies.pop(0)
+
+    def send(self, payload):
+        self.sent.append(json.loads(payload))
+
+
+def test_identify_uses_the_requested_subscriptions():
+    client = SubscribingObsws(port=4455, event_subscriptions=EVENT_SUBSCRIPTION_ALL | (1 << 17))
+    client.ws = FakeWs([
+        json.dumps({'op': 0, 'd': {'obsWebSocketVersion': '5.1.0'}}),
+        json.dumps({'op': 2, 'd': {'negotiatedRpcVersion': 1}}),
+    ])
+
+    client._auth()
+
+    assert client.ws.sent == [{'op': 1, 'd': {'rpcVersion': 1, 'authentication': '',
+                                              'eventSubscriptions': EVENT_SUBSCRIPTION_ALL | (1 << 17)}}]
+    assert 'send' not in vars(client.ws)
+
+
+def make_connected_client(ws, mask):
+    client = OBSWebSocketClient()
+    client.client = SubscribingObsws(port=4455, event_subscriptions=mask)
+    client.client.ws = ws
+    client._event_subscriptions = mask
+    return client
+
+
+def test_sync_reidentifies_only_when_the_mask_changes(monkeypatch):
+    ws = FakeWs()
+    client = make_connected_client(ws, EVENT_SUBSCRIPTION_ALL)
+    monkeypatch.setattr(obs_event_rules, 'required_subscriptions', lambda: EVENT_SUBSCRIPTION_ALL)
+    client._sync_event_subscriptions()
+    assert ws.sent == []
+
+    monkeypatch.setattr(obs_event_rules, 'required_subscriptions', lambda: EVENT_SUBSCRIPTION_ALL | (1 << 16))
+    client._sync_event_subscriptions()
+    client._sync_event_subscriptions()
+
+    assert ws.sent == [{'op': 3, 'd': {'eventSubscriptions': EVENT_SUBSCRIPTION_ALL | (1 << 16)}}]
+
+
+def test_sync_tolerates_a_closed_or_failing_socket(monkeypatch):
+    monkeypatch.setattr(obs_event_rules, 'required_subscriptions', lambda: EVENT_SUBSCRIPTION_ALL | (1 << 16))
+
+    closed = make_connected_client(FakeWs(connected=False), EVENT_SUBSCRIPTION_ALL)
+    closed._sync_event_subscriptions()
+    assert closed.client.ws.sent == []
+
+    missing = make_connected_client(None, EVENT_SUBSCRIPTION_ALL)
+    missing._sync_event_subscriptions()
+
+    failing = make_connected_client(FakeWs(), EVENT_SUBSCRIPTION_ALL)
+    monkeypatch.setattr(failing.client.ws, 'send', lambda payload: (_ for _ in ()).throw(OSError('broken pipe')))
+    failing._sync_event_subscriptions()
+    assert failing._event_subscriptions == EVENT_SUBSCRIPTION_ALL
@@ -0,0 +1,43 @@
+import json
+
+import pytest
+
+import obs_manager
+from obs_manager import load_obs_instances, validate_instance
+
+
+@pytest.mark.parametrize('entry', [
+    {'name': 'studio'},
+    {'name': 'studio', 'host': '10.0.0.5', 'port': 4456},
+    {'name': 'studio', 'port': '4456'},
+])
+def test_valid_instances(entry):
+    assert validate_instance(entry) is None
+
+
+@pytest.mark.parametrize('entry, message', [
+    ('studio', 'must be an object'),
+    ({'host': 'localhost'}, 'needs a name'),
+    ({'name': 'studio', 'host': ''}, 'needs a host'),
+    ({'name': 'studio', 'port': 'abc'}, 'must be a number'),
+    ({'name': 'studio', 'port': True}, 'must be a number'),
+    ({'name': 'studio', 'port': 70000}, 'between 1 and 65535'),
+    ({'name': 'studio', 'port': 0}, 'between 1 and 65535'),
+])
+def test_invalid_instances(entry, message):
+    assert message in validate_instance(entry)
+
+
+def test_load_skips_invalid_entries(tmp_path, monkeypatch):
+    path = tmp_path / 'obs_instances.json'
+    path.write_text(json.dumps([
+        {'name': 'studio', 'port': '4456'},
+        {'name': 'broken', 'port': 'abc'},
+        {'name': obs_manager.DEFAULT_OBS_INSTANCE},
+    ]))
+    monkeypatch.setattr(obs_manager, 'OBS_INSTANCES_FILE', path)
+
+    instances = load_obs_instances()
+
+    assert list(instances) == ['studio']
+    assert instances['studio']['port'] == 4456
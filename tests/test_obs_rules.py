@@ -0,0 +1,143 @@
+import json
+
+import pytest
+
+import obs_rules
+from obs_rules import OBSEventRules, invalidate_event_rules, validate_rule
+
+
+@pytest.fixture
+def actions(monkeypatch):
+    calls = []
+    monkeypatch.setitem(obs_rules.ACTION_HANDLERS, 'trigger', lambda name: calls.append(('trigger', name)) or True)
+    monkeypatch.setitem(obs_rules.ACTION_HANDLERS, 'queue', lambda name: calls.append(('queue', name)) or True)
+    return calls
+
+
+def make_rules(tmp_path, rules):
+    engine = OBSEventRules(tmp_path / 'obs_event_rules.json')
+    engine.compile(rules)
+    # Pin the fingerprint so handle_event doesn't reload the (missing) file
+    engine._fingerprint = engine._file_fingerprint()
+    return engine
+
+
+def test_compile_skips_invalid_and_disabled_rules(tmp_path):
+    engine = make_rules(tmp_path, [
+        {'event': 'StreamStateChanged', 'animation': 'live.html'},
+        {'event': 'RecordStateChanged'},
+        {'event': 'InputMuteStateChanged', 'animation': 'muted.html', 'enabled': False},
+        {'event': 'StreamStateChanged', 'action': 'explode', 'animation': 'x.html'},
+    ])
+
+    assert engine.event_types() == {'StreamStateChanged'}
+    assert engine.get_stats()['rules'] == 1
+
+
+def test_handle_event_runs_every_matching_rule_in_order(tmp_path, actions):
+    engine = make_rules(tmp_path, [
+        {'event': 'StreamStateChanged', 'when': {'outputState': 'OBS_WEBSOCKET_OUTPUT_STARTED'},
+         'animation': 'live.html'},
+        {'event': 'StreamStateChanged', 'when': {'outputState': 'OBS_WEBSOCKET_OUTPUT_STOPPED'},
+         'animation': 'offline.html'},
+        {'event': 'StreamStateChanged', 'action': 'queue', 'animation': 'log.html'},
+    ])
+
+    ran = engine.handle_event('StreamStateChanged', {'outputState': 'OBS_WEBSOCKET_OUTPUT_STARTED'})
+
+    assert ran == 2
+    assert actions == [('trigger', 'live.html'), ('queue', 'log.html')]
+    assert engine.handle_event('RecordStateChanged', {}) == 0
+
+
+def test_when_accepts_lists_and_dotted_paths(tmp_path, actions):
+    engine = make_rules(tmp_path, [
+        {'event': 'VendorEvent', 'when': {'vendorName': ['ata', 'streamerbot'], 'eventData.kind': 'cheer'},
+         'animation_field': 'eventData.animation'},
+    ])
+
+    engine.handle_event('VendorEvent', {'vendorName': 'ata', 'eventData': {'kind': 'cheer', 'animation': 'confetti.html'}})
+    engine.handle_event('VendorEvent', {'vendorName': 'other', 'eventData': {'kind': 'cheer', 'animation': 'x.html'}})
+    engine.handle_event('VendorEvent', {'vendorName': 'ata', 'eventData': {'kind': 'cheer'}})
+
+    assert actions == [('trigger', 'confetti.html')]
+
+
+def test_instance_scoped_rules(tmp_path, actions):
+    engine = make_rules(tmp_path, [
+        {'event': 'StreamStateChanged', 'instance': 'studio', 'animation': 'studio.html'},
+        {'event': 'StreamStateChanged', 'animation': 'main.html'},
+        {'event': 'StreamStateChanged', 'instance': '*', 'animation': 'any.html'},
+    ])
+
+    engine.handle_event('StreamStateChanged', {})
+    engine.handle_event('StreamStateChanged', {}, instance='studio')
+    engine.handle_event('StreamStateChanged', {}, instance='backup')
+
+    # Unscoped rules follow the main OBS only
+    assert actions == [
+        ('trigger', 'main.html'), ('trigger', 'any.html'),
+        ('trigger', 'studio.html'), ('trigger', 'any.html'),
+        ('trigger', 'any.html'),
+    ]
+
+
+def test_failed_actions_are_counted(tmp_path, monkeypatch):
+    monkeypatch.setitem(obs_rules.ACTION_HANDLERS, 'trigger', lambda name: False)
+    engine = make_rules(tmp_path, [{'event': 'StreamStateChanged', 'animation': 'live.html'}])
+
+    engine.handle_event('StreamStateChanged', {})
+
+    assert engine.stats['matched'] == 1
+    assert engine.stats['failed'] == 1
+
+
+def test_validate_rule_messages():
+    assert validate_rule({'event': 'X', 'animation': 'a.html'}) is None
+    assert 'missing "event"' in validate_rule({'animation': 'a.html'})
+    assert 'Unknown action' in validate_rule({'event': 'X', 'action': 'nope', 'animation': 'a.html'})
+    assert '"when"' in validate_rule({'event': 'X', 'animation': 'a.html', 'when': []})
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_rules_file_is_checked_at_most_once_per_interval(tmp_path, actions, monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(obs_rules.time, 'monotonic', clock)
+    path = tmp_path / 'obs_event_rules.json'
+    path.write_text(json.dumps([{'event': 'StreamStateChanged', 'animation': 'live.html'}]))
+    engine = OBSEventRules(path)
+    checks = []
+    original = engine._file_fingerprint
+    monkeypatch.setattr(engine, '_file_fingerprint', lambda: checks.append(1) or original())
+
+    for _ in range(100):
+        engine.handle_event('InputVolumeMeters', {})
+    assert len(checks) == 1
+    assert not engine.handles('InputVolumeMeters')
+
+    clock.now += obs_rules.RULES_FILE_CHECK_INTERVAL
+    engine.handle_event('StreamStateChanged', {})
+    assert len(checks) == 2
+    assert actions == [('trigger', 'live.html')]
+
+
+def test_invalidate_recompiles_immediately(tmp_path, actions, monkeypatch):
+    monkeypatch.setattr(obs_rules.time, 'monotonic', Clock())
+    path = tmp_path / 'obs_event_rules.json'
+    path.write_text('[]')
+    engine = OBSEventRules(path)
+    assert not engine.handles('RecordStateChanged')
+
+    path.write_text(json.dumps([{'event': 'RecordStateChanged', 'animation': 'rec.html'}]))
+    assert not engine.handles('RecordStateChanged')  # Within the check interval
+    invalidate_event_rules()
+
+    assert engine.handles('RecordStateChanged')
+    assert engine.handle_event('RecordStateChanged', {}) == 1
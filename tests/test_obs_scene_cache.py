@@ -0,0 +1,100 @@
+from types import SimpleNamespace
+
+import pytest
+
+from obs_manager import OBSWebSocketClient
+
+
+def event(**data):
+    return SimpleNamespace(datain=data)
+
+
+class FakeObs:
+    """Answers the scene requests refresh_scene_cache makes and counts them"""
+
+    def __init__(self, current='Gaming', scenes=('Gaming', 'BRB')):
+        self.current = current
+        self.scenes = list(scenes)
+        self.calls = []
+
+    def call(self, request):
+        name = type(request).__name__
+        self.calls.append(name)
+        if name == 'GetCurrentProgramScene':
+            return SimpleNamespace(datain={'currentProgramSceneName': self.current})
+        if name == 'GetSceneList':
+            return SimpleNamespace(getScenes=lambda: [{'sceneName': s} for s in self.scenes])
+        return SimpleNamespace(status=False, datain={})
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr('obs_manager.emit_event', lambda *args, **kwargs: None)
+    client = OBSWebSocketClient()
+    client.client = FakeObs()
+    client.connected = True
+    client.refresh_scene_cache()
+    client.client.calls.clear()
+    return client
+
+
+def test_cache_is_served_without_calling_obs(client):
+    status = client.get_instance_status()
+
+    assert status['current_scene'] == 'Gaming'
+    assert status['scene_list'] == ['Gaming', 'BRB']
+    assert status['stale'] is False
+    assert client.client.calls == []
+
+
+def test_cache_is_stale_until_refreshed_and_while_disconnected():
+    client = OBSWebSocketClient()
+    assert client.get_scene_cache()['stale'] is True
+    assert client.get_scene_cache()['cache_age'] is None
+
+    client.client = FakeObs()
+    client.connected = True
+    client.refresh_scene_cache()
+    client.connected = False
+    cache = client.get_scene_cache()
+
+    assert cache['stale'] is True
+    assert cache['current_scene'] == 'Gaming'
+
+
+def test_scene_list_events_update_the_cache(client):
+    client._on_scene_created(event(sceneName='Intro'))
+    client._on_scene_created(event(sceneName='Intro'))
+    client._on_scene_removed(event(sceneName='BRB'))
+    client._on_scene_renamed(event(oldSceneName='Gaming', sceneName='Game'))
+
+    cache = client.get_scene_cache()
+    assert cache['scene_list'] == ['Game', 'Intro']
+    assert cache['current_scene'] == 'Game'
+    assert client.client.calls == []
+
+
+def test_scene_list_changed_replaces_the_list(client):
+    client._on_scene_list_changed(event(scenes=[{'sceneName': 'A'}, {'sceneIndex': 1}, 'junk']))
+    assert client.get_scene_cache()['scene_list'] == ['A']
+
+    client._on_scene_list_changed(event())
+    assert client.get_scene_cache()['scene_list'] == ['A']
+
+
+def test_rename_without_names_refreshes_from_obs(client):
+    client.client.scenes = ['Gaming', 'Renamed']
+    client._on_scene_renamed(event(sceneName='Renamed'))
+
+    assert client.get_scene_cache()['scene_list'] == ['Gaming', 'Renamed']
+    assert 'GetSceneList' in client.client.calls
+
+
+def test_program_scene_change_updates_the_cached_scene(client, monkeypatch):
+    monkeypatch.setattr('obs_manager._scene_change_handler', None)
+    monkeypatch.setattr(client, '_record_scene', lambda scene_name, dispatched: None)
+
+    client._on_scene_changed(event(sceneName='BRB'))
+
+    assert client.get_scene_cache()['current_scene'] == 'BRB'
+    assert client.client.calls == []
@@ -0,0 +1,297 @@
+import asyncio
+import json
+
+import pytest
+
+import websocket_server
+from websocket_server import RawClientSession, RawWebSocketServer
+
+
+class FakeWebSocket:
+    """Scripted client: yields each message (or runs each callable) then stays open until ``finish``"""
+
+    remote_address = ('127.0.0.1', 50000)
+
+    def __init__(self, script):
+        self.script = list(script)
+        self.sent = []
+        self.closed = None
+        self.finish = asyncio.Event()
+
+    def __aiter__(self):
+        return self._messages()
+
+    async def _messages(self):
+        for item in self.script:
+            if callable(item):
+                item()
+                await settle()
+            else:
+                yield item if isinstance(item, str) else json.dumps(item)
+        await self.finish.wait()
+
+    async def send(self, frame):
+        self.sent.append(json.loads(frame))
+
+    async def close(self, code=1000, reason=''):
+        self.closed = (code, reason)
+
+
+class InlineBridge:
+    """Runs bridged calls and pushes straight away on the test loop"""
+
+    async def call(self, fn, *args):
+        return fn(*args)
+
+    def push(self, callback, *args):
+        callback(*args)
+        return True
+
+
+async def settle(rounds=50):
+    for _ in range(rounds):
+        await asyncio.sleep(0)
+
+
+async def converse(server, script):
+    websocket = FakeWebSocket(script)
+    task = asyncio.ensure_future(server.handle_client(websocket, '/'))
+    await settle()
+    websocket.finish.set()
+    await task
+    await settle()
+    return websocket
+
+
+@pytest.fixture
+def server():
+    server = RawWebSocketServer(port=0)
+    server.bridge = InlineBridge()
+    return server
+
+
+def test_device_subscribers_only_receive_counts(server):
+    delta = {
+        'seq': 4,
+        'changes': [{'op': 'add', 'id': 'sid-123', 'device': {
+            'id': 'sid-123', 'type': 'tv', 'user_agent': 'SmartTV/1.0', 'ip': '192.168.1.50'}}],
+        'counts': {'tv_count': 1, 'admin_count': 0, 'streamerbot_count': 1, 'total_count': 2},
+    }
+    websocket = asyncio.run(converse(server, [
+        {'action': 'subscribe', 'topics': ['device']},
+        lambda: server.on_server_event('device', 'devices_delta', delta),
+    ]))
+
+    subscribed, event = websocket.sent
+    assert set(subscribed['snapshot']['device']) == {'tv_count', 'admin_count', 'streamerbot_count', 'total_count'}
+    assert (event['topic'], event['event']) == ('device', 'devices_delta')
+    assert event['data'] == {'seq': 4, 'counts': delta['counts']}
+    assert 'sid-123' not in json.dumps(websocket.sent)
+
+
+def test_other_topics_are_forwarded_unchanged(server):
+    change = {'previous_animation': 'a.html', 'current_animation': 'b.html'}
+    websocket = asyncio.run(converse(server, [
+        {'action': 'subscribe', 'topics': ['media']},
+        lambda: server.on_server_event('media', 'animation_changed', change),
+        lambda: server.on_server_event('device', 'devices_delta', {'seq': 1, 'counts': {}}),
+    ]))
+
+    events = [frame for frame in websocket.sent if frame.get('type') == 'event']
+    assert [event['data'] for event in events] == [change]
+
+
+def test_get_status_comes_from_the_cached_snapshot(server, monkeypatch):
+    def no_disk_reads():
+        raise AssertionError('get_status must not read state.json')
+
+    monkeypatch.setattr(websocket_server, 'load_state', no_disk_reads)
+    monkeypatch.setattr(websocket_server, 'get_status_snapshot', lambda: ('abc123def456', {
+        'current_animation': 'brb.html', 'media_type': 'html', 'state_version': 'abc123def456'}))
+
+    websocket = asyncio.run(converse(server, [{'action': 'get_status', 'id': 'q1'}]))
+
+    reply, = websocket.sent
+    assert (reply['status'], reply['id']) == ('success', 'q1')
+    assert (reply['current_animation'], reply['media_type'], reply['state_version']) == ('brb.html', 'html', 'abc123def456')
+
+
+class SlowWebSocket(FakeWebSocket):
+    """Client whose sends block until released"""
+
+    def __init__(self):
+        super().__init__([])
+        self.release = asyncio.Event()
+
+    async def send(self, frame):
+        await self.release.wait()
+        self.sent.append(json.loads(frame))
+
+
+def test_outbox_drops_oldest_when_full():
+    async def scenario():
+        session = RawClientSession(FakeWebSocket([]), queue_size=3, overflow_policy='drop_oldest')
+        for n in range(5):
+            assert session.send_frame(json.dumps({'n': n}))
+        session.start_writer()
+        await settle()
+        session.stop_writer()
+        return session
+
+    session = asyncio.run(scenario())
+
+    assert [frame['n'] for frame in session.websocket.sent] == [2, 3, 4]
+    assert (session.stats['dropped'], session.stats['max_queue_depth']) == (2, 3)
+    assert session.websocket.closed is None
+
+
+def test_outbox_disconnects_slow_consumer_on_overflow():
+    async def scenario():
+        session = RawClientSession(SlowWebSocket(), queue_size=2, overflow_policy='disconnect')
+        session.start_writer()
+        results = [session.send_frame(json.dumps({'n': n})) for n in range(4)]
+        await settle()
+        session.stop_writer()
+        return session, results
+
+    session, results = asyncio.run(scenario())
+
+    assert results == [True, True, False, False]
+    assert session.closing
+    assert session.websocket.closed == (1008, 'Send queue overflow')
+    assert session.get_stats()['queue_depth'] == 0
+
+
+def test_stalled_send_disconnects(monkeypatch):
+    monkeypatch.setattr(websocket_server, 'RAW_WS_SEND_TIMEOUT', 0.01)
+
+    async def scenario():
+        session = RawClientSession(SlowWebSocket(), queue_size=8)
+        session.start_writer()
+        session.send({'n': 0})
+        await asyncio.sleep(0.1)
+        await settle()
+        return session
+
+    session = asyncio.run(scenario())
+
+    assert session.websocket.closed == (1011, 'Send timeout')
+
+
+def test_unknown_policy_falls_back_to_drop_oldest():
+    async def scenario():
+        return RawClientSession(FakeWebSocket([]), overflow_policy='explode')
+
+    assert asyncio.run(scenario()).overflow_policy == 'drop_oldest'
+
+
+def test_broadcast_serializes_once_and_queues_per_client(server, monkeypatch):
+    async def scenario():
+        sessions = [RawClientSession(FakeWebSocket([]), queue_size=4) for _ in range(3)]
+        for session in sessions:
+            server.sessions[session.websocket] = session
+        dumps = []
+        original = websocket_server.json.dumps
+        monkeypatch.setattr(websocket_server.json, 'dumps', lambda *a, **k: dumps.append(1) or original(*a, **k))
+        server.broadcast({'type': 'refresh'})
+        monkeypatch.undo()
+        return sessions, dumps
+
+    sessions, dumps = asyncio.run(scenario())
+
+    assert len(dumps) == 1
+    assert all(session.get_stats()['queue_depth'] == 1 for session in sessions)
+
+
+HELLO_V2 = {'action': 'hello', 'protocol': 2}
+
+
+def test_hello_negotiates_protocol_v2(server):
+    websocket = asyncio.run(converse(server, [{'action': 'hello', 'protocol': 3}, HELLO_V2]))
+
+    rejected, accepted = websocket.sent
+    assert rejected['status'] == 'error'
+    assert (accepted['status'], accepted['protocol']) == ('success', 2)
+    assert accepted['capabilities']['max_batch_size'] == websocket_server.MAX_BATCH_SIZE
+    assert accepted['capabilities']['max_in_flight'] == websocket_server.MAX_IN_FLIGHT_PER_CLIENT
+
+
+def test_v1_rejects_batches(server):
+    websocket = asyncio.run(converse(server, [[{'action': 'unsubscribe'}]]))
+
+    reply, = websocket.sent
+    assert 'require protocol v2' in reply['message']
+
+
+def test_batch_replies_carry_request_ids(server):
+    websocket = asyncio.run(converse(server, [
+        HELLO_V2,
+        [{'action': 'unsubscribe', 'id': 'a'}, {'action': 'bogus', 'id': 'b'}, 'junk'],
+    ]))
+
+    replies = {reply.get('id'): reply for reply in websocket.sent[1:]}
+    assert (replies['a']['action'], replies['a']['status']) == ('unsubscribe', 'success')
+    assert (replies['b']['action'], replies['b']['status']) == ('bogus', 'error')
+    assert replies[None]['message'] == 'Action must be a JSON object'
+
+
+def test_oversized_batch_is_rejected_whole(server):
+    batch = [{'action': 'unsubscribe', 'id': n} for n in range(websocket_server.MAX_BATCH_SIZE + 1)]
+    websocket = asyncio.run(converse(server, [HELLO_V2, batch]))
+
+    reply, = websocket.sent[1:]
+    assert reply['message'] == 'Batch too large (33 actions, max 32)'
+
+
+def test_malformed_frame_gets_an_error_and_the_connection_stays_open(server):
+    websocket = asyncio.run(converse(server, [
+        '{"action": "hello"',
+        HELLO_V2,
+        'not json',
+        {'action': 'unsubscribe', 'id': 'after'},
+    ]))
+
+    errors = [reply for reply in websocket.sent if reply.get('message') == 'Invalid JSON format']
+    assert len(errors) == 2
+    assert websocket.sent[-1]['id'] == 'after'
+    assert websocket.closed is None
+
+
+class GatedBridge:
+    """Bridged calls block until ``gate`` opens; counts how many have started"""
+
+    def __init__(self):
+        self.gate = asyncio.Event()
+        self.started = 0
+
+    async def call(self, fn, *args):
+        self.started += 1
+        await self.gate.wait()
+        return {'status': 'success'}
+
+
+def test_in_flight_requests_are_capped_per_client(server):
+    batch_size = websocket_server.MAX_BATCH_SIZE
+
+    async def scenario():
+        server.bridge = GatedBridge()
+        frames = [[{'action': 'get_status', 'id': frame * batch_size + n} for n in range(batch_size)]
+                  for frame in range(3)]
+        websocket = FakeWebSocket([HELLO_V2] + frames)
+        task = asyncio.ensure_future(server.handle_client(websocket, '/'))
+        await settle()
+        started_while_gated = server.bridge.started
+
+        server.bridge.gate.set()
+        for _ in range(50):
+            if len(websocket.sent) > 3 * batch_size:  # hello + every reply written
+                break
+            await settle()
+        websocket.finish.set()
+        await task
+        return websocket, started_while_gated
+
+    websocket, started_while_gated = asyncio.run(scenario())
+
+    assert started_while_gated == websocket_server.MAX_IN_FLIGHT_PER_CLIENT
+    assert sorted(reply['id'] for reply in websocket.sent[1:]) == list(range(3 * batch_size))
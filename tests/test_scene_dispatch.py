@@ -0,0 +1,69 @@
+import json
+import os
+
+import pytest
+
+from scene_watcher import OBSSceneWatcher
+
+
+@pytest.fixture
+def watcher(tmp_path, monkeypatch):
+    mappings = tmp_path / 'obs_mappings.json'
+    mappings.write_text(json.dumps([
+        {'sceneName': 'Gaming', 'animation': 'particles.html'},
+        {'sceneName': 'BRB', 'animation': 'brb.html', 'instance': '*'},
+    ]))
+    watcher = OBSSceneWatcher(tmp_path / 'obs_current_scene.json', mappings)
+    watcher.triggered = []
+    monkeypatch.setattr(watcher, '_trigger_animation',
+                        lambda animation, scene: watcher.triggered.append((animation, scene)))
+    return watcher
+
+
+def write_scene(watcher, scene, **extra):
+    watcher.scene_file_path.write_text(json.dumps({'current_scene': scene, **extra}))
+    # Distinct mtimes even on coarse-grained filesystems
+    mtime = (watcher.last_modified or 1_000_000) + 1
+    os.utime(watcher.scene_file_path, (mtime, mtime))
+
+
+def test_dispatch_triggers_once_per_scene_change(watcher):
+    watcher.dispatch_scene('Gaming')
+    watcher.dispatch_scene('Gaming')
+    watcher.dispatch_scene('Chatting')
+    watcher.dispatch_scene('Gaming')
+
+    assert watcher.triggered == [('particles.html', 'Gaming'), ('particles.html', 'Gaming')]
+    assert watcher.last_scene == 'Gaming'
+
+
+def test_instances_track_their_own_scene(watcher):
+    watcher.dispatch_scene('BRB')
+    watcher.dispatch_scene('BRB', instance='backup')
+    watcher.dispatch_scene('BRB', instance='backup')
+
+    assert watcher.triggered == [('brb.html', 'BRB'), ('brb.html', 'BRB')]
+    assert (watcher.last_scene, watcher.instance_scenes) == ('BRB', {'backup': 'BRB'})
+
+
+def test_scene_file_skips_already_dispatched_records(watcher):
+    watcher.dispatch_scene('Gaming')
+    write_scene(watcher, 'Gaming', dispatched=True)
+    watcher._check_scene_file()
+
+    write_scene(watcher, 'BRB', dispatched=True)
+    watcher._check_scene_file()
+
+    assert watcher.triggered == [('particles.html', 'Gaming')]
+    assert watcher.last_scene == 'Gaming'
+
+
+def test_scene_file_written_by_other_tools_still_triggers(watcher):
+    write_scene(watcher, 'BRB')
+    watcher._check_scene_file()
+    watcher._check_scene_file()  # unchanged mtime: not read again
+
+    write_scene(watcher, 'BRB')  # same scene rewritten
+    watcher._check_scene_file()
+
+    assert watcher.triggered == [('brb.html', 'BRB')]
@@ -0,0 +1,135 @@
+import json
+
+import pytest
+
+from scene_mappings import SceneMappingIndex, invalidate_scene_mappings, validate_mapping
+
+
+def make_index(tmp_path, mappings):
+    path = tmp_path / 'obs_mappings.json'
+    path.write_text(json.dumps({'mappings': mappings}))
+    return SceneMappingIndex(path)
+
+
+def test_exact_pattern_and_default_resolution(tmp_path):
+    index = make_index(tmp_path, [
+        {'sceneName': 'Gaming', 'animation': 'particles.html'},
+        {'sceneName': 'Gaming', 'animation': 'ignored.html'},
+        {'sceneName': 'BRB*', 'match': 'glob', 'animation': 'brb.html'},
+        {'sceneName': r'Cam \d+', 'match': 'regex', 'animation': 'cam.html'},
+        {'match': 'default', 'animation': 'idle.html'},
+    ])
+
+    assert index.lookup('Gaming') == ('particles.html', 'exact')
+    assert index.lookup('BRB - short') == ('brb.html', 'BRB*')
+    assert index.lookup('Cam 2') == ('cam.html', r'Cam \d+')
+    assert index.lookup('Cam 2 wide') == ('idle.html', 'default')
+
+
+def test_pattern_priority_then_file_order(tmp_path):
+    index = make_index(tmp_path, [
+        {'sceneName': '*', 'match': 'glob', 'animation': 'catch_all.html'},
+        {'sceneName': 'Intro*', 'match': 'glob', 'animation': 'intro.html', 'priority': 10},
+    ])
+
+    assert index.lookup('Intro 1') == ('intro.html', 'Intro*')
+    assert index.lookup('Outro') == ('catch_all.html', '*')
+
+
+def test_instance_scoped_mappings_win(tmp_path):
+    index = make_index(tmp_path, [
+        {'sceneName': 'Gaming', 'animation': 'shared.html', 'instance': '*'},
+        {'sceneName': 'Gaming', 'animation': 'studio.html', 'instance': 'studio'},
+        {'match': 'default', 'animation': 'idle.html', 'instance': '*'},
+        {'match': 'default', 'animation': 'studio_idle.html', 'instance': 'studio'},
+    ])
+
+    assert index.lookup('Gaming') == ('shared.html', 'exact')
+    assert index.lookup('Gaming', instance='studio') == ('studio.html', 'exact')
+    assert index.lookup('Other') == ('idle.html', 'default')
+    assert index.lookup('Other', instance='studio') == ('studio_idle.html', 'default')
+
+
+def test_unscoped_mappings_follow_the_main_instance_only(tmp_path):
+    index = make_index(tmp_path, [
+        {'sceneName': 'Gaming', 'animation': 'particles.html'},
+        {'sceneName': 'BRB*', 'match': 'glob', 'animation': 'brb.html'},
+        {'match': 'default', 'animation': 'idle.html'},
+    ])
+
+    assert index.lookup('Gaming') == ('particles.html', 'exact')
+    assert index.lookup('Gaming', instance='backup') == (None, None)
+    assert index.lookup('BRB 1', instance='backup') == (None, None)
+    assert index.lookup('Other', instance='backup') == (None, None)
+
+
+def test_scoped_pattern_rules_win_over_higher_priority_general_ones(tmp_path):
+    index = make_index(tmp_path, [
+        {'sceneName': 'Cam*', 'match': 'glob', 'animation': 'general.html', 'instance': '*', 'priority': 50},
+        {'sceneName': 'Cam*', 'match': 'glob', 'animation': 'studio.html', 'instance': 'studio'},
+    ])
+
+    assert index.lookup('Cam 1', instance='studio') == ('studio.html', 'Cam*')
+    assert index.lookup('Cam 1', instance='backup') == ('general.html', 'Cam*')
+    assert index.lookup('Cam 1') == ('general.html', 'Cam*')
+
+
+def test_no_match_without_default(tmp_path):
+    index = make_index(tmp_path, [{'sceneName': 'Gaming', 'animation': 'particles.html'}])
+
+    assert index.lookup('Chatting') == (None, None)
+
+
+def test_invalidate_forces_recompile(tmp_path):
+    index = make_index(tmp_path, [{'sceneName': 'Gaming', 'animation': 'particles.html'}])
+    index.lookup('Gaming')
+    index.lookup('Gaming')
+    assert index.compile_count == 1
+
+    invalidate_scene_mappings()
+    index.lookup('Gaming')
+
+    assert index.compile_count == 2
+
+
+@pytest.mark.parametrize('mapping, message', [
+    ({'sceneName': 'x'}, 'Invalid mapping structure'),
+    ({'sceneName': 'x', 'animation': 'a.html', 'match': 'fuzzy'}, 'Unknown match type'),
+    ({'sceneName': '(', 'animation': 'a.html', 'match': 'regex'}, 'Invalid regex'),
+    ({'sceneName': 'x', 'animation': 'a.html', 'priority': 'high'}, 'Invalid priority'),
+])
+def test_validate_mapping_errors(mapping, message):
+    assert message in validate_mapping(mapping)
+
+
+@pytest.mark.parametrize('mapping', [
+    {'sceneName': 5, 'match': 'glob', 'animation': 'a.html'},
+    {'sceneName': None, 'match': 'regex', 'animation': 'a.html'},
+    {'sceneName': 'x', 'animation': 'a.html', 'instance': 3},
+])
+def test_validate_mapping_rejects_non_string_fields(mapping):
+    assert validate_mapping(mapping) is not None
+
+
+def test_bad_entry_does_not_break_the_index(tmp_path):
+    index = make_index(tmp_path, [
+        {'sceneName': 7, 'match': 'glob', 'animation': 'bad.html'},
+        {'sceneName': '(', 'match': 'regex', 'animation': 'bad.html'},
+        {'sceneName': 'Gaming', 'animation': 'particles.html'},
+    ])
+
+    assert index.lookup('Gaming') == ('particles.html', 'exact')
+
+
+def test_failed_compile_is_retried(tmp_path, monkeypatch):
+    index = make_index(tmp_path, [{'sceneName': 'Gaming', 'animation': 'particles.html'}])
+    original = SceneMappingIndex.compile
+
+    def broken(self, mappings):
+        raise TypeError('boom')
+
+    monkeypatch.setattr(SceneMappingIndex, 'compile', broken)
+    assert index.lookup('Gaming') == (None, None)
+
+    monkeypatch.setattr(SceneMappingIndex, 'compile', original)
+    assert index.lookup('Gaming') == ('particles.html', 'exact')
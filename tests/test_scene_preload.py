@@ -0,0 +1,107 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+import scene_watcher
+from config import DEFAULT_OBS_INSTANCE
+from device_tracking import TV_ROOM
+from obs_manager import OBSWebSocketClient
+from scene_watcher import OBSSceneWatcher
+
+
+@pytest.fixture
+def emitted(monkeypatch):
+    emitted = []
+    monkeypatch.setattr(scene_watcher.socketio, 'emit',
+                        lambda event, data, room=None: emitted.append((event, data, room)))
+    monkeypatch.setattr(scene_watcher, 'load_state', lambda: {'current_animation': 'live.html'})
+    monkeypatch.setattr(scene_watcher, 'find_media_file',
+                        lambda name: (None, None) if name == 'missing.mp4'
+                        else (f'/media/{name}', 'video' if name.endswith('.mp4') else 'html'))
+    return emitted
+
+
+@pytest.fixture
+def watcher(tmp_path):
+    mappings = tmp_path / 'obs_mappings.json'
+    mappings.write_text(json.dumps([
+        {'sceneName': 'BRB', 'animation': 'brb.mp4'},
+        {'sceneName': 'Gaming', 'animation': 'particles.html'},
+        {'sceneName': 'Live', 'animation': 'live.html'},
+        {'sceneName': 'Broken', 'animation': 'missing.mp4'},
+    ]))
+    return OBSSceneWatcher(tmp_path / 'obs_current_scene.json', mappings)
+
+
+def test_preload_announces_the_mapped_media_to_tvs(watcher, emitted):
+    assert watcher.preload_scene('BRB', reason='transition') == 'brb.mp4'
+
+    assert emitted == [('media_preload', {
+        'animation': 'brb.mp4', 'media_type': 'video', 'url': '/videos/brb.mp4',
+        'scene_name': 'BRB', 'reason': 'transition',
+    }, TV_ROOM)]
+
+
+def test_repeat_preloads_are_suppressed(watcher, emitted):
+    watcher.preload_scene('BRB', reason='preview')
+    assert watcher.preload_scene('BRB', reason='transition') is None
+
+    # A different target is announced, and the window expires for the old one
+    assert watcher.preload_scene('Gaming') == 'particles.html'
+    watcher.last_preload = ('brb.mp4', watcher.last_preload[1] - scene_watcher.PRELOAD_REPEAT_SECONDS)
+    assert watcher.preload_scene('BRB') == 'brb.mp4'
+    assert [data['animation'] for _, data, _ in emitted] == ['brb.mp4', 'particles.html', 'brb.mp4']
+
+
+@pytest.mark.parametrize('scene', ['Live', 'Unmapped', 'Broken'])
+def test_nothing_to_preload(watcher, emitted, scene):
+    assert watcher.preload_scene(scene) is None
+    assert emitted == []
+
+
+def event(**data):
+    return SimpleNamespace(datain=data)
+
+
+@pytest.fixture
+def preloads(monkeypatch):
+    preloads = []
+    monkeypatch.setattr('obs_manager._scene_preload_handler',
+                        lambda scene, instance, reason: preloads.append((scene, instance, reason)))
+    return preloads
+
+
+def test_preview_and_transition_preload_the_next_scene(preloads):
+    client = OBSWebSocketClient()
+    client._cached_scene = 'Live'
+
+    client._on_preview_scene_changed(event(sceneName='BRB'))
+    client._on_transition_started(event())
+
+    assert preloads == [('BRB', DEFAULT_OBS_INSTANCE, 'preview'),
+                        ('BRB', DEFAULT_OBS_INSTANCE, 'transition')]
+
+
+def test_no_preload_for_the_current_scene_or_outside_studio_mode(preloads):
+    client = OBSWebSocketClient()
+    client._cached_scene = 'Live'
+
+    client._on_preview_scene_changed(event(sceneName='Live'))
+    client._on_studio_mode_changed(event(studioModeEnabled=False))
+    client._on_transition_started(event())
+
+    assert preloads == []
+    assert client._cached_preview_scene is None
+
+
+def test_preload_handler_errors_are_contained(monkeypatch):
+    def failing(scene, instance, reason):
+        raise RuntimeError('boom')
+
+    monkeypatch.setattr('obs_manager._scene_preload_handler', failing)
+    client = OBSWebSocketClient()
+
+    client._on_preview_scene_changed(event(sceneName='BRB'))
+
+    assert client._cached_preview_scene == 'BRB'
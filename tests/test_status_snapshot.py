@@ -0,0 +1,102 @@
+import json
+import os
+
+import pytest
+
+import media_manager
+from media_manager import get_status_snapshot, invalidate_status_snapshot, save_state
+
+
+@pytest.fixture
+def media(tmp_path, monkeypatch):
+    animations, videos = tmp_path / 'animations', tmp_path / 'videos'
+    animations.mkdir()
+    videos.mkdir()
+    (animations / 'brb.html').write_text('<html></html>')
+    (videos / 'intro.mp4').write_bytes(b'video')
+    monkeypatch.setattr(media_manager, 'STATE_FILE', tmp_path / 'state.json')
+    monkeypatch.setattr(media_manager, 'ANIMATIONS_DIR', animations)
+    monkeypatch.setattr(media_manager, 'VIDEOS_DIR', videos)
+    monkeypatch.setattr(media_manager, '_status_snapshot', None)
+    save_state({'current_animation': 'brb.html'})
+
+    builds = []
+    original = media_manager._build_status_payload
+    monkeypatch.setattr(media_manager, '_build_status_payload', lambda: builds.append(1) or original())
+    return tmp_path, builds
+
+
+def bump_mtime(path):
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_snapshot_is_reused_until_something_changes(media):
+    _, builds = media
+    version, payload = get_status_snapshot()
+    for _ in range(10):
+        assert get_status_snapshot() == (version, payload)
+
+    assert len(builds) == 1
+    assert payload['current_animation'] == 'brb.html'
+    assert payload['available_media'] == ['brb.html', 'intro.mp4']
+    assert payload['state_version'] == version
+
+
+def test_save_state_invalidates(media):
+    version, _ = get_status_snapshot()
+
+    save_state({'current_animation': 'intro.mp4'})
+    new_version, payload = get_status_snapshot()
+
+    assert new_version != version
+    assert (payload['current_animation'], payload['media_type']) == ('intro.mp4', 'video')
+
+
+def test_media_catalog_changes_rebuild(media):
+    tmp_path, _ = media
+    version, _ = get_status_snapshot()
+
+    (tmp_path / 'animations' / 'party.html').write_text('<html></html>')
+    bump_mtime(tmp_path / 'animations')
+    new_version, payload = get_status_snapshot()
+
+    assert new_version != version
+    assert 'party.html' in payload['available_animations']
+
+
+def test_write_by_another_process_is_noticed(media):
+    tmp_path, _ = media
+    get_status_snapshot()
+
+    state_file = tmp_path / 'state.json'
+    state_file.write_text(json.dumps({'current_animation': 'intro.mp4'}))
+    bump_mtime(state_file)
+
+    assert get_status_snapshot()[1]['current_animation'] == 'intro.mp4'
+
+
+def test_version_only_depends_on_content(media):
+    _, builds = media
+    version, _ = get_status_snapshot()
+
+    invalidate_status_snapshot()
+
+    assert get_status_snapshot()[0] == version
+    assert len(builds) == 2
+
+
+def test_heartbeat_only_resends_stale_status(media):
+    import websocket_handlers  # noqa: F401 — registers the Socket.IO handlers
+    from extensions import app, socketio
+
+    client = socketio.test_client(app)
+    try:
+        version, _ = get_status_snapshot()
+        assert client.emit('status_heartbeat', {'version': version}, callback=True) == {'version': version}
+
+        stale = client.emit('status_heartbeat', {'version': 'old'}, callback=True)
+        assert stale['version'] == version
+        assert stale['status']['current_animation'] == 'brb.html'
+    finally:
+        client.disconnect()
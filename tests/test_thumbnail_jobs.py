@@ -0,0 +1,142 @@
+import eventlet
+import pytest
+
+from thumbnail_jobs import (JOB_CANCELLED, JOB_DONE, JOB_QUEUED, JOB_RUNNING, JOB_SKIPPED, KIND_VIDEO,
+                            STAGE_PREVIEW, STAGE_THUMBNAIL, ThumbnailJobEngine)
+
+
+class FakeService:
+    def __init__(self, up_to_date=()):
+        self.up_to_date = set(up_to_date)
+        self.calls = []
+
+    def content_hash(self, filename, path):
+        self.calls.append(('hash', filename))
+
+    def thumbnail_exists(self, filename, path):
+        self.calls.append(('exists', filename))
+        return filename in self.up_to_date
+
+    def preview_exists(self, filename, path):
+        return filename in self.up_to_date
+
+    def generate_video_thumbnail(self, filename, path):
+        self.calls.append(('generate', filename))
+        return True
+
+    def generate_preview(self, filename, path, clip_path=None):
+        self.calls.append(('preview', filename))
+        return True
+
+    def has_variants(self, filename):
+        return True
+
+    async def generate_html_thumbnail(self, filename, path):
+        self.calls.append(('generate', filename))
+        return True
+
+    async def record_html_clip(self, filename, path):
+        self.calls.append(('record', filename))
+        self.clip_path.write_bytes(b'webm')
+        return self.clip_path
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    monkeypatch.setattr(eventlet.tpool, 'execute', lambda func, *args: func(*args))
+    monkeypatch.setattr(ThumbnailJobEngine, '_emit', lambda self, job: None)
+    return ThumbnailJobEngine(FakeService(up_to_date={'old.mp4'}), video_workers=1)
+
+
+def run_pending(engine):
+    # Drain the spawned green threads
+    for _ in range(20):
+        eventlet.sleep(0)
+
+
+def test_submit_does_not_touch_the_service(engine):
+    job = engine.submit('old.mp4', '/media/old.mp4')
+
+    assert engine.service.calls == []
+    assert job.state in (JOB_QUEUED, JOB_RUNNING)
+
+
+def test_up_to_date_check_runs_after_hash(engine):
+    job = engine.submit('old.mp4', '/media/old.mp4')
+    run_pending(engine)
+
+    assert job.state == JOB_SKIPPED
+    assert engine.service.calls[:2] == [('hash', 'old.mp4'), ('exists', 'old.mp4')]
+    assert ('generate', 'old.mp4') not in engine.service.calls
+    assert ('preview', 'old.mp4') not in engine.service.calls
+
+
+def test_batch_counts_skipped_and_generated(engine):
+    batch_id = next(engine._batch_ids)
+    engine._batches[batch_id] = {
+        'id': batch_id, 'total': 0, 'done': 0, 'failed': 0, 'skipped': 0, 'cancelled': 0,
+        'started': 0, 'finished': None,
+    }
+    new = engine.submit('new.mp4', '/media/new.mp4', batch_id)
+    old = engine.submit('old.mp4', '/media/old.mp4', batch_id)
+    run_pending(engine)
+
+    batch = engine._batches[batch_id]
+    assert (new.state, old.state) == (JOB_DONE, JOB_SKIPPED)
+    assert (batch['done'], batch['skipped'], batch['total']) == (1, 1, 2)
+    assert batch['finished'] is not None
+    assert ('preview', 'new.mp4') in engine.service.calls
+    assert not engine._active
+    assert {job.stage for job in engine._finished} == {STAGE_THUMBNAIL, STAGE_PREVIEW}
+
+
+def test_previews_wait_for_queued_thumbnails(engine):
+    for name in ('a.mp4', 'b.mp4', 'c.mp4'):
+        engine.submit(name, f'/media/{name}')
+    run_pending(engine)
+
+    assert [call for call in engine.service.calls if call[0] in ('generate', 'preview')] == [
+        ('generate', 'a.mp4'), ('generate', 'b.mp4'), ('generate', 'c.mp4'),
+        ('preview', 'a.mp4'), ('preview', 'b.mp4'), ('preview', 'c.mp4'),
+    ]
+
+
+def test_failed_thumbnail_gets_no_preview(engine, monkeypatch):
+    monkeypatch.setattr(engine.service, 'generate_video_thumbnail', lambda filename, path: False)
+    engine.submit('new.mp4', '/media/new.mp4')
+    run_pending(engine)
+
+    assert all(job.stage == STAGE_THUMBNAIL for job in engine._finished)
+
+
+def test_previews_do_not_count_towards_batches(engine, tmp_path):
+    videos = tmp_path / 'videos'
+    videos.mkdir()
+    (videos / 'new.mp4').write_bytes(b'')
+    batch = engine.submit_all(tmp_path / 'animations', videos)
+    run_pending(engine)
+
+    assert engine._batches[batch['id']]['total'] == 1
+    preview, = [job for job in engine._finished if job.stage == STAGE_PREVIEW]
+    assert preview.batch_id is None
+
+
+def test_queued_previews_are_deduplicated_and_cancellable(engine):
+    engine._running[KIND_VIDEO] = engine.limits[KIND_VIDEO]  # keep everything queued
+    first = engine.submit_preview('new.mp4', '/media/new.mp4')
+
+    assert engine.submit_preview('new.mp4', '/media/new.mp4') is first
+    assert engine.get_status()['queued_previews'][KIND_VIDEO] == 1
+    assert engine.cancel() == 1
+    assert first.state == JOB_CANCELLED
+    assert ('preview', 'new.mp4') not in engine._active
+
+
+def test_html_preview_records_a_clip_and_removes_it(engine, tmp_path):
+    engine.service.clip_path = tmp_path / 'clip.webm'
+    job = engine.submit_preview('intro.html', tmp_path / 'intro.html')
+    run_pending(engine)
+
+    assert job.state == JOB_DONE
+    assert engine.service.calls[-2:] == [('record', 'intro.html'), ('preview', 'intro.html')]
+    assert not engine.service.clip_path.exists()
@@ -0,0 +1,97 @@
+import shutil
+from pathlib import Path
+
+import pytest
+
+from thumbnail_service import ThumbnailService
+
+PNG_640 = b'\x89PNG\r\n\x1a\n' + b'\x00\x00\x00\rIHDR' + (640).to_bytes(4, 'big') + (360).to_bytes(4, 'big')
+
+
+@pytest.fixture
+def media(tmp_path):
+    videos = tmp_path / 'videos'
+    animations = tmp_path / 'animations'
+    videos.mkdir()
+    animations.mkdir()
+    (videos / 'intro.mp4').write_bytes(b'same content')
+    shutil.copy(videos / 'intro.mp4', videos / 'intro copy.mp4')
+    (videos / 'outro.ogg').write_bytes(b'other content')
+    (animations / 'brb.HTML').write_bytes(b'<html></html>')
+    return animations, videos
+
+
+@pytest.fixture
+def service(tmp_path):
+    return ThumbnailService(thumbnails_dir=str(tmp_path / 'thumbnails'))
+
+
+def make_thumbnail(service, filename, path):
+    content_hash = service.content_hash(filename, path)
+    service._hashed_path(content_hash).write_bytes(PNG_640)
+    service._record_thumbnail(filename, content_hash)
+    return content_hash
+
+
+def test_duplicate_content_reuses_the_thumbnail(service, media):
+    _, videos = media
+    content_hash = make_thumbnail(service, 'intro.mp4', videos / 'intro.mp4')
+
+    # No FFmpeg here: the copy must be served from the existing master
+    assert service.generate_video_thumbnail('intro copy.mp4', videos / 'intro copy.mp4')
+    assert service.content_hash('intro copy.mp4', videos / 'intro copy.mp4') == content_hash
+    assert service.thumbnail_exists('intro copy.mp4', videos / 'intro copy.mp4')
+
+    # The shared master outlives one of its two files
+    service.forget('intro.mp4')
+    assert service._hashed_path(content_hash).exists()
+    service.forget('intro copy.mp4')
+    assert not service._hashed_path(content_hash).exists()
+
+
+def test_manifest_survives_a_restart(service, media, tmp_path):
+    _, videos = media
+    make_thumbnail(service, 'intro.mp4', videos / 'intro.mp4')
+
+    reloaded = ThumbnailService(thumbnails_dir=str(tmp_path / 'thumbnails'))
+
+    assert reloaded.thumbnail_exists('intro.mp4', videos / 'intro.mp4')
+
+
+def test_cleanup_removes_orphans_only(service, media):
+    animations, videos = media
+    live = {
+        'intro.mp4': make_thumbnail(service, 'intro.mp4', videos / 'intro.mp4'),
+        'outro.ogg': make_thumbnail(service, 'outro.ogg', videos / 'outro.ogg'),
+        'brb.HTML': make_thumbnail(service, 'brb.HTML', animations / 'brb.HTML'),
+    }
+    (videos / 'gone.mp4').write_bytes(b'deleted later')
+    gone = make_thumbnail(service, 'gone.mp4', videos / 'gone.mp4')
+    (videos / 'gone.mp4').unlink()
+    stray = service.thumbnails_dir / ('f' * 32 + '-320.webp')
+    stray.write_bytes(b'x')
+
+    cleaned = service.cleanup_orphaned_thumbnails(animations, videos)
+
+    assert cleaned == 2
+    assert 'gone.mp4' not in service._files
+    assert not service._hashed_path(gone).exists() and not stray.exists()
+    # .ogg is only listed in config.VIDEO_EXTENSIONS; suffixes match case-insensitively
+    for filename, content_hash in live.items():
+        assert service._hashed_path(content_hash).exists(), filename
+
+
+def test_cleanup_deletes_under_the_manifest_lock(service, media, monkeypatch):
+    animations, videos = media
+    (service.thumbnails_dir / ('e' * 32 + '.png')).write_bytes(PNG_640)
+    held = []
+    original_unlink = Path.unlink
+
+    def unlink(path, *args, **kwargs):
+        held.append(service._manifest_lock.locked())
+        return original_unlink(path, *args, **kwargs)
+
+    monkeypatch.setattr(Path, 'unlink', unlink)
+    service.cleanup_orphaned_thumbnails(animations, videos)
+
+    assert held == [True]
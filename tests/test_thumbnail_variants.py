@@ -0,0 +1,47 @@
+import pytest
+
+from thumbnail_service import ThumbnailService
+
+HASH = 'a' * 32
+
+
+@pytest.fixture
+def service(tmp_path):
+    service = ThumbnailService(thumbnails_dir=str(tmp_path))
+    variants = [{'file': f"{HASH}.png", 'format': 'png', 'width': 640}]
+    for width in (160, 320):
+        for fmt in ('webp', 'png'):
+            variants.append({'file': f"{HASH}-{width}.{fmt}", 'format': fmt, 'width': width})
+    for variant in variants:
+        (tmp_path / variant['file']).write_bytes(b'x')
+    service._files['clip.mp4'] = {'hash': HASH, 'variants': variants}
+    return service
+
+
+def test_smallest_variant_at_least_as_wide(service):
+    variant = service.select_variant('clip.mp4', width=200, accept='image/webp,*/*')
+
+    assert (variant['width'], variant['format'], variant['mimetype']) == (320, 'webp', 'image/webp')
+
+
+def test_png_without_webp_support(service):
+    variant = service.select_variant('clip.mp4', width=100)
+
+    assert (variant['width'], variant['format']) == (160, 'png')
+
+
+def test_largest_variant_when_none_is_wide_enough(service):
+    assert service.select_variant('clip.mp4', width=2000)['file'] == f"{HASH}.png"
+    assert service.select_variant('clip.mp4')['width'] == 640
+
+
+def test_missing_files_are_ignored(service, tmp_path):
+    (tmp_path / f"{HASH}-320.webp").unlink()
+
+    variant = service.select_variant('clip.mp4', width=200, accept='image/webp')
+
+    assert (variant['width'], variant['format']) == (320, 'png')
+
+
+def test_unknown_file(service):
+    assert service.select_variant('nope.mp4') is None
@@ -0,0 +1,75 @@
+import os
+
+import pytest
+
+import scene_watcher
+from scene_watcher import TriggerSpoolWatcher, enqueue_spool_trigger
+
+
+@pytest.fixture
+def applied(monkeypatch):
+    calls = []
+    known = {'a.html', 'b.html', 'c.html'}
+    monkeypatch.setattr(scene_watcher, 'find_media_file',
+                        lambda name: ('/media/' + name, 'html') if name in known else (None, None))
+    monkeypatch.setattr(scene_watcher, 'apply_file_trigger',
+                        lambda name, reason: calls.append(name) or True)
+    monkeypatch.setattr(scene_watcher, 'publish_event', lambda *args, **kwargs: None)
+    return calls
+
+
+def make_watcher(tmp_path, **kwargs):
+    watcher = TriggerSpoolWatcher(tmp_path / 'triggers', **kwargs)
+    for directory in (watcher.spool_dir, watcher.done_dir, watcher.failed_dir):
+        directory.mkdir(parents=True, exist_ok=True)
+    return watcher
+
+
+def test_every_trigger_applied_in_order(tmp_path, applied):
+    watcher = make_watcher(tmp_path)
+    for name in ('a.html', 'b.html', 'a.html', 'c.html'):
+        enqueue_spool_trigger(watcher.spool_dir, name)
+
+    watcher._process_pending()
+
+    assert applied == ['a.html', 'b.html', 'a.html', 'c.html']
+    assert len(os.listdir(watcher.done_dir)) == 4
+    assert watcher.get_stats()['pending'] == 0
+    assert watcher.stats['applied'] == 4
+
+
+def test_unknown_media_is_acknowledged_as_failed(tmp_path, applied):
+    watcher = make_watcher(tmp_path)
+    enqueue_spool_trigger(watcher.spool_dir, 'missing.html')
+    enqueue_spool_trigger(watcher.spool_dir, 'b.html')
+
+    watcher._process_pending()
+
+    assert applied == ['b.html']
+    assert len(os.listdir(watcher.failed_dir)) == 1
+    assert len(os.listdir(watcher.done_dir)) == 1
+
+
+def test_coalesce_applies_only_last_valid_trigger(tmp_path, applied):
+    watcher = make_watcher(tmp_path, coalesce=True)
+    for name in ('a.html', 'b.html', 'missing.html'):
+        enqueue_spool_trigger(watcher.spool_dir, name)
+
+    watcher._process_pending()
+
+    assert applied == ['b.html']
+    assert watcher.stats['superseded'] == 1
+    assert watcher.stats['failed'] == 1
+
+
+def test_interrupted_claims_are_requeued(tmp_path, applied, monkeypatch):
+    watcher = make_watcher(tmp_path)
+    path = enqueue_spool_trigger(watcher.spool_dir, 'a.html')
+    watcher._claim(path.name)  # crash after claiming
+    assert watcher._pending_names() == []
+
+    monkeypatch.setattr(scene_watcher, 'Thread', lambda **kwargs: type('T', (), {'start': lambda self: None})())
+    watcher.start_watching()
+    watcher._process_pending()
+
+    assert applied == ['a.html']
@@ -0,0 +1,334 @@
+"""
+Angels-TV-Animator: Thumbnail job engine.
+Deduplicated thumbnail and hover-preview jobs on two bounded worker pools
+(ffmpeg sized to the CPU count, HTML renders sized to the browser pool) with
+cancellation and per-job progress pushed to admin dashboards over Socket.IO.
+"""
+
+import asyncio
+import itertools
+import logging
+import time
+from collections import deque
+from pathlib import Path
+from threading import Event
+
+import eventlet
+import eventlet.tpool
+
+from config import (
+    HTML_EXTENSIONS, VIDEO_EXTENSIONS, THUMBNAIL_BROWSER_PAGES, THUMBNAIL_VIDEO_WORKERS,
+    get_current_port
+)
+from device_tracking import ADMIN_ROOM
+from extensions import socketio
+from thumbnail_service import get_thumbnail_service
+
+logger = logging.getLogger(__name__)
+
+# Job states
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_DONE = 'done'
+JOB_FAILED = 'failed'
+JOB_SKIPPED = 'skipped'      # thumbnail already up to date
+JOB_CANCELLED = 'cancelled'
+FINISHED_STATES = (JOB_DONE, JOB_FAILED, JOB_SKIPPED, JOB_CANCELLED)
+
+# Worker pools
+KIND_HTML = 'html'
+KIND_VIDEO = 'video'
+
+# Job stages: a file's preview is queued once its thumbnail is done, and
+# preview jobs only run when no thumbnail job is waiting for the same pool
+STAGE_THUMBNAIL = 'thumbnail'
+STAGE_PREVIEW = 'preview'
+
+FINISHED_JOBS_KEPT = 200  # Recent finished jobs listed by get_status()
+BATCHES_KEPT = 20
+
+
+def run_async(coro):
+    """Run an async coroutine in a real OS thread via eventlet.tpool.
+
+    eventlet monkey-patches asyncio and threading, so creating a new asyncio
+    event loop inside a green thread fails with 'Cannot run the event loop
+    while another loop is running'.  tpool.execute dispatches to a real
+    native thread where asyncio works normally.
+    """
+    def _worker():
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            return loop.run_until_complete(coro)
+        finally:
+            loop.close()
+    return eventlet.tpool.execute(_worker)
+
+
+def thumbnail_kind(filename):
+    """Worker pool for a media file, or None if it can't be thumbnailed"""
+    suffix = Path(filename).suffix.lower()
+    if suffix in HTML_EXTENSIONS:
+        return KIND_HTML
+    if suffix in VIDEO_EXTENSIONS:
+        return KIND_VIDEO
+    return None
+
+
+class ThumbnailJob:
+    """One file's thumbnail generation; ``wait()`` blocks (cooperatively) until it finishes."""
+
+    def __init__(self, job_id, filename, path, kind, batch_id=None, stage=STAGE_THUMBNAIL):
+        self.id = job_id
+        self.filename = filename
+        self.path = Path(path)
+        self.kind = kind
+        self.stage = stage
+        self.batch_id = batch_id
+        self.state = JOB_QUEUED
+        self.error = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self._done = Event()
+
+    def wait(self, timeout=None):
+        self._done.wait(timeout)
+        return self.state
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'filename': self.filename,
+            'kind': self.kind,
+            'stage': self.stage,
+            'batch_id': self.batch_id,
+            'state': self.state,
+            'error': self.error,
+            'duration': round(self.finished - self.started, 3) if self.started and self.finished else None,
+        }
+
+
+class ThumbnailJobEngine:
+    """Queue of thumbnail jobs with one bounded pool per kind.
+
+    - a file has at most one queued/running job; resubmitting returns that job
+    - jobs run as green threads: ffmpeg through the green subprocess module,
+      HTML renders handed to the browser pool from a tpool thread
+    - files whose content already has a thumbnail (renamed or duplicated)
+      finish without regenerating it
+    - every thumbnailed file then gets a low-priority preview job (looping
+      clip + sprite strip); previews don't count towards batches
+    - cancelling drops queued jobs; running jobs finish
+    """
+
+    def __init__(self, service, video_workers=THUMBNAIL_VIDEO_WORKERS, browser_workers=THUMBNAIL_BROWSER_PAGES):
+        self.service = service
+        self.limits = {KIND_VIDEO: max(1, video_workers), KIND_HTML: max(1, browser_workers)}
+        self._queues = {KIND_VIDEO: deque(), KIND_HTML: deque()}
+        self._preview_queues = {KIND_VIDEO: deque(), KIND_HTML: deque()}
+        self._running = {KIND_VIDEO: 0, KIND_HTML: 0}
+        self._active = {}  # (stage, filename) -> queued/running job
+        self._finished = deque(maxlen=FINISHED_JOBS_KEPT)
+        self._batches = {}
+        self._job_ids = itertools.count(1)
+        self._batch_ids = itertools.count(1)
+
+    # =========================================================================
+    # Submitting
+    # =========================================================================
+
+    def submit(self, filename, path, batch_id=None):
+        """Queue a thumbnail job for one file; returns the job (or None if unsupported)"""
+        job = self._active.get((STAGE_THUMBNAIL, filename))
+        if job is not None:
+            return job
+
+        kind = thumbnail_kind(filename)
+        if kind is None:
+            return None
+
+        job = ThumbnailJob(next(self._job_ids), filename, path, kind, batch_id)
+        if batch_id is not None:
+            self._batches[batch_id]['total'] += 1
+
+        self._active[(STAGE_THUMBNAIL, filename)] = job
+        self._queues[kind].append(job)
+        self._pump(kind)
+        return job
+
+    def submit_preview(self, filename, path):
+        """Queue a hover-preview job; returns the job (or None if unsupported)"""
+        job = self._active.get((STAGE_PREVIEW, filename))
+        if job is not None:
+            return job
+
+        kind = thumbnail_kind(filename)
+        if kind is None:
+            return None
+
+        job = ThumbnailJob(next(self._job_ids), filename, path, kind, stage=STAGE_PREVIEW)
+        self._active[(STAGE_PREVIEW, filename)] = job
+        self._preview_queues[kind].append(job)
+        self._pump(kind)
+        return job
+
+    def submit_all(self, animations_dir, videos_dir):
+        """Queue every HTML animation and video; returns the batch summary"""
+        batch_id = next(self._batch_ids)
+        for old_id in list(self._batches)[:-BATCHES_KEPT]:
+            del self._batches[old_id]
+        self._batches[batch_id] = {
+            'id': batch_id, 'total': 0, 'done': 0, 'failed': 0, 'skipped': 0, 'cancelled': 0,
+            'started': time.time(), 'finished': None,
+        }
+
+        for directory in (Path(animations_dir), Path(videos_dir)):
+            if not directory.exists():
+                continue
+            for path in sorted(directory.iterdir()):
+                if path.is_file() and thumbnail_kind(path.name):
+                    self.submit(path.name, path, batch_id)
+
+        batch = self._batches[batch_id]
+        self._check_batch_finished(batch)
+        logger.info("Thumbnail batch %d: %d files queued", batch_id, batch['total'])
+        return dict(batch)
+
+    def cancel(self, job_id=None, batch_id=None):
+        """Cancel queued jobs (all, one job, or one batch); returns the number cancelled"""
+        cancelled = 0
+        for queues in (self._queues, self._preview_queues):
+            for kind, queue in queues.items():
+                keep = deque()
+                for job in queue:
+                    if (job_id is None or job.id == job_id) and (batch_id is None or job.batch_id == batch_id):
+                        self._active.pop((job.stage, job.filename), None)
+                        self._finish(job, JOB_CANCELLED)
+                        cancelled += 1
+                    else:
+                        keep.append(job)
+                queues[kind] = keep
+        if cancelled:
+            logger.info("Cancelled %d queued thumbnail job(s)", cancelled)
+        return cancelled
+
+    # =========================================================================
+    # Workers
+    # =========================================================================
+
+    def _pump(self, kind):
+        queue, previews = self._queues[kind], self._preview_queues[kind]
+        while (queue or previews) and self._running[kind] < self.limits[kind]:
+            job = queue.popleft() if queue else previews.popleft()
+            self._running[kind] += 1
+            eventlet.spawn_n(self._run, job)
+
+    def _run(self, job):
+        job.state = JOB_RUNNING
+        job.started = time.time()
+        self._emit(job)
+
+        state = JOB_FAILED
+        try:
+            # Hash large sources in a native thread so the hub keeps serving
+            eventlet.tpool.execute(self.service.content_hash, job.filename, job.path)
+            if self._up_to_date(job):
+                state = JOB_SKIPPED
+            else:
+                if job.stage == STAGE_PREVIEW:
+                    success = self._run_preview(job)
+                elif job.kind == KIND_HTML:
+                    success = run_async(self.service.generate_html_thumbnail(job.filename, job.path))
+                else:
+                    success = self.service.generate_video_thumbnail(job.filename, job.path)
+                # Sized WebP/PNG variants; the master alone is still a usable thumbnail
+                if success and job.stage == STAGE_THUMBNAIL and not self.service.has_variants(job.filename):
+                    self.service.generate_variants(job.filename)
+                state = JOB_DONE if success else JOB_FAILED
+        except Exception as e:
+            job.error = str(e)
+            logger.error("Thumbnail %s job for %s failed: %s", job.stage, job.filename, e)
+        finally:
+            self._running[job.kind] -= 1
+            self._active.pop((job.stage, job.filename), None)
+            self._finish(job, state)
+            if job.stage == STAGE_THUMBNAIL and state in (JOB_DONE, JOB_SKIPPED):
+                self.submit_preview(job.filename, job.path)
+            self._pump(job.kind)
+
+    def _up_to_date(self, job):
+        # Checked here rather than in submit() so the content hash is already
+        # cached by the tpool call above and never computed on the hub
+        if job.stage == STAGE_PREVIEW:
+            return self.service.preview_exists(job.filename, job.path)
+        return self.service.thumbnail_exists(job.filename, job.path)
+
+    def _run_preview(self, job):
+        if job.kind == KIND_VIDEO:
+            return self.service.generate_preview(job.filename, job.path)
+        # HTML: record the animation in the browser pool, then encode like a video
+        clip_path = run_async(self.service.record_html_clip(job.filename, job.path))
+        try:
+            return self.service.generate_preview(job.filename, job.path, clip_path)
+        finally:
+            clip_path.unlink(missing_ok=True)
+
+    def _finish(self, job, state):
+        job.state = state
+        job.finished = time.time()
+        self._finished.append(job)
+        job._done.set()
+
+        batch = self._batches.get(job.batch_id)
+        if batch is not None:
+            batch[state] += 1
+            self._check_batch_finished(batch)
+        self._emit(job)
+
+    def _check_batch_finished(self, batch):
+        if batch['finished'] is None and batch['done'] + batch['failed'] + batch['skipped'] + batch['cancelled'] >= batch['total']:
+            batch['finished'] = time.time()
+            logger.info("Thumbnail batch %d finished: %d generated, %d failed, %d skipped, %d cancelled in %.1fs",
+                        batch['id'], batch['done'], batch['failed'], batch['skipped'], batch['cancelled'],
+                        batch['finished'] - batch['started'])
+
+    def _emit(self, job):
+        try:
+            batch = self._batches.get(job.batch_id)
+            socketio.emit('thumbnail_progress', {
+                'job': job.to_dict(),
+                'batch': dict(batch) if batch else None,
+                'queued': sum(len(queue) for queue in self._queues.values()),
+                'queued_previews': sum(len(queue) for queue in self._preview_queues.values()),
+                'running': sum(self._running.values()),
+            }, room=ADMIN_ROOM)
+        except Exception as e:
+            logger.debug("Thumbnail progress emit failed: %s", e)
+
+    # =========================================================================
+    # Status
+    # =========================================================================
+
+    def get_status(self):
+        running = [job.to_dict() for job in self._active.values() if job.state == JOB_RUNNING]
+        return {
+            'limits': dict(self.limits),
+            'queued': {kind: len(queue) for kind, queue in self._queues.items()},
+            'queued_previews': {kind: len(queue) for kind, queue in self._preview_queues.items()},
+            'running': running,
+            'recent': [job.to_dict() for job in list(self._finished)[-20:]],
+            'batches': [dict(batch) for batch in list(self._batches.values())[-5:]],
+        }
+
+
+_thumbnail_engine = None
+
+
+def get_thumbnail_engine():
+    """Get or create the shared thumbnail job engine"""
+    global _thumbnail_engine
+    if _thumbnail_engine is None:
+        _thumbnail_engine = ThumbnailJobEngine(get_thumbnail_service(f"http://localhost:{get_current_port()}"))
+    return _thumbnail_engine
@@ -4,25 +4,50 @@ Thumbnail Generation Service for OBS TV Animator
 This service handles automatic thumbnail generation for:
 - HTML animations using Playwright browser automation
 - Video files using FFmpeg
+
+and hover previews (a short looping WebM plus a sprite strip of evenly
+spaced frames) for both, recorded from HTML animations with Playwright.
 """
 
 import os
-import asyncio
+import json
 import subprocess
 import logging
 from pathlib import Path
 from typing import Optional, Tuple
 from urllib.parse import urljoin
 import hashlib
+import tempfile
 import time
 
-try:
-    from playwright.async_api import async_playwright
-    PLAYWRIGHT_AVAILABLE = True
-except ImportError:
-    PLAYWRIGHT_AVAILABLE = False
+from eventlet import patcher
+
+from browser_pool import PLAYWRIGHT_AVAILABLE, get_browser_pool
+from config import HTML_EXTENSIONS, VIDEO_EXTENSIONS
+
+if not PLAYWRIGHT_AVAILABLE:
     logging.warning("Playwright not available - HTML thumbnail generation disabled")
 
+# Thumbnails are stored as <content hash>.png and indexed by a manifest
+# (filename -> hash, source size/mtime, variants, generation time), so renamed
+# or duplicated files reuse an existing thumbnail instead of regenerating it.
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 2
+HASH_CHUNK_SIZE = 1024 * 1024
+HASH_NAME_LENGTH = 32  # hex characters of the SHA-256 used in thumbnail names
+
+# Each thumbnail is kept as a full-size PNG master plus smaller WebP/PNG
+# variants (<hash>-<width>.<format>) picked per request by width and Accept
+VARIANT_MIMETYPES = {'webp': 'image/webp', 'png': 'image/png'}
+
+# Hover preview assets: <hash>-preview.webm and <hash>-sprite.jpg
+PREVIEW_ASSETS = {'video': ('preview.webm', 'video/webm'), 'sprite': ('sprite.jpg', 'image/jpeg')}
+
+# HTML thumbnails are rendered and sources hashed in native (tpool) threads
+# while video jobs run on green threads, so the manifest needs a real OS lock:
+# every read-modify-write of the entries happens under it
+_threading = patcher.original('threading')
+
 class ThumbnailService:
     """Service for generating thumbnails from HTML animations and videos"""
     
@@ -39,44 +64,411 @@ class ThumbnailService:
         self.html_thumbnail_height = 180
         self.html_capture_delay = 2000  # ms to wait for animations to load
         
-        self.video_thumbnail_width = 320
-        self.video_thumbnail_height = 180
+        # Video frames are captured at the same size as HTML renders; both act
+        # as the master the smaller variants are scaled from
+        self.video_thumbnail_width = 640
+        self.video_thumbnail_height = 360
         self.video_capture_time = "00:00:01"  # Capture at 1 second mark
+        
+        # Responsive variants (widths in pixels, never larger than the master)
+        self.variant_widths = (160, 320, 640)
+        self.webp_quality = 80
+        
+        # Hover previews: a short low-bitrate loop and a horizontal frame strip
+        self.preview_seconds = 4
+        self.preview_width = 320
+        self.preview_fps = 12
+        self.preview_bitrate = "200k"
+        self.sprite_frames = 10
+        self.sprite_frame_width = 160
+        
+        # Manifest of generated thumbnails, keyed by source filename
+        self.manifest_path = self.thumbnails_dir / MANIFEST_NAME
+        self._manifest_lock = _threading.Lock()
+        self._files = self._load_manifest()
     
-    def get_thumbnail_path(self, filename: str) -> Path:
-        """Get the path where thumbnail should be saved"""
-        # Create hash of filename to avoid filesystem issues
-        name_hash = hashlib.md5(filename.encode()).hexdigest()[:8]
-        safe_name = "".join(c for c in filename if c.isalnum() or c in ".-_")[:50]
-        thumbnail_name = f"{safe_name}_{name_hash}.png"
-        return self.thumbnails_dir / thumbnail_name
+    # =========================================================================
+    # Manifest
+    # =========================================================================
     
-    def thumbnail_exists(self, filename: str, source_path: Path) -> bool:
-        """Check if thumbnail exists and is newer than source file"""
-        thumbnail_path = self.get_thumbnail_path(filename)
-        if not thumbnail_path.exists():
+    def _load_manifest(self) -> dict:
+        try:
+            with open(self.manifest_path, 'r') as f:
+                manifest = json.load(f)
+            if manifest.get('version') == MANIFEST_VERSION:
+                return manifest.get('files', {})
+            self.logger.info(f"Ignoring thumbnail manifest version {manifest.get('version')}")
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, AttributeError) as e:
+            self.logger.warning(f"Could not read thumbnail manifest, starting fresh: {str(e)}")
+        return {}
+    
+    def _save_manifest(self):
+        """Write the manifest via temp file + rename so readers never see a partial file"""
+        with self._manifest_lock:
+            # Entries are replaced, never mutated, so a shallow copy is a consistent snapshot
+            files = dict(self._files)
+            temp_path = self.manifest_path.with_name(f"{MANIFEST_NAME}.{os.getpid()}.tmp")
+            with open(temp_path, 'w') as f:
+                json.dump({'version': MANIFEST_VERSION, 'files': files}, f, indent=2, sort_keys=True)
+            os.replace(temp_path, self.manifest_path)
+    
+    @staticmethod
+    def _source_signature(source_path: Path) -> Optional[Tuple[int, int]]:
+        try:
+            stat = source_path.stat()
+            return stat.st_size, stat.st_mtime_ns
+        except OSError:
+            return None
+    
+    def _entry_if_current(self, filename: str, source_path: Path) -> Optional[dict]:
+        """Manifest entry for ``filename`` if the source hasn't changed since it was hashed"""
+        entry = self._files.get(filename)
+        signature = self._source_signature(source_path)
+        if entry is None or signature is None:
+            return None
+        if (entry.get('size'), entry.get('mtime_ns')) != signature:
+            return None
+        return entry
+    
+    def content_hash(self, filename: str, source_path: Path) -> str:
+        """SHA-256 of the source file (reused from the manifest while size and mtime match)"""
+        entry = self._entry_if_current(filename, source_path)
+        if entry is not None:
+            return entry['hash']
+        
+        signature = self._source_signature(source_path)
+        digest = hashlib.sha256()
+        with open(source_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+                digest.update(chunk)
+        content_hash = digest.hexdigest()[:HASH_NAME_LENGTH]
+        
+        # Remember the hash even before a thumbnail exists
+        with self._manifest_lock:
+            previous = self._files.get(filename) or {}
+            unchanged = previous.get('hash') == content_hash
+            entry = dict(previous) if unchanged else {'variants': [], 'generated': None}
+            entry.update({
+                'hash': content_hash,
+                'size': signature[0] if signature else None,
+                'mtime_ns': signature[1] if signature else None,
+            })
+            self._files[filename] = entry
+        if previous.get('hash') and not unchanged:
+            # The file was overwritten: its old thumbnail may now be unused
+            self._release_hash(previous['hash'])
+        return content_hash
+    
+    def _hashed_path(self, content_hash: str) -> Path:
+        return self.thumbnails_dir / f"{content_hash}.png"
+    
+    def _record_thumbnail(self, filename: str, content_hash: str):
+        """Mark ``filename`` as having an up-to-date thumbnail and persist the manifest"""
+        master = self._hashed_path(content_hash)
+        variants = self._existing_variants(content_hash) or [
+            {'file': master.name, 'format': 'png', 'width': self._png_width(master)}
+        ]
+        with self._manifest_lock:
+            entry = dict(self._files.get(filename) or {})
+            entry.update({
+                'hash': content_hash,
+                'variants': variants,
+                'generated': entry.get('generated') or time.time(),
+            })
+            self._files[filename] = entry
+        self._save_manifest()
+    
+    def _release_hash(self, content_hash: str):
+        """Delete a hash's thumbnail files once no manifest entry refers to them"""
+        # Deleted under the lock so a job can't register the hash again in between
+        with self._manifest_lock:
+            if any(entry.get('hash') == content_hash for entry in self._files.values()):
+                return
+            for path in [*self.thumbnails_dir.glob(f"{content_hash}.*"), *self.thumbnails_dir.glob(f"{content_hash}-*")]:
+                try:
+                    path.unlink()
+                except OSError as e:
+                    self.logger.error(f"Failed to remove thumbnail {path.name}: {str(e)}")
+    
+    def forget(self, filename: str):
+        """Drop a deleted file from the manifest (its thumbnail goes if nothing else shares it)"""
+        with self._manifest_lock:
+            entry = self._files.pop(filename, None)
+        if entry is None:
+            return
+        self._release_hash(entry['hash'])
+        self._save_manifest()
+    
+    # =========================================================================
+    # Variants
+    # =========================================================================
+    
+    @staticmethod
+    def _png_width(path: Path) -> Optional[int]:
+        """Width from a PNG's IHDR chunk (no image library needed)"""
+        try:
+            with open(path, 'rb') as f:
+                header = f.read(24)
+            if header[:8] == b'\x89PNG\r\n\x1a\n':
+                return int.from_bytes(header[16:20], 'big')
+        except OSError:
+            pass
+        return None
+    
+    def _variant_path(self, content_hash: str, width: int, fmt: str) -> Path:
+        return self.thumbnails_dir / f"{content_hash}-{width}.{fmt}"
+    
+    def _existing_variants(self, content_hash: str) -> list:
+        """Variants on disk for a hash (master included), smallest first"""
+        master = self._hashed_path(content_hash)
+        if not master.exists():
+            return []
+        variants = [{'file': master.name, 'format': 'png', 'width': self._png_width(master)}]
+        for width in self.variant_widths:
+            for fmt in VARIANT_MIMETYPES:
+                path = self._variant_path(content_hash, width, fmt)
+                if path.exists():
+                    variants.append({'file': path.name, 'format': fmt, 'width': width})
+        return sorted(variants, key=lambda v: (v['width'] or 0, v['format'] != 'webp'))
+    
+    def generate_variants(self, filename: str) -> bool:
+        """Scale the file's master PNG into the missing WebP/PNG variants with one FFmpeg run.
+        
+        Falls back to PNG-only variants if FFmpeg was built without libwebp.
+        """
+        entry = self._files.get(filename)
+        if not entry:
             return False
+        content_hash = entry['hash']
+        master = self._hashed_path(content_hash)
+        master_width = self._png_width(master)
+        if not master_width:
+            return False
+        
+        wanted = [(width, fmt) for width in self.variant_widths if width <= master_width
+                  for fmt in VARIANT_MIMETYPES
+                  if not (width == master_width and fmt == 'png')]  # the master is that variant
+        missing = [(width, fmt) for width, fmt in wanted
+                   if not self._variant_path(content_hash, width, fmt).exists()]
+        
+        for formats in (('webp', 'png'), ('png',)):
+            outputs = [(width, fmt) for width, fmt in missing if fmt in formats]
+            if not outputs:
+                break
+            cmd = ['ffmpeg', '-y', '-loglevel', 'error', '-i', str(master)]
+            for width, fmt in outputs:
+                cmd += ['-vf', f'scale={width}:-2']
+                if fmt == 'webp':
+                    cmd += ['-c:v', 'libwebp', '-quality', str(self.webp_quality)]
+                cmd.append(str(self._variant_path(content_hash, width, fmt)))
+            try:
+                result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
+            except (OSError, subprocess.TimeoutExpired) as e:
+                self.logger.error(f"Could not create thumbnail variants for {filename}: {str(e)}")
+                break
+            if result.returncode == 0:
+                break
+            self.logger.warning(f"FFmpeg variant encoding failed for {filename} ({'/'.join(formats)}): {result.stderr.strip()}")
+            # Drop partial outputs before retrying without WebP
+            for width, fmt in outputs:
+                self._variant_path(content_hash, width, fmt).unlink(missing_ok=True)
+        
+        self._record_thumbnail(filename, content_hash)
+        return self.has_variants(filename)
+    
+    def has_variants(self, filename: str) -> bool:
+        entry = self._files.get(filename)
+        return bool(entry) and len(entry.get('variants', [])) > 1
+    
+    def select_variant(self, filename: str, width: Optional[int] = None, accept: str = '') -> Optional[dict]:
+        """Pick the variant to serve: the smallest at least ``width`` wide (largest if none
+        is), as WebP when the client accepts it, otherwise PNG"""
+        entry = self._files.get(filename)
+        variants = [v for v in (entry or {}).get('variants', [])
+                    if (self.thumbnails_dir / v['file']).exists()]
+        if not variants:
+            return None
+        
+        formats = ['webp', 'png'] if 'image/webp' in accept else ['png']
+        candidates = [v for v in variants if v['format'] in formats] or variants
+        widths = sorted({v['width'] or 0 for v in candidates})
+        target = widths[-1]
+        if width:
+            target = next((w for w in widths if w >= width), widths[-1])
+        
+        at_width = [v for v in candidates if (v['width'] or 0) == target]
+        at_width.sort(key=lambda v: formats.index(v['format']) if v['format'] in formats else len(formats))
+        return {**at_width[0], 'path': self.thumbnails_dir / at_width[0]['file'],
+                'mimetype': VARIANT_MIMETYPES.get(at_width[0]['format'], 'image/png')}
+    
+    # =========================================================================
+    # Hover previews
+    # =========================================================================
+    
+    def _preview_path(self, content_hash: str, asset: str) -> Path:
+        return self.thumbnails_dir / f"{content_hash}-{PREVIEW_ASSETS[asset][0]}"
+    
+    def preview_exists(self, filename: str, source_path: Path) -> bool:
+        """Check if the preview clip and sprite exist for the current content of the source file"""
+        entry = self._entry_if_current(filename, source_path)
+        if entry is None or not entry.get('preview'):
+            return False
+        return all(self._preview_path(entry['hash'], asset).exists() for asset in PREVIEW_ASSETS)
+    
+    async def record_html_clip(self, filename: str, html_path: Path) -> Path:
+        """Record the animation playing in the shared browser pool; returns a temporary WebM
+        (deleted by the caller) to build the preview from"""
+        handle, clip_path = tempfile.mkstemp(prefix='ata-preview-', suffix='.webm')
+        os.close(handle)
+        self.logger.info(f"Recording HTML preview clip for {filename}")
+        try:
+            await get_browser_pool().record(
+                f"file://{html_path.resolve()}",
+                clip_path,
+                self.html_thumbnail_width * 2,
+                self.html_thumbnail_height * 2,
+                duration_ms=self.preview_seconds * 1000
+            )
+        except Exception:
+            Path(clip_path).unlink(missing_ok=True)
+            raise
+        return Path(clip_path)
+    
+    def _media_duration(self, media_path: Path) -> Optional[float]:
+        try:
+            result = subprocess.run(
+                ['ffprobe', '-v', 'error', '-show_entries', 'format=duration', '-of', 'csv=p=0', str(media_path)],
+                capture_output=True, text=True, timeout=15
+            )
+            return float(result.stdout.strip()) if result.returncode == 0 else None
+        except (OSError, ValueError, subprocess.TimeoutExpired):
+            return None
+    
+    def generate_preview(self, filename: str, source_path: Path, media_path: Optional[Path] = None) -> bool:
+        """Build the preview clip and sprite strip with one FFmpeg run.
         
-        # Check if thumbnail is newer than source file
+        ``media_path`` is what gets decoded (a recorded clip for HTML animations);
+        the preview is cached under the content hash of ``source_path``.
+        """
+        content_hash = self.content_hash(filename, source_path)
+        clip_path = self._preview_path(content_hash, 'video')
+        sprite_path = self._preview_path(content_hash, 'sprite')
+        if clip_path.exists() and sprite_path.exists():
+            self._record_preview(filename, content_hash)
+            return True
+        
+        media_path = media_path or source_path
+        duration = self._media_duration(media_path) or self.preview_seconds
+        frame_interval = max(duration / self.sprite_frames, 0.05)
+        
+        self.logger.info(f"Generating hover preview for {filename}")
+        cmd = [
+            'ffmpeg', '-y', '-loglevel', 'error', '-i', str(media_path),
+            # Looping clip: the first few seconds, small and silent
+            '-t', str(self.preview_seconds), '-an',
+            '-vf', f'fps={self.preview_fps},scale={self.preview_width}:-2',
+            '-c:v', 'libvpx-vp9', '-b:v', self.preview_bitrate, '-deadline', 'realtime', '-cpu-used', '8',
+            str(clip_path),
+            # Sprite: frames evenly spaced over the whole file, tiled left to right
+            '-vf', f'fps=1/{frame_interval:.3f},scale={self.sprite_frame_width}:-2,tile={self.sprite_frames}x1',
+            '-frames:v', '1', '-q:v', '5',
+            str(sprite_path)
+        ]
         try:
-            thumbnail_mtime = thumbnail_path.stat().st_mtime
-            source_mtime = source_path.stat().st_mtime
-            return thumbnail_mtime > source_mtime
-        except (OSError, FileNotFoundError):
+            result = subprocess.run(cmd, capture_output=True, text=True, timeout=120)
+            if result.returncode == 0 and clip_path.exists() and sprite_path.exists():
+                self._record_preview(filename, content_hash)
+                self.logger.info(f"Successfully generated hover preview for {filename}")
+                return True
+            self.logger.error(f"FFmpeg preview failed for {filename}: {result.stderr.strip()}")
+        except subprocess.TimeoutExpired:
+            self.logger.error(f"FFmpeg preview timeout for {filename}")
+        except Exception as e:
+            self.logger.error(f"Failed to generate hover preview for {filename}: {str(e)}")
+        
+        # Clean up any partial files
+        for path in (clip_path, sprite_path):
+            path.unlink(missing_ok=True)
+        return False
+    
+    def _record_preview(self, filename: str, content_hash: str):
+        with self._manifest_lock:
+            entry = dict(self._files.get(filename) or {'hash': content_hash, 'variants': [], 'generated': None})
+            entry['preview'] = {
+                'video': self._preview_path(content_hash, 'video').name,
+                'sprite': self._preview_path(content_hash, 'sprite').name,
+                'frames': self.sprite_frames,
+                'frame_width': self.sprite_frame_width,
+            }
+            self._files[filename] = entry
+        self._save_manifest()
+    
+    def get_preview_path(self, filename: str, asset: str) -> Optional[Tuple[Path, str]]:
+        """Filesystem path and mimetype of a preview asset ('video' or 'sprite'), if generated"""
+        entry = self._files.get(filename)
+        if asset not in PREVIEW_ASSETS or not entry or not entry.get('preview'):
+            return None
+        path = self._preview_path(entry['hash'], asset)
+        return (path, PREVIEW_ASSETS[asset][1]) if path.exists() else None
+    
+    def get_preview_info(self, filename: str, source_path: Path) -> Optional[dict]:
+        """Versioned preview URLs and sprite layout for file listings, or None if not generated"""
+        entry = self._files.get(filename)
+        if entry is None or not self.preview_exists(filename, source_path):
+            return None
+        return {
+            'video': f"/admin/api/preview/{filename}/video?v={entry['hash']}",
+            'sprite': f"/admin/api/preview/{filename}/sprite?v={entry['hash']}",
+            'frames': entry['preview']['frames'],
+            'frame_width': entry['preview']['frame_width'],
+        }
+    
+    # =========================================================================
+    # Lookup
+    # =========================================================================
+    
+    def get_thumbnail_path(self, filename: str) -> Optional[Path]:
+        """Path of the file's full-size (master PNG) thumbnail, or None if it has none"""
+        entry = self._files.get(filename)
+        if not entry or not entry.get('variants'):
+            return None
+        return self._hashed_path(entry['hash'])
+    
+    def thumbnail_version(self, filename: str, source_path: Path) -> Optional[str]:
+        """Content hash of an up-to-date thumbnail (used to version thumbnail URLs)"""
+        entry = self._files.get(filename)
+        if entry is None or not self.thumbnail_exists(filename, source_path):
+            return None
+        return entry['hash']
+    
+    def thumbnail_exists(self, filename: str, source_path: Path) -> bool:
+        """Check if a thumbnail exists for the current content of the source file.
+        
+        Only compares size and mtime against the manifest (no hashing); a file
+        whose content was seen under another name is picked up by the job.
+        """
+        entry = self._entry_if_current(filename, source_path)
+        if entry is None or not entry.get('variants'):
             return False
+        return self._hashed_path(entry['hash']).exists()
     
     async def generate_html_thumbnail(self, filename: str, html_path: Path) -> bool:
-        """Generate thumbnail for HTML animation file using Playwright"""
+        """Generate thumbnail for HTML animation file in the shared browser pool"""
         if not PLAYWRIGHT_AVAILABLE:
             self.logger.warning(f"Playwright not available - cannot generate thumbnail for {filename}")
             return False
         
-        thumbnail_path = self.get_thumbnail_path(filename)
+        thumbnail_path = None
         
         try:
-            # Check if we need to regenerate
-            if self.thumbnail_exists(filename, html_path):
-                self.logger.info(f"Thumbnail already exists and is up-to-date for {filename}, skipping generation")
+            # Reuse the thumbnail of identical content (this file before a rename, or a duplicate)
+            content_hash = self.content_hash(filename, html_path)
+            thumbnail_path = self._hashed_path(content_hash)
+            if thumbnail_path.exists():
+                self.logger.info(f"Thumbnail already exists for the content of {filename}, skipping generation")
+                self._record_thumbnail(filename, content_hash)
                 return True
             
             self.logger.info(f"Generating HTML thumbnail for {filename}")
@@ -84,59 +476,23 @@ class ThumbnailService:
             # Use local file path instead of HTTP URL
             animation_url = f"file://{html_path.resolve()}"
             
-            async with async_playwright() as p:
-                # Launch browser with minimal resources
-                browser = await p.chromium.launch(
-                    headless=True,
-                    args=[
-                        '--no-sandbox',
-                        '--disable-dev-shm-usage',
-                        '--disable-gpu',
-                        '--disable-extensions',
-                        '--disable-background-timer-throttling',
-                        '--disable-backgrounding-occluded-windows',
-                        '--disable-renderer-backgrounding',
-                    ]
-                )
-                
-                try:
-                    # Create new page with viewport size matching thumbnail dimensions
-                    page = await browser.new_page(
-                        viewport={
-                            'width': self.html_thumbnail_width * 2,  # 2x for better quality
-                            'height': self.html_thumbnail_height * 2
-                        }
-                    )
-                    
-                    # Set timeout and navigate to animation
-                    page.set_default_timeout(10000)  # 10 second timeout
-                    await page.goto(animation_url, wait_until='networkidle')
-                    
-                    # Wait for animations to start/load
-                    await page.wait_for_timeout(self.html_capture_delay)
-                    
-                    # Take screenshot
-                    await page.screenshot(
-                        path=str(thumbnail_path),
-                        type='png',
-                        clip={
-                            'x': 0,
-                            'y': 0,
-                            'width': self.html_thumbnail_width * 2,
-                            'height': self.html_thumbnail_height * 2
-                        }
-                    )
-                    
-                    self.logger.info(f"Successfully generated HTML thumbnail: {thumbnail_path}")
-                    return True
-                    
-                finally:
-                    await browser.close()
-                    
+            # Rendered at 2x for better quality
+            await get_browser_pool().screenshot(
+                animation_url,
+                thumbnail_path,
+                self.html_thumbnail_width * 2,
+                self.html_thumbnail_height * 2,
+                delay_ms=self.html_capture_delay  # Wait for animations to start/load
+            )
+            
+            self._record_thumbnail(filename, content_hash)
+            self.logger.info(f"Successfully generated HTML thumbnail: {thumbnail_path}")
+            return True
+            
         except Exception as e:
             self.logger.error(f"Failed to generate HTML thumbnail for {filename}: {str(e)}")
             # Clean up any partial file
-            if thumbnail_path.exists():
+            if thumbnail_path and thumbnail_path.exists():
                 try:
                     thumbnail_path.unlink()
                 except OSError:
@@ -145,12 +501,15 @@ class ThumbnailService:
     
     def generate_video_thumbnail(self, filename: str, video_path: Path) -> bool:
         """Generate thumbnail for video file using FFmpeg"""
-        thumbnail_path = self.get_thumbnail_path(filename)
+        thumbnail_path = None
         
         try:
-            # Check if we need to regenerate
-            if self.thumbnail_exists(filename, video_path):
-                self.logger.info(f"Video thumbnail already exists and is up-to-date for {filename}, skipping generation")
+            # Reuse the thumbnail of identical content (this file before a rename, or a duplicate)
+            content_hash = self.content_hash(filename, video_path)
+            thumbnail_path = self._hashed_path(content_hash)
+            if thumbnail_path.exists():
+                self.logger.info(f"Video thumbnail already exists for the content of {filename}, skipping generation")
+                self._record_thumbnail(filename, content_hash)
                 return True
             
             self.logger.info(f"Generating video thumbnail for {filename}")
@@ -175,6 +534,7 @@ class ThumbnailService:
             )
             
             if result.returncode == 0:
+                self._record_thumbnail(filename, content_hash)
                 self.logger.info(f"Successfully generated video thumbnail: {thumbnail_path}")
                 return True
             else:
@@ -187,128 +547,58 @@ class ThumbnailService:
         except Exception as e:
             self.logger.error(f"Failed to generate video thumbnail for {filename}: {str(e)}")
             # Clean up any partial file
-            if thumbnail_path.exists():
+            if thumbnail_path and thumbnail_path.exists():
                 try:
                     thumbnail_path.unlink()
                 except OSError:
                     pass
             return False
     
-    async def generate_thumbnail(self, filename: str, file_path: Path) -> Tuple[bool, str]:
-        """
-        Generate appropriate thumbnail based on file type
-        Returns (success: bool, thumbnail_filename: str)
-        """
-        file_ext = filename.lower().split('.')[-1]
+    def get_thumbnail_url(self, filename: str, source_path: Optional[Path] = None) -> Optional[str]:
+        """Get the URL path for a file's thumbnail.
         
-        if file_ext in ['html', 'htm']:
-            success = await self.generate_html_thumbnail(filename, file_path)
-        elif file_ext in ['mp4', 'webm', 'mov', 'avi', 'mkv']:
-            success = await asyncio.get_event_loop().run_in_executor(
-                None, self.generate_video_thumbnail, filename, file_path
-            )
-        else:
-            self.logger.warning(f"Unsupported file type for thumbnail: {filename}")
-            return False, ""
-        
-        if success:
-            thumbnail_path = self.get_thumbnail_path(filename)
-            return True, thumbnail_path.name
-        else:
-            return False, ""
-    
-    def get_thumbnail_url(self, filename: str) -> Optional[str]:
-        """Get the URL path for a file's thumbnail"""
+        With ``source_path`` the URL carries the content hash (``?v=``), so it
+        changes whenever the file does and can be cached as immutable.
+        """
         thumbnail_path = self.get_thumbnail_path(filename)
-        if thumbnail_path.exists():
-            return f"/admin/api/thumbnail/{filename}"
-        return None
+        if not thumbnail_path or not thumbnail_path.exists():
+            return None
+        version = self.thumbnail_version(filename, source_path) if source_path else None
+        if version:
+            return f"/admin/api/thumbnail/{filename}?v={version}"
+        return f"/admin/api/thumbnail/{filename}"
     
-    def serve_thumbnail(self, filename: str) -> Optional[Path]:
-        """Get the filesystem path for serving a thumbnail"""
-        thumbnail_path = self.get_thumbnail_path(filename)
-        return thumbnail_path if thumbnail_path.exists() else None
-    
-    async def generate_all_thumbnails(self, animations_dir: Path, videos_dir: Path) -> dict:
-        """Generate thumbnails for all files in animations and videos directories"""
-        results = {
-            'html_generated': 0,
-            'html_failed': 0,
-            'video_generated': 0,
-            'video_failed': 0,
-            'html_skipped': 0,
-            'video_skipped': 0
-        }
-        
-        # Process HTML files
-        if animations_dir.exists():
-            for html_file in animations_dir.glob('*.html'):
-                try:
-                    if self.thumbnail_exists(html_file.name, html_file):
-                        results['html_skipped'] += 1
-                        continue
-                    
-                    success = await self.generate_html_thumbnail(html_file.name, html_file)
-                    if success:
-                        results['html_generated'] += 1
-                    else:
-                        results['html_failed'] += 1
-                        
-                except Exception as e:
-                    self.logger.error(f"Error processing HTML file {html_file.name}: {str(e)}")
-                    results['html_failed'] += 1
-        
-        # Process video files
-        if videos_dir.exists():
-            video_extensions = ['*.mp4', '*.webm', '*.mov', '*.avi', '*.mkv']
-            for pattern in video_extensions:
-                for video_file in videos_dir.glob(pattern):
-                    try:
-                        if self.thumbnail_exists(video_file.name, video_file):
-                            results['video_skipped'] += 1
-                            continue
-                        
-                        success = await asyncio.get_event_loop().run_in_executor(
-                            None, self.generate_video_thumbnail, video_file.name, video_file
-                        )
-                        if success:
-                            results['video_generated'] += 1
-                        else:
-                            results['video_failed'] += 1
-                            
-                    except Exception as e:
-                        self.logger.error(f"Error processing video file {video_file.name}: {str(e)}")
-                        results['video_failed'] += 1
-        
-        return results
+    def serve_thumbnail(self, filename: str, width: Optional[int] = None, accept: str = '') -> Optional[Tuple[Path, str]]:
+        """Get the filesystem path and mimetype of the best variant to serve"""
+        variant = self.select_variant(filename, width, accept)
+        return (variant['path'], variant['mimetype']) if variant else None
     
     def cleanup_orphaned_thumbnails(self, animations_dir: Path, videos_dir: Path) -> int:
-        """Remove thumbnails for files that no longer exist"""
+        """Remove manifest entries for deleted files and thumbnails no entry refers to"""
         cleaned_count = 0
         
         # Get list of all existing files
         existing_files = set()
+        for directory, extensions in ((animations_dir, HTML_EXTENSIONS), (videos_dir, VIDEO_EXTENSIONS)):
+            if directory.exists():
+                existing_files.update(f.name for f in directory.iterdir() if f.suffix.lower() in extensions)
         
-        if animations_dir.exists():
-            existing_files.update(f.name for f in animations_dir.glob('*.html'))
-        
-        if videos_dir.exists():
-            video_extensions = ['*.mp4', '*.webm', '*.mov', '*.avi', '*.mkv']
-            for pattern in video_extensions:
-                existing_files.update(f.name for f in videos_dir.glob(pattern))
-        
-        # Check each thumbnail
-        for thumbnail_file in self.thumbnails_dir.glob('*.png'):
-            # Try to match thumbnail back to original file
-            # This is approximate since we hash filenames
-            found_match = False
-            
-            for existing_file in existing_files:
-                if self.get_thumbnail_path(existing_file).name == thumbnail_file.name:
-                    found_match = True
-                    break
+        # Files are deleted while holding the lock: a job registering a new hash
+        # in between would otherwise lose the thumbnail it just wrote
+        with self._manifest_lock:
+            removed_entries = set(self._files) - existing_files
+            for filename in removed_entries:
+                self._files.pop(filename, None)
             
-            if not found_match:
+            # Anything in the directory that isn't a live hash's thumbnail
+            # (including thumbnails named by the old filename-MD5 scheme) is orphaned
+            live_hashes = {entry['hash'] for entry in self._files.values()}
+            for thumbnail_file in self.thumbnails_dir.iterdir():
+                if thumbnail_file.name.startswith(MANIFEST_NAME) or not thumbnail_file.is_file():
+                    continue
+                # <hash>.png masters and <hash>-<width>.<format> variants
+                if thumbnail_file.name.split('.', 1)[0].split('-', 1)[0] in live_hashes:
+                    continue
                 try:
                     thumbnail_file.unlink()
                     cleaned_count += 1
@@ -316,6 +606,8 @@ class ThumbnailService:
                 except OSError as e:
                     self.logger.error(f"Failed to remove thumbnail {thumbnail_file.name}: {str(e)}")
         
+        if removed_entries:
+            self._save_manifest()
         return cleaned_count
 
 
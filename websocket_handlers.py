@@ -6,17 +6,20 @@ All @socketio.on() handlers for real-time WebSocket communication.
 import logging
 import time
 from flask import request
-from flask_socketio import emit
+from flask_login import current_user
+from flask_socketio import emit, join_room, leave_room
 
 from extensions import socketio
+from event_stream import emit_event
 from media_manager import (
     load_state, save_state, find_media_file,
-    get_animation_files, get_video_files, get_all_media_files,
+    get_all_media_files, get_status_snapshot,
     is_video_file
 )
 from device_tracking import (
-    connected_devices, admin_sessions,
-    get_connected_devices_info
+    TV_ROOM, DEFAULT_CHANNEL, connected_devices, admin_sessions,
+    queue_device_delta, get_devices_snapshot, register_device, get_device_rooms, normalize_device_class,
+    record_device_telemetry, clear_device_telemetry
 )
 
 logger = logging.getLogger(__name__)
@@ -28,26 +31,32 @@ def handle_connect():
     session_id = request.sid
     user_agent = request.headers.get('User-Agent', 'Unknown')
 
-    referrer = request.headers.get('Referer', '')
-    device_type = 'admin' if '/admin' in referrer else 'tv'
+    # Every connection starts as a TV; admin rights are only granted by an
+    # authenticated register_device handshake (the Referer is client-supplied)
+    device_type = 'tv'
 
     connected_devices[session_id] = {
         'type': device_type,
         'user_agent': user_agent,
-        'connected_at': time.time()
+        'connected_at': time.time(),
+        'registered': False,
+        'channel': DEFAULT_CHANNEL,
+        'capabilities': {}
     }
 
-    if device_type == 'admin':
-        admin_sessions.add(session_id)
+    for room in get_device_rooms(connected_devices[session_id]):
+        join_room(room)
 
     logger.info("Client connected: %s (type: %s)", session_id, device_type)
 
-    socketio.emit('devices_updated', get_connected_devices_info(), room=None)
+    queue_device_delta('add', session_id, connected_devices[session_id])
 
+    version, status = get_status_snapshot()
     emit('status', {
         'message': 'Connected to Angels-TV-Animator server',
-        'current_animation': load_state().get('current_animation'),
-        'available_animations': get_animation_files()
+        'current_animation': status['current_animation'],
+        'available_animations': status['available_animations'],
+        'state_version': version
     })
 
 
@@ -57,23 +66,93 @@ def handle_disconnect():
     session_id = request.sid
     device_info = connected_devices.pop(session_id, {})
     admin_sessions.discard(session_id)
+    clear_device_telemetry(session_id)
 
     device_type = device_info.get('type', 'unknown')
     logger.info("Client disconnected: %s (type: %s)", session_id, device_type)
 
-    socketio.emit('devices_updated', get_connected_devices_info(), room=None)
+    if device_info:
+        queue_device_delta('remove', session_id)
+
+
+@socketio.on('register_device')
+def handle_register_device(data):
+    """Device-class handshake: client declares its class, capabilities and channel.
+
+    Expected payload::
+
+        {'device_class': 'tv', 'channel': 'main',
+         'capabilities': {'soft_swap': True, 'hls': False,
+                          'screen': {'width': 1920, 'height': 1080}}}
+
+    The acknowledgement returns the stored registration (or an error).
+    """
+    return _register_session(data)
+
+
+def _register_session(data):
+    """Shared by register_device and its legacy alias; admins must be logged in"""
+    session_id = request.sid
+    device_info = connected_devices.get(session_id)
+    if device_info is None:
+        return {'success': False, 'error': 'Unknown session'}
+
+    if (isinstance(data, dict) and normalize_device_class(data.get('device_class')) == 'admin'
+            and not current_user.is_authenticated):
+        logger.warning("Rejected admin registration from unauthenticated client %s", session_id)
+        return {'success': False, 'error': 'Admin registration requires login'}
+
+    old_rooms = get_device_rooms(device_info)
+    device_info, error = register_device(session_id, data)
+    if error:
+        return {'success': False, 'error': error}
+
+    new_rooms = get_device_rooms(device_info)
+    for room in old_rooms - new_rooms:
+        leave_room(room)
+    for room in new_rooms - old_rooms:
+        join_room(room)
+
+    logger.info("Client %s registered as %s (channel: %s, capabilities: %s)",
+                session_id, device_info['type'], device_info['channel'], device_info['capabilities'])
+
+    queue_device_delta('update', session_id, device_info)
+    if device_info['type'] == 'admin':
+        emit('devices_updated', get_devices_snapshot())
+
+    return {
+        'success': True,
+        'device_class': device_info['type'],
+        'channel': device_info['channel'],
+        'capabilities': device_info['capabilities']
+    }
 
 
 @socketio.on('register_admin')
 def handle_register_admin():
-    """Register a client as admin dashboard"""
-    session_id = request.sid
-    if session_id in connected_devices:
-        connected_devices[session_id]['type'] = 'admin'
-        admin_sessions.add(session_id)
-        logger.debug("Client %s registered as admin dashboard", session_id)
+    """Register a client as admin dashboard (legacy alias of register_device)"""
+    return _register_session({'device_class': 'admin'})
+
+
+@socketio.on('request_devices_snapshot')
+def handle_request_devices_snapshot():
+    """Send the full device list to an admin (initial load or after a missed delta)"""
+    if request.sid not in admin_sessions:
+        return
+    emit('devices_updated', get_devices_snapshot())
 
-        socketio.emit('devices_updated', get_connected_devices_info(), room=None)
+
+@socketio.on('telemetry_ping')
+def handle_telemetry_ping(client_time=None):
+    """Acknowledge immediately so TV clients can measure round-trip time"""
+    return client_time
+
+
+@socketio.on('device_telemetry')
+def handle_device_telemetry(data):
+    """Store a health telemetry sample reported by a TV client"""
+    if not record_device_telemetry(request.sid, data):
+        logger.debug("Dropped telemetry sample from %s", request.sid)
 
 
 @socketio.on('trigger_animation')
@@ -99,7 +178,7 @@ def handle_trigger_animation(data):
         state['current_animation'] = animation
         save_state(state)
 
-        socketio.emit('animation_changed', {
+        emit_event('media', 'animation_changed', {
             'previous_animation': old_animation,
             'current_animation': animation,
             'media_type': media_type,
@@ -111,7 +190,7 @@ def handle_trigger_animation(data):
             'reason': 'media_changed',
             'new_media': animation,
             'media_type': media_type
-        }, broadcast=True)
+        }, room=TV_ROOM)
 
         logger.info("Animation changed from '%s' to '%s' via WebSocket", old_animation, animation)
 
@@ -122,22 +201,23 @@ def handle_trigger_animation(data):
 
 @socketio.on('get_status')
 def handle_get_status():
-    """Get current server status via WebSocket"""
-    state = load_state()
-    current_media = state.get('current_animation')
-    media_path, media_type = find_media_file(current_media) if current_media else (None, None)
+    """Get current server status via WebSocket (served from the cached snapshot)"""
+    version, status = get_status_snapshot()
+    emit('status', status)
 
-    emit('status', {
-        'current_animation': current_media,
-        'current_media': current_media,
-        'media_type': media_type,
-        'available_animations': get_animation_files(),
-        'available_videos': get_video_files(),
-        'available_media': get_all_media_files(),
-        'animations_count': len(get_animation_files()),
-        'videos_count': len(get_video_files()),
-        'total_media_count': len(get_all_media_files())
-    })
+
+@socketio.on('status_heartbeat')
+def handle_status_heartbeat(data=None):
+    """Lightweight heartbeat: acknowledge with the state version only.
+
+    The client sends the version it last saw; the full status is included in
+    the acknowledgement only when that version is stale.
+    """
+    version, status = get_status_snapshot()
+    known_version = data.get('version') if isinstance(data, dict) else None
+    if known_version == version:
+        return {'version': version}
+    return {'version': version, 'status': status}
 
 
 @socketio.on('scene_change')
@@ -218,7 +298,7 @@ def handle_video_control(data):
             'action': action,
             'value': value,
             'message': f"Video control: {action}"
-        }, broadcast=True)
+        }, room=TV_ROOM)
 
         logger.debug("Video control: %s %s", action, f'({value})' if value is not None else '')
 
@@ -237,7 +317,7 @@ def handle_video_seek(data):
             'action': 'seek',
             'value': seek_time,
             'message': f"Video seek to {seek_time}s"
-        }, broadcast=True)
+        }, room=TV_ROOM)
 
         logger.debug("Video seek to %ss", seek_time)
 
@@ -257,7 +337,7 @@ def handle_video_volume(data):
             'action': 'volume',
             'value': volume,
             'message': f"Video volume set to {int(volume * 100)}%"
-        }, broadcast=True)
+        }, room=TV_ROOM)
 
         logger.debug("Video volume set to %d%%", int(volume * 100))
 
@@ -7,148 +7,525 @@ import json
 import logging
 import asyncio
 import threading
+import time
+from collections import deque
+
 import websockets
 
-from config import __version__, WEBSOCKET_PORT
+from config import (
+    __version__, WEBSOCKET_PORT, DATA_DIR,
+    RAW_WS_PING_INTERVAL, RAW_WS_PING_TIMEOUT, RAW_WS_SEND_TIMEOUT,
+    RAW_WS_SEND_QUEUE_SIZE, RAW_WS_OVERFLOW_POLICY
+)
 from extensions import socketio
+from event_stream import emit_event
 from media_manager import (
     find_media_file, load_state, save_state,
-    is_video_file, get_all_media_files
+    is_video_file, get_all_media_files, get_status_snapshot
 )
-from device_tracking import connected_devices
+from device_tracking import TV_ROOM, connected_devices, get_connected_devices_info
+from event_stream import EVENT_TOPICS, add_event_listener
+from event_bridge import EventBridge, BridgeFullError
 
 logger = logging.getLogger(__name__)
 
 
+# =============================================================================
+# Actions (run on the eventlet hub via the event bridge)
+# =============================================================================
+
+def apply_trigger_action(data):
+    """Change the current media for a raw WebSocket trigger; returns the response dict"""
+    animation = data.get('animation')
+    instant = data.get('instant', True)
+    force_refresh = data.get('force_refresh', True)
+    source_name = data.get('source', 'streamerbot_websocket')
+
+    if not animation:
+        return {
+            'status': 'error',
+            'message': 'Missing animation parameter'
+        }
+
+    media_path, media_type = find_media_file(animation)
+    if not media_path:
+        return {
+            'status': 'error',
+            'message': f'Animation file not found: {animation}',
+            'available_media': get_all_media_files()
+        }
+
+    state = load_state()
+    old_animation = state.get('current_animation')
+    state['current_animation'] = animation
+    save_state(state)
+
+    media_type = "video" if is_video_file(animation) else "animation"
+
+    emit_event('media', 'animation_changed', {
+        'previous_animation': old_animation,
+        'current_animation': animation,
+        'media_type': media_type,
+        'message': f"Media changed to '{animation}' ({media_type}) via StreamerBot WebSocket",
+        'refresh_page': force_refresh,
+        'instant': instant,
+        'source': source_name
+    })
+
+    if force_refresh:
+        socketio.emit('page_refresh', {
+            'animation': animation,
+            'instant': instant,
+            'source': source_name
+        }, room=TV_ROOM)
+
+    logger.info("StreamerBot: Animation changed to %s", animation)
+    return {
+        'status': 'success',
+        'message': f'Animation changed to {animation}',
+        'animation': animation,
+        'instant': instant,
+        'force_refresh': force_refresh,
+        'media_type': media_type
+    }
+
+
+def build_status_action(data=None):
+    """Current status for a raw WebSocket get_status request (from the cached snapshot)"""
+    version, status = get_status_snapshot()
+    return {
+        'status': 'success',
+        'current_animation': status['current_animation'],
+        'media_type': status['media_type'],
+        'state_version': version,
+        'connected_devices': len(connected_devices),
+        'server_version': __version__
+    }
+
+
+def build_topic_snapshot(topics):
+    """Current value of each subscribed topic, sent with the subscribe reply"""
+    snapshot = {}
+    if 'media' in topics:
+        version, status = get_status_snapshot()
+        snapshot['media'] = {
+            'current_animation': status['current_animation'],
+            'media_type': status['media_type'],
+            'state_version': version
+        }
+    if 'scene' in topics:
+        try:
+            with open(DATA_DIR / 'config' / 'obs_current_scene.json', 'r', encoding='utf-8') as f:
+                snapshot['scene'] = {'current_scene': json.load(f).get('current_scene')}
+        except (OSError, ValueError):
+            snapshot['scene'] = {'current_scene': None}
+    if 'device' in topics:
+        devices = get_connected_devices_info()
+        snapshot['device'] = {
+            'tv_count': devices['tv_count'],
+            'admin_count': devices['admin_count'],
+            'streamerbot_count': devices['streamerbot_count'],
+            'total_count': devices['total_count']
+        }
+    return snapshot
+
+
+def public_event_data(topic, data):
+    """Event payload as forwarded to raw clients, which are unauthenticated.
+
+    Device deltas carry session IDs, user agents and addresses meant for the
+    admin dashboard, so raw subscribers only get the batch number and counts.
+    """
+    if topic == 'device':
+        return {'seq': data.get('seq'), 'counts': data.get('counts')}
+    return data
+
+
+# Actions dispatched through the bridge; each takes the request dict
+BRIDGED_ACTIONS = {
+    'trigger_animation': apply_trigger_action,
+    'get_status': build_status_action,
+}
+
+# Protocol versions understood by this server (v1 = one action per frame, in order)
+PROTOCOL_VERSIONS = (1, 2)
+MAX_BATCH_SIZE = 32          # Actions per v2 batch frame
+MAX_IN_FLIGHT_PER_CLIENT = 64  # Concurrent v2 requests per connection
+
+
+OVERFLOW_POLICIES = ('drop_oldest', 'disconnect')
+
+
+class RawClientSession:
+    """Per-connection state for a raw WebSocket client.
+
+    Outbound frames go through a bounded queue drained by a dedicated writer
+    task, so producers (replies, broadcasts) never wait on a slow socket.
+    When the queue is full the overflow policy either drops the oldest frame
+    or disconnects the client; a send that stalls longer than the send
+    timeout also disconnects it.
+    """
+
+    def __init__(self, websocket, queue_size=RAW_WS_SEND_QUEUE_SIZE, overflow_policy=RAW_WS_OVERFLOW_POLICY):
+        self.websocket = websocket
+        self.protocol = 1
+        self.topics = set()
+        self.in_flight = asyncio.Semaphore(MAX_IN_FLIGHT_PER_CLIENT)
+        self.tasks = set()
+        self.connected_at = time.time()
+
+        self.queue_size = queue_size
+        self.overflow_policy = overflow_policy if overflow_policy in OVERFLOW_POLICIES else 'drop_oldest'
+        self._outbox = deque()  # (frame, enqueued_at)
+        self._outbox_ready = asyncio.Event()
+        self._writer = None
+        self.closing = False
+
+        self.stats = {
+            'sent': 0,
+            'dropped': 0,
+            'max_queue_depth': 0,
+            'send_latency_ms_total': 0.0,
+            'send_latency_ms_max': 0.0,
+        }
+
+    def start_writer(self):
+        self._writer = asyncio.ensure_future(self._write_loop())
+
+    def stop_writer(self):
+        if self._writer:
+            self._writer.cancel()
+
+    def send(self, payload):
+        """Queue a reply/event for this client (never blocks)"""
+        self.send_frame(json.dumps(payload))
+
+    def send_frame(self, frame):
+        """Queue an already-serialized frame (shared across clients by broadcasts)"""
+        if self.closing:
+            return False
+
+        if len(self._outbox) >= self.queue_size:
+            if self.overflow_policy == 'disconnect':
+                logger.warning("Raw WebSocket client %s send queue overflow — disconnecting",
+                               self.websocket.remote_address)
+                self.close(1008, 'Send queue overflow')
+                return False
+            self._outbox.popleft()
+            self.stats['dropped'] += 1
+
+        self._outbox.append((frame, time.monotonic()))
+        self.stats['max_queue_depth'] = max(self.stats['max_queue_depth'], len(self._outbox))
+        self._outbox_ready.set()
+        return True
+
+    def close(self, code, reason):
+        if self.closing:
+            return
+        self.closing = True
+        self._outbox.clear()
+        asyncio.ensure_future(self.websocket.close(code=code, reason=reason))
+
+    async def _write_loop(self):
+        while True:
+            await self._outbox_ready.wait()
+            self._outbox_ready.clear()
+
+            while self._outbox:
+                frame, enqueued_at = self._outbox.popleft()
+                try:
+                    await asyncio.wait_for(self.websocket.send(frame), RAW_WS_SEND_TIMEOUT)
+                except asyncio.TimeoutError:
+                    logger.warning("Raw WebSocket client %s stalled for %.0fs — disconnecting",
+                                   self.websocket.remote_address, RAW_WS_SEND_TIMEOUT)
+                    self.close(1011, 'Send timeout')
+                    return
+                except websockets.exceptions.ConnectionClosed:
+                    return
+
+                latency_ms = (time.monotonic() - enqueued_at) * 1000
+                self.stats['sent'] += 1
+                self.stats['send_latency_ms_total'] += latency_ms
+                self.stats['send_latency_ms_max'] = max(self.stats['send_latency_ms_max'], latency_ms)
+
+    def get_stats(self):
+        """Queue depth, drop counts and send latency for this client"""
+        stats = dict(self.stats)
+        latency_total = stats.pop('send_latency_ms_total')
+        stats['queue_depth'] = len(self._outbox)
+        stats['avg_send_latency_ms'] = round(latency_total / stats['sent'], 3) if stats['sent'] else 0.0
+        stats['send_latency_ms_max'] = round(stats['send_latency_ms_max'], 3)
+        stats['address'] = f"{self.websocket.remote_address[0]}:{self.websocket.remote_address[1]}" if self.websocket.remote_address else None
+        stats['protocol'] = self.protocol
+        stats['topics'] = sorted(self.topics)
+        return stats
+
+
 class RawWebSocketServer:
-    """Raw WebSocket server for StreamerBot compatibility."""
+    """Raw WebSocket server for StreamerBot compatibility.
+
+    The websockets server runs its own asyncio loop; anything that touches
+    state files or Socket.IO is handed to the eventlet hub through
+    ``self.bridge`` so the asyncio loop never blocks.
+
+    Protocol v1 (default): one JSON action per frame, replies in order.
+    Protocol v2 (after ``{"action": "hello", "protocol": 2}``): a frame may be
+    one action or an array of actions, each with an optional ``id`` that is
+    echoed in its reply. Actions execute in the order received but replies are
+    sent as soon as each completes, so clients can pipeline requests.
+    """
 
     def __init__(self, port=None):
         self.port = port or WEBSOCKET_PORT
         self.clients = set()
+        self.sessions = {}  # {websocket: RawClientSession}
         self.server = None
+        self.bridge = EventBridge(name='raw-websocket')
+
+    def get_capabilities(self):
+        """Capabilities advertised in the hello handshake"""
+        return {
+            'protocols': list(PROTOCOL_VERSIONS),
+            'actions': sorted(set(BRIDGED_ACTIONS) | {'hello', 'subscribe', 'unsubscribe'}),
+            'topics': sorted(EVENT_TOPICS),
+            'batch': True,
+            'request_ids': True,
+            'max_batch_size': MAX_BATCH_SIZE,
+            'max_in_flight': MAX_IN_FLIGHT_PER_CLIENT
+        }
+
+    def handle_hello(self, session, request):
+        """Negotiate the protocol version and report server capabilities"""
+        requested = request.get('protocol', 1)
+        if requested not in PROTOCOL_VERSIONS:
+            return {
+                'status': 'error',
+                'message': f'Unsupported protocol version: {requested}',
+                'capabilities': self.get_capabilities()
+            }
+        session.protocol = requested
+        return {
+            'status': 'success',
+            'protocol': session.protocol,
+            'server_version': __version__,
+            'capabilities': self.get_capabilities()
+        }
+
+    def _parse_topics(self, request):
+        topics = request.get('topics', ['*'])
+        if isinstance(topics, str):
+            topics = [topics]
+        if not isinstance(topics, list):
+            return None, 'topics must be a list of topic names'
+        if '*' in topics:
+            return set(EVENT_TOPICS), None
+        unknown = [topic for topic in topics if topic not in EVENT_TOPICS]
+        if unknown:
+            return None, f"Unknown topic(s): {', '.join(map(str, unknown))} (available: {', '.join(sorted(EVENT_TOPICS))})"
+        return set(topics), None
+
+    async def handle_subscribe(self, session, request):
+        """Start pushing events for the requested topics; replies with their current values"""
+        topics, error = self._parse_topics(request)
+        if error:
+            return {'status': 'error', 'message': error}
+
+        session.topics |= topics
+        snapshot = await self.bridge.call(build_topic_snapshot, topics)
+        if 'queue' in topics:
+            snapshot['queue'] = self.get_queue_state()
+        logger.info("Raw WebSocket client %s subscribed to %s", session.websocket.remote_address, sorted(topics))
+        return {
+            'status': 'success',
+            'topics': sorted(session.topics),
+            'snapshot': snapshot
+        }
+
+    def handle_unsubscribe(self, session, request):
+        """Stop pushing events for the given topics (all when omitted)"""
+        topics, error = self._parse_topics(request)
+        if error:
+            return {'status': 'error', 'message': error}
+        session.topics -= topics
+        return {
+            'status': 'success',
+            'topics': sorted(session.topics)
+        }
+
+    async def execute_action(self, session, request):
+        """Run a single action and return its response dict"""
+        if not isinstance(request, dict):
+            return {'status': 'error', 'message': 'Action must be a JSON object'}
+
+        action = request.get('action')
+        try:
+            if action == 'hello':
+                response = self.handle_hello(session, request)
+            elif action == 'subscribe':
+                response = await self.handle_subscribe(session, request)
+            elif action == 'unsubscribe':
+                response = self.handle_unsubscribe(session, request)
+            elif action in BRIDGED_ACTIONS:
+                response = await self.bridge.call(BRIDGED_ACTIONS[action], request)
+            else:
+                response = {
+                    'status': 'error',
+                    'message': f'Unknown action type: {action}'
+                }
+        except BridgeFullError as e:
+            logger.warning("Raw WebSocket command rejected: %s", e)
+            response = {
+                'status': 'error',
+                'message': f'Server busy: {str(e)}'
+            }
+        except Exception as e:
+            logger.error("Raw WebSocket error: %s", e)
+            response = {
+                'status': 'error',
+                'message': f'Server error: {str(e)}'
+            }
+
+        if session.protocol >= 2:
+            response = {'id': request.get('id'), 'action': action, **response}
+        elif 'id' in request:
+            response['id'] = request['id']
+        return response
+
+    async def _execute_and_reply(self, session, request):
+        try:
+            session.send(await self.execute_action(session, request))
+        finally:
+            session.in_flight.release()
+
+    async def dispatch_v2(self, session, data):
+        """Start every action in a v2 frame without waiting for earlier replies"""
+        requests = data if isinstance(data, list) else [data]
+        if len(requests) > MAX_BATCH_SIZE:
+            session.send({
+                'status': 'error',
+                'message': f'Batch too large ({len(requests)} actions, max {MAX_BATCH_SIZE})'
+            })
+            return
+
+        for request in requests:
+            # Bounded per-connection concurrency: a flooding client waits here
+            await session.in_flight.acquire()
+            task = asyncio.ensure_future(self._execute_and_reply(session, request))
+            session.tasks.add(task)
+            task.add_done_callback(session.tasks.discard)
 
     async def handle_client(self, websocket, path):
         """Handle incoming raw WebSocket connections from StreamerBot"""
         logger.info("Raw WebSocket client connected from %s", websocket.remote_address)
+        session = RawClientSession(websocket)
+        session.start_writer()
         self.clients.add(websocket)
+        self.sessions[websocket] = session
 
         try:
             async for message in websocket:
                 try:
                     data = json.loads(message)
                     logger.debug("Raw WebSocket message received: %s", data)
-
-                    if data.get('action') == 'trigger_animation':
-                        animation = data.get('animation')
-                        instant = data.get('instant', True)
-                        force_refresh = data.get('force_refresh', True)
-                        source_name = data.get('source', 'streamerbot_websocket')
-
-                        if animation:
-                            media_path, media_type = find_media_file(animation)
-                            if not media_path:
-                                available_media = get_all_media_files()
-                                error_response = {
-                                    'status': 'error',
-                                    'message': f'Animation file not found: {animation}',
-                                    'available_media': available_media
-                                }
-                                await websocket.send(json.dumps(error_response))
-                                continue
-
-                            state = load_state()
-                            old_animation = state.get('current_animation')
-                            state['current_animation'] = animation
-                            save_state(state)
-
-                            media_type = "video" if is_video_file(animation) else "animation"
-
-                            socketio.emit('animation_changed', {
-                                'previous_animation': old_animation,
-                                'current_animation': animation,
-                                'media_type': media_type,
-                                'message': f"Media changed to '{animation}' ({media_type}) via StreamerBot WebSocket",
-                                'refresh_page': force_refresh,
-                                'instant': instant,
-                                'source': source_name
-                            })
-
-                            if force_refresh:
-                                socketio.emit('page_refresh', {
-                                    'animation': animation,
-                                    'instant': instant,
-                                    'source': source_name
-                                })
-
-                            response = {
-                                'status': 'success',
-                                'message': f'Animation changed to {animation}',
-                                'animation': animation,
-                                'instant': instant,
-                                'force_refresh': force_refresh,
-                                'media_type': media_type
-                            }
-                            await websocket.send(json.dumps(response))
-                            logger.info("StreamerBot: Animation changed to %s", animation)
-                        else:
-                            error_response = {
-                                'status': 'error',
-                                'message': 'Missing animation parameter'
-                            }
-                            await websocket.send(json.dumps(error_response))
-
-                    elif data.get('action') == 'get_status':
-                        state = load_state()
-                        status_response = {
-                            'status': 'success',
-                            'current_animation': state.get('current_animation'),
-                            'connected_devices': len(connected_devices),
-                            'server_version': __version__
-                        }
-                        await websocket.send(json.dumps(status_response))
-
-                    else:
-                        error_response = {
-                            'status': 'error',
-                            'message': f'Unknown action type: {data.get("action")}'
-                        }
-                        await websocket.send(json.dumps(error_response))
-
                 except json.JSONDecodeError:
-                    error_response = {
+                    session.send({
                         'status': 'error',
                         'message': 'Invalid JSON format'
-                    }
-                    await websocket.send(json.dumps(error_response))
-                except Exception as e:
-                    error_response = {
+                    })
+                    continue
+
+                if session.protocol >= 2:
+                    await self.dispatch_v2(session, data)
+                elif isinstance(data, list):
+                    session.send({
                         'status': 'error',
-                        'message': f'Server error: {str(e)}'
-                    }
-                    await websocket.send(json.dumps(error_response))
-                    logger.error("Raw WebSocket error: %s", e)
+                        'message': 'Batched actions require protocol v2 (send {"action": "hello", "protocol": 2})'
+                    })
+                else:
+                    session.send(await self.execute_action(session, data))
 
         except websockets.exceptions.ConnectionClosed:
             logger.info("Raw WebSocket client disconnected: %s", websocket.remote_address)
         except Exception as e:
             logger.error("Raw WebSocket handler error: %s", e)
         finally:
+            for task in list(session.tasks):
+                task.cancel()
+            session.stop_writer()
+            self.sessions.pop(websocket, None)
             self.clients.discard(websocket)
 
+    def broadcast(self, payload):
+        """Queue a payload for every connected client (serialized once).
+
+        Must run on the server's asyncio loop; from the eventlet side use
+        ``self.bridge.push(self.broadcast, payload)``.
+        """
+        frame = json.dumps(payload)
+        for session in list(self.sessions.values()):
+            session.send_frame(frame)
+
+    def on_server_event(self, topic, event, data):
+        """Event stream listener (eventlet side): forward to the asyncio loop if anyone subscribed"""
+        if any(topic in session.topics for session in list(self.sessions.values())):
+            self.bridge.push(self._deliver_event, topic, event, public_event_data(topic, data))
+
+    def _deliver_event(self, topic, event, data):
+        frame = json.dumps({
+            'type': 'event',
+            'topic': topic,
+            'event': event,
+            'data': data,
+            'timestamp': time.time()
+        })
+        for session in list(self.sessions.values()):
+            if topic in session.topics:
+                session.send_frame(frame)
+
+    def get_queue_state(self):
+        """Snapshot for the 'queue' topic: command backlog between the loops"""
+        bridge = self.bridge.get_metrics()
+        return {
+            'command_depth': bridge['command_depth'],
+            'event_depth': bridge['event_depth'],
+            'max_depth': bridge['max_depth']
+        }
+
+    def get_metrics(self):
+        """Client count, per-client send queue stats and event bridge queue metrics"""
+        sessions = [session.get_stats() for session in list(self.sessions.values())]
+        return {
+            'clients': len(self.clients),
+            'protocol_v2_clients': sum(1 for session in sessions if session['protocol'] >= 2),
+            'send_queue': {
+                'size': RAW_WS_SEND_QUEUE_SIZE,
+                'overflow_policy': RAW_WS_OVERFLOW_POLICY,
+                'ping_interval': RAW_WS_PING_INTERVAL,
+                'ping_timeout': RAW_WS_PING_TIMEOUT,
+                'send_timeout': RAW_WS_SEND_TIMEOUT,
+                'dropped_total': sum(session['dropped'] for session in sessions)
+            },
+            'sessions': sessions,
+            'bridge': self.bridge.get_metrics()
+        }
+
     def start_server(self):
         """Start the raw WebSocket server in a separate thread"""
+        self.bridge.start()
+        add_event_listener(self.on_server_event)
+
         def run_server():
             loop = asyncio.new_event_loop()
             asyncio.set_event_loop(loop)
+            self.bridge.attach_loop(loop)
 
             try:
                 start_server = websockets.serve(
                     self.handle_client,
                     "0.0.0.0",
                     self.port,
-                    ping_interval=20,
-                    ping_timeout=10
+                    ping_interval=RAW_WS_PING_INTERVAL or None,
+                    ping_timeout=RAW_WS_PING_TIMEOUT or None
                 )
 
                 logger.info("Raw WebSocket server starting on port %d for StreamerBot...", self.port)
@@ -4,11 +4,13 @@ Example script to trigger animation changes from OBS or other automation tools.
 This demonstrates how to programmatically switch animations via HTTP API or WebSocket.
 """
 
+import os
 import requests
 import sys
 import json
 import socketio
 import time
+import uuid
 
 
 def trigger_animation(animation_name, server_url="http://localhost:8080"):
@@ -227,6 +229,33 @@ def control_video_websocket(action, value=None, server_url="http://localhost:808
         return {"error": f"WebSocket error: {str(e)}"}
 
 
+def trigger_animation_spool(animation_name, spool_dir="data/triggers"):
+    """
+    Queue an animation trigger in the spool directory (lossless file trigger).
+    
+    The file is written under a temporary name and renamed into place, so the
+    server never reads a half-written trigger. Names start with a millisecond
+    timestamp so triggers are consumed in the order they were queued.
+    
+    Args:
+        animation_name: Name of the animation file (e.g., 'brb.html')
+        spool_dir: Path to the server's data/triggers directory
+    
+    Returns:
+        dict: Path of the queued trigger file
+    """
+    os.makedirs(spool_dir, exist_ok=True)
+    name = f"{int(time.time() * 1000):013d}-{uuid.uuid4().hex[:8]}"
+    temp_path = os.path.join(spool_dir, f"{name}.tmp")
+    final_path = os.path.join(spool_dir, f"{name}.trigger")
+    
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        f.write(animation_name)
+    os.replace(temp_path, final_path)
+    
+    return {"success": True, "queued": final_path}
+
+
 if __name__ == "__main__":
     # Example usage
     if len(sys.argv) < 2:
@@ -235,6 +264,7 @@ if __name__ == "__main__":
         print("  list                          - List available media files")
         print("  trigger <media>               - Trigger media via HTTP API")
         print("  websocket <media>             - Trigger media via WebSocket")
+        print("  spool <media> [spool_dir]     - Queue media in the trigger spool directory")
         print("  scene <scene_name>            - Trigger scene change via WebSocket")
         print("  video <action> [value]        - Control video playback")
         print("\nExamples:")
@@ -274,6 +304,16 @@ if __name__ == "__main__":
         result = trigger_animation_websocket(animation_name)
         print(json.dumps(result, indent=2))
     
+    elif command == "spool":
+        if len(sys.argv) < 3:
+            print("Error: Please specify animation name")
+            print("Example: python example_trigger.py spool particles.html data/triggers")
+            sys.exit(1)
+        
+        spool_dir = sys.argv[3] if len(sys.argv) > 3 else "data/triggers"
+        result = trigger_animation_spool(sys.argv[2], spool_dir)
+        print(json.dumps(result, indent=2))
+    
     elif command == "scene":
         if len(sys.argv) < 3:
             print("Error: Please specify scene name")
@@ -325,5 +365,5 @@ if __name__ == "__main__":
     
     else:
         print(f"Unknown command: {command}")
-        print("Valid commands: list, trigger, websocket, scene, video")
+        print("Valid commands: list, trigger, websocket, spool, scene, video")
         sys.exit(1)
@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+OBS Scene-Switch Benchmark for Angels-TV-Animator
+=================================================
+Drives the real OBS path (obs_manager.OBSWebSocketClient -> scene mapping
+lookup -> scene_changed emit) against the bundled OBS simulator, so changes
+to the OBS integration can be performance-tested without OBS Studio.
+
+Measures:
+    - storm:     scene-switch request -> scene_changed emit latency
+                 (p50/p95/p99/max) and events lost, at a target switch rate
+    - reconnect: time from a simulated OBS drop back to connected, and the
+                 connection attempts it took (simulator refuses new
+                 connections for --downtime-ms)
+
+The client runs as a separate OBS instance ("bench"), so the app's
+obs_current_scene.json and data/config files are never touched.
+
+Requirements:
+    pip install -r requirements.txt
+
+Usage (from project root):
+    python z_extras/obs_benchmark.py
+    python z_extras/obs_benchmark.py --count 2000 --rate 200 --latency-ms 5 --jitter-ms 2
+    python z_extras/obs_benchmark.py --skip-reconnect --json
+"""
+
+# CRITICAL: eventlet monkey patching must happen before any other imports
+# (matches production app.py behavior)
+import eventlet
+eventlet.monkey_patch()
+
+import argparse
+import json
+import logging
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# ---------------------------------------------------------------------------
+# Path setup — make project root importable and set working directory
+# ---------------------------------------------------------------------------
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+os.chdir(project_root)
+
+from obswebsocket import obsws, requests  # noqa: E402
+
+import obs_manager  # noqa: E402
+from event_stream import add_event_listener  # noqa: E402
+from scene_mappings import SceneMappingIndex  # noqa: E402
+
+BENCH_INSTANCE = 'bench'
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_simulator(port, args):
+    """Run obs_simulator.py in its own process (asyncio must not share the eventlet hub)"""
+    command = [
+        sys.executable, str(Path(__file__).parent / 'obs_simulator.py'),
+        '--port', str(port), '--scenes', str(args.scenes),
+        '--latency-ms', str(args.latency_ms), '--jitter-ms', str(args.jitter_ms),
+        '--transition-ms', '0',
+    ]
+    if args.password:
+        command += ['--password', args.password]
+    process = subprocess.Popen(command, stdout=subprocess.DEVNULL)
+
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.2).close()
+            return process
+        except OSError:
+            time.sleep(0.05)
+    process.kill()
+    raise RuntimeError('OBS simulator did not start')
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def summarize_ms(values):
+    return {
+        'count': len(values),
+        'p50_ms': round(percentile(values, 50) * 1000, 3) if values else None,
+        'p95_ms': round(percentile(values, 95) * 1000, 3) if values else None,
+        'p99_ms': round(percentile(values, 99) * 1000, 3) if values else None,
+        'max_ms': round(max(values) * 1000, 3) if values else None,
+    }
+
+
+class SceneProbe:
+    """Records scene_changed emits and mapping lookups for the bench instance"""
+
+    def __init__(self, mappings_path):
+        self.index = SceneMappingIndex(mappings_path)
+        self.emitted = []        # (scene, monotonic time)
+        self.lookup_times = []
+        self.mapped = 0
+
+    def handle_scene(self, scene_name, instance):
+        # Stand-in for OBSSceneWatcher.dispatch_scene: the lookup, without firing TVs
+        started = time.perf_counter()
+        animation, _ = self.index.lookup(scene_name, instance)
+        self.lookup_times.append(time.perf_counter() - started)
+        if animation:
+            self.mapped += 1
+
+    def on_event(self, topic, event, data):
+        if event == 'scene_changed' and data.get('instance') == BENCH_INSTANCE:
+            self.emitted.append((data['scene_name'], time.monotonic()))
+
+
+def run_storm(control, probe, scenes, count, rate):
+    """Fire ``count`` program-scene switches at ``rate``/s; match emits to sends in order"""
+    sent = []
+    interval = 1.0 / rate if rate else 0
+    pool = eventlet.GreenPool(256)
+    probe.emitted.clear()
+    current = control.call(requests.GetCurrentProgramScene()).getCurrentProgramSceneName()
+
+    started = time.monotonic()
+    for i in range(count):
+        scene = scenes[i % len(scenes)]
+        if scene == current:
+            scene = scenes[(i + 1) % len(scenes)]
+        current = scene
+        sent.append((scene, time.monotonic()))
+        pool.spawn_n(control.call, requests.SetCurrentProgramScene(sceneName=scene))
+        if interval:
+            eventlet.sleep(max(0.0, started + (i + 1) * interval - time.monotonic()))
+    pool.waitall()
+
+    # Let trailing events drain
+    deadline = time.monotonic() + 2
+    while len(probe.emitted) < count and time.monotonic() < deadline:
+        eventlet.sleep(0.01)
+    duration = time.monotonic() - started
+
+    latencies, position = [], 0
+    for scene, received_at in list(probe.emitted):
+        while position < len(sent) and sent[position][0] != scene:
+            position += 1
+        if position == len(sent):
+            break
+        latencies.append(received_at - sent[position][1])
+        position += 1
+
+    return {
+        'sent': count,
+        'received': len(probe.emitted),
+        'lost': count - len(latencies),
+        'duration_s': round(duration, 3),
+        'achieved_rate': round(count / duration, 1),
+        'emit_latency': summarize_ms(latencies),
+    }
+
+
+def run_reconnect(client, control_factory, downtime_ms, rounds):
+    """Drop all OBS connections and time the client's way back to connected"""
+    results = []
+    for _ in range(rounds):
+        control = control_factory()
+        attempts_before = client._connect_attempt_count
+        dropped_at = time.monotonic()
+        control.call(requests.SimDropConnections(downtimeMs=downtime_ms))
+        control.disconnect()
+
+        # Wait for the drop to be noticed, then for the reconnect
+        deadline = dropped_at + 5
+        while client.connected and time.monotonic() < deadline:
+            eventlet.sleep(0.005)
+        detected_at = time.monotonic()
+        deadline = detected_at + downtime_ms / 1000 + 70
+        while not client.connected and time.monotonic() < deadline:
+            eventlet.sleep(0.005)
+
+        results.append({
+            'detect_ms': round((detected_at - dropped_at) * 1000, 1),
+            'reconnect_ms': round((time.monotonic() - dropped_at) * 1000, 1) if client.connected else None,
+            'attempts': client._connect_attempt_count - attempts_before,
+        })
+        eventlet.sleep(0.2)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='OBS scene-switch storm benchmark')
+    parser.add_argument('--count', type=int, default=500, help='scene switches per storm')
+    parser.add_argument('--rate', type=float, default=100.0, help='switches per second (0 = as fast as possible)')
+    parser.add_argument('--scenes', type=int, default=16)
+    parser.add_argument('--mappings', type=int, default=200, help='exact mappings in the generated mapping file')
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='simulated OBS request latency')
+    parser.add_argument('--jitter-ms', type=float, default=0.0)
+    parser.add_argument('--password', default='bench', help='simulator password ("" disables auth)')
+    parser.add_argument('--downtime-ms', type=float, default=1500, help='simulated outage per reconnect round')
+    parser.add_argument('--reconnect-rounds', type=int, default=3)
+    parser.add_argument('--skip-reconnect', action='store_true')
+    parser.add_argument('--json', action='store_true', help='print the results as JSON')
+    parser.add_argument('--verbose', action='store_true', help='show obs_manager logging')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.CRITICAL,
+                        format='%(asctime)s %(name)s %(levelname)s %(message)s')
+
+    port = free_port()
+    simulator = start_simulator(port, args)
+    workdir = tempfile.TemporaryDirectory()
+    try:
+        scenes = [f"Scene {i}" for i in range(1, args.scenes + 1)]
+        mappings_path = Path(workdir.name) / 'obs_mappings.json'
+        mappings = [{'sceneName': f"Unused {i}", 'animation': f"unused_{i}.html"} for i in range(args.mappings)]
+        mappings += [{'sceneName': 'Scene 1*', 'match': 'glob', 'animation': 'scene.html'}]
+        mappings_path.write_text(json.dumps({'mappings': mappings}))
+
+        probe = SceneProbe(mappings_path)
+        obs_manager.set_scene_change_handler(probe.handle_scene)
+        add_event_listener(probe.on_event)
+
+        settings = {'host': '127.0.0.1', 'port': port, 'password': args.password}
+        client = obs_manager.OBSWebSocketClient(BENCH_INSTANCE)
+        client.settings = settings
+
+        connect_started = time.monotonic()
+        if not client.enable_persistent_connection(force=True):
+            raise RuntimeError('Could not connect to the OBS simulator')
+        connect_ms = round((time.monotonic() - connect_started) * 1000, 1)
+
+        def control_factory():
+            control = obsws('127.0.0.1', port, args.password)
+            control.connect()
+            return control
+
+        control = control_factory()
+        try:
+            storm = run_storm(control, probe, scenes, args.count, args.rate)
+        finally:
+            control.disconnect()
+
+        results = {
+            'simulator': {'latency_ms': args.latency_ms, 'jitter_ms': args.jitter_ms, 'scenes': args.scenes},
+            'connect_ms': connect_ms,
+            'storm': storm,
+            'mapping_lookup': {**summarize_ms(probe.lookup_times), 'mapped': probe.mapped},
+        }
+        if not args.skip_reconnect:
+            results['reconnect'] = run_reconnect(client, control_factory, args.downtime_ms, args.reconnect_rounds)
+            results['state_history'] = [
+                {'state': entry['state'], 'reason': entry['reason']} for entry in client.state_history
+            ]
+
+        client.disconnect(permanent=True, force=True)
+    finally:
+        simulator.terminate()
+        simulator.wait(timeout=5)
+        workdir.cleanup()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    latency = results['storm']['emit_latency']
+    print(f"Connect:         {results['connect_ms']} ms")
+    print(f"Storm:           {storm['sent']} switches in {storm['duration_s']} s "
+          f"({storm['achieved_rate']}/s), {storm['lost']} lost")
+    print(f"Emit latency:    p50 {latency['p50_ms']} ms  p95 {latency['p95_ms']} ms  "
+          f"p99 {latency['p99_ms']} ms  max {latency['max_ms']} ms")
+    lookup = results['mapping_lookup']
+    print(f"Mapping lookup:  p50 {lookup['p50_ms']} ms  p99 {lookup['p99_ms']} ms  ({lookup['mapped']} mapped)")
+    for i, round_result in enumerate(results.get('reconnect', []), 1):
+        print(f"Reconnect #{i}:    detected in {round_result['detect_ms']} ms, back in "
+              f"{round_result['reconnect_ms']} ms after {round_result['attempts']} attempt(s)")
+
+
+if __name__ == '__main__':
+    main()
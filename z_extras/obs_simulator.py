@@ -0,0 +1,365 @@
+#!/usr/bin/env python3
+"""
+OBS WebSocket v5 Simulator for Angels-TV-Animator
+=================================================
+A small stand-in for OBS Studio's obs-websocket (protocol v5) so the OBS
+integration (obs_manager.py, scene mappings, event rules) can be exercised
+and benchmarked without a running OBS.
+
+Implements:
+    - Hello / Identify / Identified / Reidentify, with optional password auth
+    - Requests: GetVersion, GetSceneList, GetCurrentProgramScene,
+      SetCurrentProgramScene, GetCurrentPreviewScene, SetCurrentPreviewScene,
+      CreateScene, RemoveScene, SetSceneName, GetStudioModeEnabled,
+      SetStudioModeEnabled, TriggerStudioModeTransition, BroadcastCustomEvent
+    - Events: CurrentProgramSceneChanged, CurrentPreviewSceneChanged,
+      SceneTransitionStarted/Ended, SceneCreated, SceneRemoved,
+      SceneNameChanged, SceneListChanged, StudioModeStateChanged, CustomEvent
+    - Simulator controls (sent as normal requests):
+        SimSetLatency      {"latencyMs": 20, "jitterMs": 5}
+        SimDropConnections {"downtimeMs": 2000}   close every client, refuse new ones for a while
+
+Requirements:
+    pip install -r requirements.txt   (uses the websockets package)
+
+Usage (from project root):
+    python z_extras/obs_simulator.py --port 4460 --scenes 8
+    python z_extras/obs_simulator.py --password secret --latency-ms 30 --jitter-ms 10
+"""
+
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import random
+import secrets
+import time
+
+import websockets
+
+OBS_VERSION = '30.1.2'
+OBS_WEBSOCKET_VERSION = '5.4.2'
+RPC_VERSION = 1
+
+# WebSocket close codes used by obs-websocket
+CLOSE_AUTHENTICATION_FAILED = 4009
+CLOSE_NOT_IDENTIFIED = 4007
+
+# EventSubscription category for each simulated event
+EVENT_CATEGORIES = {
+    'CustomEvent': 1 << 0,               # General
+    'StudioModeStateChanged': 1 << 10,   # Ui
+    'SceneCreated': 1 << 2,              # Scenes
+    'SceneRemoved': 1 << 2,
+    'SceneNameChanged': 1 << 2,
+    'SceneListChanged': 1 << 2,
+    'CurrentProgramSceneChanged': 1 << 2,
+    'CurrentPreviewSceneChanged': 1 << 2,
+    'SceneTransitionStarted': 1 << 4,    # Transitions
+    'SceneTransitionEnded': 1 << 4,
+}
+
+
+class RequestError(Exception):
+    """A failed request, answered with an obs-websocket RequestStatus code"""
+
+    def __init__(self, code, comment):
+        super().__init__(comment)
+        self.code = code
+
+
+def build_auth_string(password, salt, challenge):
+    """obs-websocket v5 auth: base64(sha256(base64(sha256(password + salt)) + challenge))"""
+    secret = base64.b64encode(hashlib.sha256((password + salt).encode('utf-8')).digest())
+    return base64.b64encode(hashlib.sha256(secret + challenge.encode('utf-8')).digest()).decode('utf-8')
+
+
+class OBSSimulator:
+    """In-memory OBS state plus a v5 protocol server on one asyncio loop."""
+
+    def __init__(self, host='127.0.0.1', port=4460, password='', scenes=8,
+                 latency_ms=0.0, jitter_ms=0.0, transition_ms=300, verbose=False):
+        self.host = host
+        self.port = port
+        self.password = password
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.transition_ms = transition_ms
+        self.verbose = verbose
+
+        self.scenes = [f"Scene {i}" for i in range(1, scenes + 1)]
+        self.program_scene = self.scenes[0] if self.scenes else None
+        self.preview_scene = self.program_scene
+        self.studio_mode = False
+
+        self.sessions = {}          # websocket -> {'identified': bool, 'subscriptions': int}
+        self.refuse_until = 0.0
+        self.stats = {'connections': 0, 'refused': 0, 'requests': 0, 'events': 0, 'drops': 0}
+
+    # -------------------------------------------------------------------------
+    # Protocol
+    # -------------------------------------------------------------------------
+
+    async def _delay(self):
+        if self.latency_ms or self.jitter_ms:
+            await asyncio.sleep(max(0.0, self.latency_ms + random.uniform(-self.jitter_ms, self.jitter_ms)) / 1000)
+
+    async def handle_client(self, websocket, path=None):
+        if time.monotonic() < self.refuse_until:
+            self.stats['refused'] += 1
+            await websocket.close(1013, 'Simulated outage')
+            return
+
+        self.stats['connections'] += 1
+        session = {'identified': False, 'subscriptions': 0}
+        self.sessions[websocket] = session
+
+        hello = {'obsWebSocketVersion': OBS_WEBSOCKET_VERSION, 'rpcVersion': RPC_VERSION}
+        if self.password:
+            session['salt'] = secrets.token_urlsafe(24)
+            session['challenge'] = secrets.token_urlsafe(24)
+            hello['authentication'] = {'salt': session['salt'], 'challenge': session['challenge']}
+        await websocket.send(json.dumps({'op': 0, 'd': hello}))
+
+        try:
+            async for raw in websocket:
+                message = json.loads(raw)
+                op, data = message.get('op'), message.get('d', {})
+
+                if op == 1:  # Identify
+                    if self.password and data.get('authentication') != build_auth_string(
+                            self.password, session['salt'], session['challenge']):
+                        await websocket.close(CLOSE_AUTHENTICATION_FAILED, 'Authentication failed.')
+                        return
+                    session['identified'] = True
+                    session['subscriptions'] = data.get('eventSubscriptions', 1023)
+                    await websocket.send(json.dumps({'op': 2, 'd': {'negotiatedRpcVersion': RPC_VERSION}}))
+                elif not session['identified']:
+                    await websocket.close(CLOSE_NOT_IDENTIFIED, 'Not identified.')
+                    return
+                elif op == 3:  # Reidentify
+                    session['subscriptions'] = data.get('eventSubscriptions', session['subscriptions'])
+                    await websocket.send(json.dumps({'op': 2, 'd': {'negotiatedRpcVersion': RPC_VERSION}}))
+                elif op == 6:  # Request
+                    asyncio.ensure_future(self._answer(websocket, data))
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            self.sessions.pop(websocket, None)
+
+    async def _answer(self, websocket, data):
+        self.stats['requests'] += 1
+        await self._delay()
+        request_type = data.get('requestType')
+        handler = getattr(self, f"_req_{request_type}", None)
+        if handler is None:
+            status, response = {'result': False, 'code': 204, 'comment': f"Unknown request type: {request_type}"}, None
+        else:
+            try:
+                response = await handler(data.get('requestData') or {})
+                status = {'result': True, 'code': 100}
+            except RequestError as e:
+                status, response = {'result': False, 'code': e.code, 'comment': str(e)}, None
+            except KeyError as e:
+                status, response = {'result': False, 'code': 300, 'comment': f"Your request is missing the {e} field."}, None
+
+        reply = {'requestType': request_type, 'requestId': data.get('requestId'), 'requestStatus': status}
+        if response is not None:
+            reply['responseData'] = response
+        try:
+            await websocket.send(json.dumps({'op': 7, 'd': reply}))
+        except websockets.ConnectionClosed:
+            pass
+
+    async def emit(self, event_type, event_data=None):
+        """Send an event to every identified client subscribed to its category"""
+        category = EVENT_CATEGORIES.get(event_type, 1 << 0)
+        payload = json.dumps({'op': 5, 'd': {'eventType': event_type, 'eventIntent': category,
+                                             'eventData': event_data or {}}})
+        self.stats['events'] += 1
+        if self.verbose:
+            print(f"event {event_type} {event_data}")
+        for websocket, session in list(self.sessions.items()):
+            if session['identified'] and session['subscriptions'] & category:
+                try:
+                    await websocket.send(payload)
+                except websockets.ConnectionClosed:
+                    pass
+
+    def _require_scene(self, name):
+        if name not in self.scenes:
+            raise RequestError(600, f"No source was found by the name of `{name}`.")
+
+    def _require_studio_mode(self):
+        if not self.studio_mode:
+            raise RequestError(506, 'Studio mode is not active.')
+
+    # -------------------------------------------------------------------------
+    # Requests
+    # -------------------------------------------------------------------------
+
+    async def _req_GetVersion(self, data):
+        return {
+            'obsVersion': OBS_VERSION,
+            'obsWebSocketVersion': OBS_WEBSOCKET_VERSION,
+            'rpcVersion': RPC_VERSION,
+            'availableRequests': sorted(name[5:] for name in dir(self) if name.startswith('_req_')),
+            'platform': 'simulator',
+        }
+
+    async def _req_GetSceneList(self, data):
+        # OBS lists scenes bottom-up, with sceneIndex counting from the bottom
+        scenes = [{'sceneName': name, 'sceneIndex': index} for index, name in enumerate(reversed(self.scenes))]
+        return {
+            'currentProgramSceneName': self.program_scene,
+            'currentPreviewSceneName': self.preview_scene if self.studio_mode else None,
+            'scenes': scenes,
+        }
+
+    async def _req_GetCurrentProgramScene(self, data):
+        return {'currentProgramSceneName': self.program_scene, 'sceneName': self.program_scene}
+
+    async def _req_SetCurrentProgramScene(self, data):
+        scene_name = data['sceneName']
+        self._require_scene(scene_name)
+        if scene_name != self.program_scene:
+            asyncio.ensure_future(self._transition_to(scene_name))
+        return {}
+
+    async def _transition_to(self, scene_name):
+        await self.emit('SceneTransitionStarted', {'transitionName': 'Fade'})
+        self.program_scene = scene_name
+        await self.emit('CurrentProgramSceneChanged', {'sceneName': scene_name})
+        if self.transition_ms:
+            await asyncio.sleep(self.transition_ms / 1000)
+        await self.emit('SceneTransitionEnded', {'transitionName': 'Fade'})
+
+    async def _req_GetCurrentPreviewScene(self, data):
+        self._require_studio_mode()
+        return {'currentPreviewSceneName': self.preview_scene, 'sceneName': self.preview_scene}
+
+    async def _req_SetCurrentPreviewScene(self, data):
+        scene_name = data['sceneName']
+        self._require_scene(scene_name)
+        self._require_studio_mode()
+        if scene_name != self.preview_scene:
+            self.preview_scene = scene_name
+            await self.emit('CurrentPreviewSceneChanged', {'sceneName': scene_name})
+        return {}
+
+    async def _req_GetStudioModeEnabled(self, data):
+        return {'studioModeEnabled': self.studio_mode}
+
+    async def _req_SetStudioModeEnabled(self, data):
+        enabled = bool(data.get('studioModeEnabled'))
+        if enabled != self.studio_mode:
+            self.studio_mode = enabled
+            self.preview_scene = self.program_scene
+            await self.emit('StudioModeStateChanged', {'studioModeEnabled': enabled})
+        return {}
+
+    async def _req_TriggerStudioModeTransition(self, data):
+        self._require_studio_mode()
+        if self.preview_scene != self.program_scene:
+            asyncio.ensure_future(self._studio_transition())
+        return {}
+
+    async def _studio_transition(self):
+        previous = self.program_scene
+        await self._transition_to(self.preview_scene)
+        # OBS swaps the old program scene into preview
+        self.preview_scene = previous
+        await self.emit('CurrentPreviewSceneChanged', {'sceneName': previous})
+
+    async def _req_CreateScene(self, data):
+        scene_name = data['sceneName']
+        if scene_name not in self.scenes:
+            self.scenes.append(scene_name)
+            await self.emit('SceneCreated', {'sceneName': scene_name, 'isGroup': False})
+        return {}
+
+    async def _req_RemoveScene(self, data):
+        scene_name = data['sceneName']
+        self._require_scene(scene_name)
+        self.scenes.remove(scene_name)
+        await self.emit('SceneRemoved', {'sceneName': scene_name, 'isGroup': False})
+        return {}
+
+    async def _req_SetSceneName(self, data):
+        old_name, new_name = data['sceneName'], data['newSceneName']
+        self._require_scene(old_name)
+        self.scenes[self.scenes.index(old_name)] = new_name
+        if self.program_scene == old_name:
+            self.program_scene = new_name
+        if self.preview_scene == old_name:
+            self.preview_scene = new_name
+        await self.emit('SceneNameChanged', {'oldSceneName': old_name, 'sceneName': new_name})
+        return {}
+
+    async def _req_BroadcastCustomEvent(self, data):
+        await self.emit('CustomEvent', data.get('eventData', {}))
+        return {}
+
+    # -------------------------------------------------------------------------
+    # Simulator controls
+    # -------------------------------------------------------------------------
+
+    async def _req_SimSetLatency(self, data):
+        self.latency_ms = float(data.get('latencyMs', self.latency_ms))
+        self.jitter_ms = float(data.get('jitterMs', self.jitter_ms))
+        return {'latencyMs': self.latency_ms, 'jitterMs': self.jitter_ms}
+
+    async def _req_SimDropConnections(self, data):
+        downtime_ms = float(data.get('downtimeMs', 0))
+        asyncio.ensure_future(self._drop_connections(downtime_ms))
+        return {'downtimeMs': downtime_ms}
+
+    async def _drop_connections(self, downtime_ms):
+        await asyncio.sleep(0.05)  # Let the reply go out first
+        self.stats['drops'] += 1
+        self.refuse_until = time.monotonic() + downtime_ms / 1000
+        for websocket in list(self.sessions):
+            await websocket.close(1001, 'Simulated disconnect')
+
+    async def _req_SimGetStats(self, data):
+        return {**self.stats, 'clients': len(self.sessions)}
+
+    # -------------------------------------------------------------------------
+    # Server
+    # -------------------------------------------------------------------------
+
+    async def serve(self, ready=None):
+        async with websockets.serve(self.handle_client, self.host, self.port, ping_interval=None):
+            if ready is not None:
+                ready.set()
+            await asyncio.Future()
+
+    def run(self):
+        print(f"OBS WebSocket simulator listening on ws://{self.host}:{self.port} "
+              f"({len(self.scenes)} scenes, auth {'on' if self.password else 'off'}, "
+              f"latency {self.latency_ms}±{self.jitter_ms} ms)", flush=True)
+        try:
+            asyncio.run(self.serve())
+        except KeyboardInterrupt:
+            pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description='OBS WebSocket v5 simulator')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=4460)
+    parser.add_argument('--password', default='')
+    parser.add_argument('--scenes', type=int, default=8, help='number of scenes ("Scene 1".."Scene N")')
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='delay before each request reply')
+    parser.add_argument('--jitter-ms', type=float, default=0.0, help='random +/- added to the latency')
+    parser.add_argument('--transition-ms', type=int, default=300, help='time between transition start and end')
+    parser.add_argument('--verbose', action='store_true', help='print every event')
+    args = parser.parse_args()
+
+    OBSSimulator(args.host, args.port, args.password, args.scenes, args.latency_ms,
+                 args.jitter_ms, args.transition_ms, args.verbose).run()
+
+
+if __name__ == '__main__':
+    main()